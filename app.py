@@ -3,14 +3,29 @@ from flask import Flask
 from flask_cors import CORS
 from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
+import assets
+import compression
+import metrics
+import sessions
+from serialization import RecipeJSONProvider
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; set LOG_LEVEL=DEBUG for development, where per-request debug lines are affordable
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
 # Create the app
 app = Flask(__name__)
+app.json = RecipeJSONProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET") or "dev-secret-key"
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# Proxies in front of the app whose X-Forwarded-* headers are trusted (one on Replit
+# deployments); remote_addr then identifies the client rather than the proxy
+TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", 1))
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES, x_host=TRUSTED_PROXIES)
+metrics.init_app(app)
+compression.init_app(app)
+assets.init_app(app)
+session_store = sessions.init_app(app)
+if session_store is not None:
+    metrics.register_stats(lambda: {'sessions': session_store.stats()})
 
 # Enable CORS for React frontend
 CORS(app, supports_credentials=True)
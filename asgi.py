@@ -0,0 +1,285 @@
+"""ASGI entry point for the async serving mode.
+
+    uvicorn asgi:app --workers 2
+    SERVER_MODE=async gunicorn -c gunicorn.conf.py asgi:app
+
+Recipe search (plain and streamed) and detail requests spend nearly all
+their time waiting on Spoonacular, so they are served natively on the event
+loop through AsyncRecipeService, with bounded upstream concurrency and a 503 once its
+queue is full. Every other route runs the Flask app on a thread pool.
+"""
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_cookie
+
+import compression
+import metrics
+from async_recipe_service import UpstreamBusyError, async_recipe_service
+from app import TRUSTED_PROXIES
+from main import app as flask_app
+from prefetch import prefetcher
+from ratelimit import client_limiter
+from routes import MAX_PAGE_SIZE, SEARCH_SOURCES
+from serialization import LEGACY_API_VERSION
+from storage import storage
+
+RECIPE_DETAIL_RE = re.compile(r'/api/recipes/(\d+)')
+
+wsgi_app = WSGIMiddleware(flask_app, workers=int(os.environ.get("ASGI_WSGI_THREADS", 16)))
+metrics.register_stats(lambda: {'async': async_recipe_service.stats()})
+
+
+class _Request:
+    """The parts of an ASGI http scope the native routes need"""
+
+    def __init__(self, scope):
+        self.path = scope['path']
+        self.args = {key: values[0] for key, values in
+                     parse_qs(scope['query_string'].decode('latin-1')).items()}
+        self.headers = {key.decode('latin-1').lower(): value.decode('latin-1')
+                        for key, value in scope['headers']}
+        self.client = self._client_address((scope.get('client') or ('', 0))[0])
+        self.cookies = parse_cookie(self.headers.get('cookie', ''))
+
+    def _client_address(self, peer):
+        # The address ProxyFix gives Flask's remote_addr, so both modes throttle the same key
+        if TRUSTED_PROXIES:
+            forwarded = [value.strip() for value in self.headers.get('x-forwarded-for', '').split(',')]
+            if len(forwarded) >= TRUSTED_PROXIES and forwarded[-TRUSTED_PROXIES]:
+                return forwarded[-TRUSTED_PROXIES]
+        return peer
+
+    @property
+    def legacy(self):
+        version = self.args.get('v') or self.headers.get('x-api-version')
+        return version == LEGACY_API_VERSION
+
+    async def user_id(self):
+        """The logged-in user's id, or None; the session store is read off the event loop"""
+        if not hasattr(self, '_user_id'):
+            self._user_id = None
+            if self.cookies.get(flask_app.config['SESSION_COOKIE_NAME']):
+                cookies = SimpleNamespace(cookies=self.cookies)
+                session = await asyncio.get_running_loop().run_in_executor(
+                    None, flask_app.session_interface.open_session, flask_app, cookies
+                )
+                self._user_id = (session or {}).get('user_id')
+        return self._user_id
+
+
+async def _send_json(send, status, payload, headers=(), request=None):
+    body = flask_app.json.dumps(payload).encode()
+    headers = [*headers, (b'vary', b'Accept-Encoding')]
+    encoding = None
+    if request is not None and len(body) >= compression.MIN_SIZE:
+        encoding = compression.negotiate(request.headers.get('accept-encoding'))
+    if encoding:
+        body = compression.compress(body, encoding)
+        headers.append((b'content-encoding', encoding.encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                    *headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_busy(send, error):
+    await _send_json(send, 503, {'error': 'Server busy, please retry shortly'},
+                     [(b'retry-after', str(int(error.retry_after) or 1).encode())])
+
+
+async def _throttled(request, send):
+    """Apply the per-client limit routes.py uses, answering 429 when it is exceeded"""
+    if not client_limiter.rate:
+        return False
+    # The shared store takes a SQLite write lock, so check from a worker thread
+    allowed, retry_after = await asyncio.get_running_loop().run_in_executor(
+        None, client_limiter.check, await request.user_id() or request.client
+    )
+    if not allowed:
+        await _send_json(send, 429, {'error': 'Too many requests, please slow down'},
+                         [(b'retry-after', str(math.ceil(retry_after or 1)).encode())])
+    return not allowed
+
+
+def _search_args(request):
+    """Parse the search filters as routes._search_args does; raises ValueError if invalid"""
+    source = request.args.get('source') or None
+    if source not in SEARCH_SOURCES:
+        raise ValueError('source must be local, remote or hybrid')
+    try:
+        max_results = int(request.args.get('max_results', 12))
+    except ValueError:
+        raise ValueError('max_results must be a number')
+    if not 1 <= max_results <= MAX_PAGE_SIZE:
+        raise ValueError(f'max_results must be between 1 and {MAX_PAGE_SIZE}')
+    return (
+        request.args.get('query', ''),
+        request.args.get('cuisine', ''),
+        request.args.get('meal_type', ''),
+        request.args.get('diet', ''),
+        max_results,
+        source
+    )
+
+
+async def _record_search(request, query, cuisine, meal_type, diet):
+    prefetcher.record_search(query, cuisine, meal_type, diet)
+    # Save search to history if user is logged in (keeps the last 20)
+    user_id = await request.user_id()
+    if user_id and query:
+        await asyncio.get_running_loop().run_in_executor(
+            None, storage.add_search, user_id, query, cuisine, meal_type, diet
+        )
+
+
+async def search_recipes(request, send):
+    if await _throttled(request, send):
+        return
+    try:
+        query, cuisine, meal_type, diet, max_results, source = _search_args(request)
+    except ValueError as e:
+        return await _send_json(send, 400, {'error': str(e)})
+
+    try:
+        await _record_search(request, query, cuisine, meal_type, diet)
+        recipes = await async_recipe_service.search_recipes(query, cuisine, meal_type, diet, max_results, source)
+        await _send_json(send, 200, {'recipes': [recipe.to_dict(legacy=request.legacy) for recipe in recipes]},
+                         request=request)
+
+    except UpstreamBusyError as e:
+        await _send_busy(send, e)
+    except Exception as e:
+        logging.error(f"Search error: {e}")
+        await _send_json(send, 500, {'error': 'Search failed'})
+
+
+async def stream_search_recipes(request, send):
+    """NDJSON or Server-Sent Events search, as the Flask route streams it"""
+    if await _throttled(request, send):
+        return
+    try:
+        query, cuisine, meal_type, diet, max_results, source = _search_args(request)
+    except ValueError as e:
+        return await _send_json(send, 400, {'error': str(e)})
+    sse = (request.args.get('format') == 'sse'
+           or parse_accept_header(request.headers.get('accept'), MIMEAccept).best == 'text/event-stream')
+
+    def encode(event, payload):
+        message = flask_app.json.dumps(payload)
+        return (f"event: {event}\ndata: {message}\n\n" if sse else message + "\n").encode()
+
+    results = async_recipe_service.iter_search(query, cuisine, meal_type, diet, max_results, source)
+    try:
+        await _record_search(request, query, cuisine, meal_type, diet)
+        # Wait for the first result before answering, so a full queue can still be a 503
+        first = await anext(results, None)
+    except UpstreamBusyError as e:
+        return await _send_busy(send, e)
+    except Exception as e:
+        logging.error(f"Search error: {e}")
+        return await _send_json(send, 500, {'error': 'Search failed'})
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream' if sse else b'application/x-ndjson'),
+                    (b'cache-control', b'no-cache'),
+                    # Stop nginx-style proxies from buffering the stream
+                    (b'x-accel-buffering', b'no')]
+    })
+    count = 0
+    try:
+        item = first
+        while item is not None:
+            origin, recipe = item
+            count += 1
+            await send({'type': 'http.response.body', 'more_body': True,
+                        'body': encode('recipe', {'source': origin, 'recipe': recipe.to_dict(legacy=request.legacy)})})
+            item = await anext(results, None)
+    except Exception as e:
+        logging.error(f"Streaming search error: {e}")
+    finally:
+        await results.aclose()
+    await send({'type': 'http.response.body', 'body': encode('done', {'done': True, 'count': count})})
+
+
+async def get_recipe_detail(request, send, recipe_id):
+    if await _throttled(request, send):
+        return
+    try:
+        servings = int(request.args['servings']) if request.args.get('servings') else None
+    except ValueError:
+        servings = None
+    prefetcher.record_recipe(recipe_id)
+
+    try:
+        recipe_data = await async_recipe_service.get_recipe_details(recipe_id)
+        if not recipe_data:
+            return await _send_json(send, 404, {'error': 'Recipe not found'})
+
+        if servings and servings != recipe_data.servings:
+            recipe_data = async_recipe_service.service.adjust_servings(recipe_data, servings)
+
+        await _send_json(send, 200, {'recipe': recipe_data.to_dict(legacy=request.legacy)}, request=request)
+
+    except UpstreamBusyError as e:
+        await _send_busy(send, e)
+    except Exception as e:
+        logging.error(f"Recipe detail error: {e}")
+        await _send_json(send, 500, {'error': 'Failed to get recipe details'})
+
+
+async def _timed(route, handler, request, send, *args):
+    """Run a native route, recording it in the same metrics as the Flask routes"""
+    start = time.perf_counter()
+    status = 500
+
+    async def send_and_record(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        await send(message)
+
+    try:
+        await handler(request, send_and_record, *args)
+    finally:
+        metrics.observe_request(route, 'GET', status, time.perf_counter() - start)
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Cross-origin requests go through Flask so Flask-CORS can answer them
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        request = _Request(scope)
+        if 'origin' not in request.headers:
+            if request.path == '/api/recipes/search':
+                return await _timed('/api/recipes/search', search_recipes, request, send)
+            if request.path == '/api/recipes/search/stream':
+                return await _timed('/api/recipes/search/stream', stream_search_recipes, request, send)
+            match = RECIPE_DETAIL_RE.fullmatch(request.path)
+            if match:
+                return await _timed('/api/recipes/<int:recipe_id>', get_recipe_detail, request, send,
+                                    int(match.group(1)))
+
+    await wsgi_app(scope, receive, send)
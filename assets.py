@@ -0,0 +1,68 @@
+"""Fingerprinted static assets produced by build_assets.py.
+
+When static/dist/manifest.json exists, ``asset_url(name)`` in templates
+returns the bundled, content-hashed file under /assets/, served with an
+immutable Cache-Control and a precompressed .br/.gz variant when the client
+accepts one. Without a manifest (or with ASSETS_DEV set) it returns None and
+the templates load the unbundled sources, as in development.
+"""
+import json
+import logging
+import mimetypes
+import os
+
+from flask import abort, request, send_from_directory, url_for
+
+from compression import accepted_encodings
+
+DIST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+# Fingerprinted names change whenever the content does, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Return the {source name: fingerprinted file} map written by build_assets.py"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable asset manifest {path}: {e}")
+        return {}
+
+
+def init_app(app):
+    """Register the asset_url template helper and the /assets/ route"""
+    manifest = {} if os.environ.get("ASSETS_DEV") else load_manifest()
+    fingerprinted = set(manifest.values())
+
+    def asset_url(name):
+        filename = manifest.get(name)
+        return url_for('serve_asset', filename=filename) if filename else None
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        if filename not in fingerprinted:
+            abort(404)
+
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding'))
+        encoding = None
+        served = filename
+        for candidate, suffix in PRECOMPRESSED:
+            if candidate in accepted and os.path.isfile(os.path.join(DIST_DIR, filename + suffix)):
+                encoding, served = candidate, filename + suffix
+                break
+
+        response = send_from_directory(DIST_DIR, served, mimetype=mimetypes.guess_type(filename)[0],
+                                       max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        return response
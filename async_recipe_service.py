@@ -0,0 +1,136 @@
+import asyncio
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from recipe_service import recipe_service
+
+
+class UpstreamBusyError(Exception):
+    """Raised when too many calls are already waiting for an upstream slot"""
+
+    def __init__(self, retry_after):
+        super().__init__("Too many upstream requests in flight")
+        self.retry_after = retry_after
+
+
+class AsyncRecipeService:
+    """Asyncio interface to RecipeService.
+
+    Blocking upstream work runs on a dedicated thread pool, so coroutines can
+    await several recipes at once, e.g. ``await asyncio.gather(*calls)``;
+    caching, retries and the detail fetch mode are shared with the sync
+    service. Fresh in-process cache hits are answered on the event loop.
+
+    At most ``max_concurrency`` calls run at once. Up to ``max_pending``
+    more wait for a slot, for at most ``queue_timeout`` seconds; beyond that
+    calls fail fast with UpstreamBusyError so callers can shed load.
+    """
+
+    def __init__(self, service=None, max_concurrency=None, max_pending=None, queue_timeout=None):
+        self.service = service or recipe_service
+        self.max_concurrency = max_concurrency or int(os.environ.get("ASYNC_UPSTREAM_CONCURRENCY", 32))
+        self.max_pending = max_pending if max_pending is not None else int(os.environ.get("ASYNC_MAX_PENDING", 256))
+        self.queue_timeout = queue_timeout or float(os.environ.get("ASYNC_QUEUE_TIMEOUT", 5))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="recipe-async")
+        self._semaphore = None
+        self._semaphore_loop = None
+        self.pending = 0
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _slot(self):
+        # asyncio primitives belong to one event loop; make one per loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    @contextlib.asynccontextmanager
+    async def _upstream_slot(self):
+        """Hold one of the max_concurrency upstream slots, or raise UpstreamBusyError"""
+        semaphore = self._slot()
+        if semaphore.locked() and self.pending >= self.max_pending:
+            self.rejected += 1
+            raise UpstreamBusyError(self.queue_timeout)
+
+        self.pending += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise UpstreamBusyError(self.queue_timeout) from None
+        finally:
+            self.pending -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    async def _run(self, fn, *args):
+        """Run a blocking service call once an upstream slot is free"""
+        async with self._upstream_slot():
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def search_recipes(self, query="", cuisine="", meal_type="", diet="", max_results=12, source=None):
+        recipes = self.service.peek_search(query, cuisine, meal_type, diet, max_results, source)
+        if recipes is not None:
+            return recipes
+        return await self._run(
+            self.service.search_recipes, query, cuisine, meal_type, diet, max_results, source
+        )
+
+    async def iter_search(self, query="", cuisine="", meal_type="", diet="", max_results=12, source=None):
+        """Async version of RecipeService.iter_search, yielding ``(origin, recipe)`` pairs.
+
+        A fresh cached page is replayed on the event loop. Otherwise the
+        blocking generator is advanced on the thread pool, holding one
+        upstream slot until it is exhausted or the caller stops.
+        """
+        recipes = self.service.peek_search(query, cuisine, meal_type, diet, max_results, source)
+        if recipes is not None:
+            for recipe in recipes:
+                yield "cache", recipe
+            return
+
+        async with self._upstream_slot():
+            loop = asyncio.get_running_loop()
+            results = self.service.iter_search(query, cuisine, meal_type, diet, max_results, source)
+            try:
+                while True:
+                    item = await loop.run_in_executor(self._executor, next, results, None)
+                    if item is None:
+                        return
+                    yield item
+            finally:
+                # Still running on the pool if the caller was cancelled mid-step; it is then left to the GC
+                with contextlib.suppress(ValueError):
+                    results.close()
+
+    async def get_recipe_details(self, recipe_id):
+        recipe = self.service.peek_recipe_details(recipe_id)
+        if recipe is not None:
+            return recipe
+        return await self._run(self.service.get_recipe_details, recipe_id)
+
+    async def get_many_recipe_details(self, recipe_ids):
+        """Fetch several recipes concurrently, preserving order"""
+        return await asyncio.gather(*(self.get_recipe_details(recipe_id) for recipe_id in recipe_ids))
+
+    async def get_recipe_instructions(self, recipe_id):
+        return await self._run(self.service.get_recipe_instructions, recipe_id)
+
+    def stats(self):
+        return {
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'pending': self.pending,
+            'rejected': self.rejected
+        }
+
+
+async_recipe_service = AsyncRecipeService()
@@ -0,0 +1,102 @@
+"""Query latency of the local RecipeIndex at increasing sizes.
+
+    python -m benchmarks.bench_index --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from models import Ingredient, Recipe
+from recipe_index import RecipeIndex
+
+WORDS = ['chicken', 'pasta', 'curry', 'salad', 'soup', 'stew', 'tofu', 'beef', 'rice', 'noodle',
+         'lemon', 'garlic', 'spicy', 'creamy', 'roasted', 'grilled', 'baked', 'quick', 'easy', 'vegan']
+INGREDIENTS = ['onion', 'garlic', 'tomato', 'olive oil', 'butter', 'egg', 'flour', 'milk', 'rice',
+               'chicken breast', 'basil', 'parmesan', 'soy sauce', 'ginger', 'lime', 'potato']
+CUISINES = ['italian', 'mexican', 'chinese', 'indian', 'french', 'thai', 'american', 'greek']
+DISH_TYPES = ['main course', 'side dish', 'dessert', 'breakfast', 'salad', 'soup']
+DIETS = ['vegetarian', 'vegan', 'gluten-free', 'dairy-free']
+
+QUERIES = [
+    {'query': 'chicken'},
+    {'query': 'spicy chicken curry'},
+    {'cuisine': 'italian'},
+    {'cuisine': 'thai', 'diet': 'vegan'},
+    {'query': 'pasta', 'cuisine': 'italian', 'meal_type': 'main course'},
+    {'query': 'garlic rice', 'diet': 'gluten free'},
+]
+
+
+def synthetic_recipes(count, seed=0):
+    """Generate recipes, sharing ingredient lists so 1M recipes fit in memory"""
+    rng = random.Random(seed)
+    ingredient_sets = [
+        [Ingredient(name=name) for name in rng.sample(INGREDIENTS, rng.randint(3, 8))]
+        for _ in range(512)
+    ]
+    for recipe_id in range(count):
+        yield Recipe(
+            id=recipe_id,
+            title=' '.join(rng.sample(WORDS, 3)),
+            ingredients=ingredient_sets[recipe_id % 512],
+            cuisine_types=[rng.choice(CUISINES)],
+            meal_types=[rng.choice(DISH_TYPES)],
+            dietary_info=[diet for diet in DIETS if rng.random() < 0.2]
+        )
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_size(size, repeat):
+    index = RecipeIndex(max_docs=size + 1)
+    start = time.perf_counter()
+    batch = []
+    for recipe in synthetic_recipes(size):
+        batch.append(recipe)
+        if len(batch) == 10000:
+            index.add_many(batch)
+            batch = []
+    index.add_many(batch)
+    build_seconds = time.perf_counter() - start
+
+    # Warm the posting-list bitsets once, then time steady-state queries
+    for filters in QUERIES:
+        index.search(**filters)
+
+    samples = []
+    for _ in range(repeat):
+        for filters in QUERIES:
+            start = time.perf_counter()
+            index.search(**filters)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'recipes': size,
+        'build_seconds': round(build_seconds, 2),
+        'query_ms_p50': round(statistics.median(samples), 4),
+        'query_ms_p95': round(percentile(samples, 0.95), 4),
+        'query_ms_p99': round(percentile(samples, 0.99), 4)
+    }
+
+
+def run(sizes, repeat=50):
+    return [bench_size(size, repeat) for size in sizes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=50, help='passes over the query mix')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(json.dumps(run(sizes, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
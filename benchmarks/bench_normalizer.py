@@ -0,0 +1,58 @@
+"""Micro-benchmark for RecipeNormalizer over recorded Spoonacular payloads.
+
+    python -m benchmarks.bench_normalizer --pages 2000
+"""
+import argparse
+import json
+import os
+import time
+
+from normalizer import RecipeNormalizer, parse_nutrient_names
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+
+def timed(fn, repeat):
+    """Return the per-call time in microseconds of the best of five runs"""
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / repeat * 1e6
+
+
+def run(pages=1000, extra_nutrients=''):
+    normalizer = RecipeNormalizer(parse_nutrient_names(extra_nutrients))
+    search_page = load_fixture('complex_search.json')['results']
+    information = load_fixture('information.json')
+
+    page_us = timed(lambda: normalizer.normalize_page(search_page), pages)
+    detail_us = timed(lambda: normalizer.normalize(information, detailed=True), pages)
+    return {
+        'normalize_page_us': round(page_us, 2),
+        'normalize_recipe_us': round(page_us / len(search_page), 2),
+        'normalize_detail_us': round(detail_us, 2),
+        'page_size': len(search_page),
+        'nutrients': len(normalizer.nutrient_fields)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=1000, help='iterations per timing run')
+    parser.add_argument('--extra-nutrients', default='', help='e.g. "Fiber,Sugar,Sodium"')
+    args = parser.parse_args()
+
+    results = run(args.pages, args.extra_nutrients)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
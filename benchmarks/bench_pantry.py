@@ -0,0 +1,72 @@
+"""Latency of PantryIndex.rank over a large set of indexed recipes.
+
+    python -m benchmarks.bench_pantry --recipes 100000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import pantry
+from benchmarks.bench_index import INGREDIENTS, percentile
+from models import Ingredient, Recipe
+
+EXTRA_INGREDIENTS = [f"ingredient {n}" for n in range(400)]
+PANTRIES = [
+    ['chicken breast', 'garlic', 'onion', 'rice'],
+    ['Fresh Tomatoes', 'basil', 'olive oil', 'parmesan', 'pasta'],
+    ['eggs', 'milk', 'flour', 'butter', 'sugar'],
+    ['soy sauce', 'ginger', 'lime', 'garlic', 'rice', 'ingredient 7', 'ingredient 42'],
+]
+
+
+def synthetic_recipes(count, seed=0):
+    rng = random.Random(seed)
+    vocabulary = INGREDIENTS + EXTRA_INGREDIENTS
+    for recipe_id in range(count):
+        names = rng.sample(INGREDIENTS, rng.randint(2, 5)) + rng.sample(vocabulary, rng.randint(2, 8))
+        yield Recipe(id=recipe_id, title=f"Recipe {recipe_id}",
+                     ingredients=[Ingredient(name=name) for name in names])
+
+
+def run(recipes, repeat, use_numpy=True):
+    index = pantry.PantryIndex(max_docs=recipes + 1)
+    start = time.perf_counter()
+    index.add_many(synthetic_recipes(recipes))
+    build_seconds = time.perf_counter() - start
+
+    saved_numpy = pantry.HAVE_NUMPY
+    if not use_numpy:
+        pantry.HAVE_NUMPY = False
+    try:
+        samples = []
+        for _ in range(repeat):
+            for items in PANTRIES:
+                start = time.perf_counter()
+                index.rank(items, max_results=20)
+                samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        pantry.HAVE_NUMPY = saved_numpy
+
+    return {
+        'recipes': recipes,
+        'numpy': use_numpy and saved_numpy,
+        'build_seconds': round(build_seconds, 2),
+        'rank_ms_p50': round(statistics.median(samples), 3),
+        'rank_ms_p95': round(percentile(samples, 0.95), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=25)
+    parser.add_argument('--no-numpy', action='store_true', help='time the pure Python fallback')
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.recipes, args.repeat, not args.no_numpy), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Micro-benchmarks for the RecipeService per-request hot paths.
+
+    python -m benchmarks.bench_recipe_service --repeat 2000 --output service.json
+
+Times ``_process_recipe_data`` (normalize and index one recipe) on the
+recorded ``information`` and ``complexSearch`` payloads, and
+``adjust_servings`` on the normalized detail recipe.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+# Keep the benchmark from creating a rate limit database in the working directory
+os.environ.setdefault("RATE_LIMIT_DB", "")
+
+from benchmarks.bench_index import percentile
+from benchmarks.bench_normalizer import load_fixture
+from recipe_service import RecipeService
+
+
+def sample(fn, repeat):
+    """Return per-call latencies in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def summarize(samples):
+    return {
+        'us_p50': round(statistics.median(samples), 2),
+        'us_p95': round(percentile(samples, 0.95), 2),
+        'us_p99': round(percentile(samples, 0.99), 2),
+        'calls_per_second': round(len(samples) / (sum(samples) / 1e6))
+    }
+
+
+def run(repeat=2000):
+    service = RecipeService()
+    information = load_fixture('information.json')
+    search_result = load_fixture('complex_search.json')['results'][0]
+    recipe = service._process_recipe_data(information, detailed=True)
+
+    # Warm up imports and caches before timing
+    sample(lambda: service._process_recipe_data(information, detailed=True), 50)
+
+    servings = [1, 2, 3, 5, 8, 12]
+    calls = iter(range(repeat * 2))
+    return {
+        'process_recipe_detail': summarize(
+            sample(lambda: service._process_recipe_data(information, detailed=True), repeat)),
+        'process_recipe_search_result': summarize(
+            sample(lambda: service._process_recipe_data(search_result), repeat)),
+        'adjust_servings': summarize(
+            sample(lambda: service.adjust_servings(recipe, servings[next(calls) % len(servings)]), repeat)),
+        'ingredients': len(recipe.ingredients),
+        'repeat': repeat
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help='timed calls per benchmark')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
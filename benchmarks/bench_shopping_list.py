@@ -0,0 +1,57 @@
+"""Latency of shopping list aggregation over weekly meal plans.
+
+    python -m benchmarks.bench_shopping_list --recipes 50
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import shopping_list
+from benchmarks.bench_index import percentile
+from benchmarks.fake_spoonacular import make_recipe
+from normalizer import RecipeNormalizer
+
+
+def meal_plan(recipes, seed=0):
+    """Build a plan of detailed recipes with random target servings"""
+    rng = random.Random(seed)
+    normalizer = RecipeNormalizer()
+    plan = [normalizer.normalize(make_recipe(recipe_id), detailed=True)
+            for recipe_id in rng.sample(range(1, 100000), recipes)]
+    servings = {recipe.id: rng.randint(1, 8) for recipe in plan}
+    return plan, servings
+
+
+def run(recipes, repeat):
+    plan, servings = meal_plan(recipes)
+    ingredient_count = sum(len(recipe.ingredients) for recipe in plan)
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = shopping_list.aggregate(plan, servings)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'recipes': recipes,
+        'ingredients': ingredient_count,
+        'items': len(items),
+        'aggregate_ms_p50': round(statistics.median(samples), 3),
+        'aggregate_ms_p95': round(percentile(samples, 0.95), 3),
+        'us_per_ingredient': round(statistics.median(samples) * 1000 / ingredient_count, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps([run(recipes, args.repeat) for recipes in args.recipes], indent=2))
+
+
+if __name__ == '__main__':
+    main()
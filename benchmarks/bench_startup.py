@@ -0,0 +1,161 @@
+"""Time from starting a fresh app process to its first answered requests.
+
+    python -m benchmarks.bench_startup --runs 5 --target-ms 1000
+    python -m benchmarks.bench_startup --server gunicorn --snapshot --output startup.json
+
+Each run starts the app the way an autoscaled instance would (gunicorn when
+it is installed, otherwise werkzeug) in front of a fake Spoonacular, polls
+until ``/`` answers, then times a first search. With ``--snapshot`` a warm
+cache snapshot is written beforehand, so the first search shows whether the
+new instance starts hot. Exits non-zero when the median time to first
+request is over ``--target-ms``.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.fake_spoonacular import FIXTURES, start_fake_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERIES = ['pasta', 'chicken', 'curry']
+WERKZEUG_SERVER = ("import sys; from werkzeug.serving import run_simple; from main import app; "
+                   "run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)")
+WARM_SNAPSHOT = ("import sys; from prefetch import save_snapshot; from recipe_service import recipe_service; "
+                 "[recipe_service.search_recipes(query) for query in sys.argv[2:]]; "
+                 "print(save_snapshot(sys.argv[1], recipe_service))")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server, port):
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '--workers', '1', '--bind', f'127.0.0.1:{port}', 'main:app']
+    return [sys.executable, '-c', WERKZEUG_SERVER, str(port)]
+
+
+def app_env(fake, workdir, snapshot_path):
+    env = dict(os.environ)
+    env.update({
+        'SPOONACULAR_BASE_URL': fake.base_url,
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        'SESSION_DB': os.path.join(workdir, 'sessions.db'),
+        'IMAGE_CACHE_DIR': os.path.join(workdir, 'images'),
+        'RATE_LIMIT_DB': '',
+        'CLIENT_RATE_LIMIT': '0',
+        'SPOONACULAR_DAILY_POINTS': '1000000000',
+        'PREFETCH_RPM': '0',
+        'LOG_LEVEL': 'WARNING',
+        'PYTHONPATH': ROOT
+    })
+    if snapshot_path:
+        env['CACHE_SNAPSHOT_PATH'] = snapshot_path
+    return env
+
+
+def measure(server, port, env, fake, timeout):
+    """Start one app process and return its readiness and first-search timings"""
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(server_command(server, port), cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"App exited during startup: {process.stderr.read().decode()[-2000:]}")
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"App did not answer within {timeout}s")
+            try:
+                if requests.get(base_url + '/', timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.01)
+        first_request = time.perf_counter() - start
+
+        searches_before = fake.calls['complexSearch']
+        search_start = time.perf_counter()
+        response = requests.get(base_url + '/api/recipes/search', params={'query': QUERIES[0]}, timeout=30)
+        first_search = time.perf_counter() - search_start
+        return {
+            'first_request_ms': round(first_request * 1000, 1),
+            'first_search_ms': round(first_search * 1000, 1),
+            'first_search_status': response.status_code,
+            'first_search_upstream_calls': fake.calls['complexSearch'] - searches_before
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def run(runs, server, snapshot, latency, timeout):
+    fake = start_fake_server(latency=latency, fixtures=FIXTURES)
+    workdir = tempfile.mkdtemp(prefix='mealbuddy-startup-')
+    try:
+        snapshot_path = os.path.join(workdir, 'cache-snapshot.json.gz') if snapshot else None
+        env = app_env(fake, workdir, snapshot_path)
+        if snapshot_path:
+            subprocess.run([sys.executable, '-c', WARM_SNAPSHOT, snapshot_path, *QUERIES], cwd=ROOT, env=env,
+                           check=True, capture_output=True)
+
+        samples = [measure(server, free_port(), env, fake, timeout) for _ in range(runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    first_requests = [sample['first_request_ms'] for sample in samples]
+    first_searches = [sample['first_search_ms'] for sample in samples]
+    return {
+        'server': server,
+        'snapshot': snapshot,
+        'upstream_latency_s': latency,
+        'first_request_ms_p50': round(statistics.median(first_requests), 1),
+        'first_request_ms_max': max(first_requests),
+        'first_search_ms_p50': round(statistics.median(first_searches), 1),
+        'runs': samples
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'werkzeug'], default='auto')
+    parser.add_argument('--snapshot', action='store_true', help='start from a warm cache snapshot')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake upstream latency in seconds')
+    parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for each start')
+    parser.add_argument('--target-ms', type=float, default=1000, help='fail when the median is slower')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    server = args.server
+    if server == 'auto':
+        server = 'gunicorn' if importlib.util.find_spec('gunicorn') else 'werkzeug'
+
+    results = run(args.runs, server, args.snapshot, args.latency, args.timeout)
+    results['target_ms'] = args.target_ms
+    results['passed'] = results['first_request_ms_p50'] <= args.target_ms
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not results['passed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
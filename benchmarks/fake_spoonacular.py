@@ -0,0 +1,289 @@
+"""Local stand-in for the Spoonacular recipes API.
+
+Serves generated ``complexSearch``, ``information`` and
+``analyzedInstructions`` payloads with configurable latency and error rate,
+so RecipeService can be exercised without an API key or quota. With
+``--fixtures`` it replays recorded payloads instead, renumbered per request:
+
+    python -m benchmarks.fake_spoonacular --port 8089 --latency 0.05
+    python -m benchmarks.fake_spoonacular --fixtures benchmarks/fixtures
+    SPOONACULAR_BASE_URL=http://127.0.0.1:8089/recipes gunicorn main:app
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+INGREDIENTS = [
+    ('chicken breast', 500, 'g'), ('olive oil', 2, 'tbsp'), ('garlic', 3, 'cloves'),
+    ('onion', 1, ''), ('tomato', 400, 'g'), ('basil', 0.25, 'cup'), ('salt', 1, 'tsp'),
+    ('pasta', 12, 'oz'), ('parmesan', 50, 'g'), ('butter', 2, 'tbsp'), ('milk', 1, 'cup'),
+    ('rice', 1.5, 'cups'), ('soy sauce', 3, 'tbsp'), ('ginger', 1, 'tbsp'), ('egg', 2, '')
+]
+CUISINES = ['Italian', 'Mexican', 'Chinese', 'Indian', 'French', 'Thai', 'American']
+DISH_TYPES = ['main course', 'side dish', 'dessert', 'breakfast', 'salad', 'soup']
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def make_recipe(recipe_id, detailed=True):
+    """Build a deterministic Spoonacular-shaped recipe payload for recipe_id"""
+    rng = random.Random(recipe_id)
+    ingredients = rng.sample(INGREDIENTS, rng.randint(4, 9))
+    recipe = {
+        'id': recipe_id,
+        'title': f"Recipe {recipe_id} {rng.choice(['Stew', 'Pasta', 'Curry', 'Salad', 'Bowl'])}",
+        'image': f"https://img.spoonacular.com/recipes/{recipe_id}-556x370.jpg",
+        'readyInMinutes': rng.choice([15, 20, 30, 45, 60, 90]),
+        'servings': rng.choice([1, 2, 4, 6]),
+        'summary': f"<b>Recipe {recipe_id}</b> is a tasty dish. " * 3,
+        'cuisines': rng.sample(CUISINES, rng.randint(0, 2)),
+        'dishTypes': rng.sample(DISH_TYPES, rng.randint(1, 2)),
+        'vegetarian': rng.random() < 0.3,
+        'vegan': rng.random() < 0.1,
+        'glutenFree': rng.random() < 0.4,
+        'dairyFree': rng.random() < 0.3,
+        'extendedIngredients': [
+            {
+                'id': index,
+                'name': name,
+                'amount': amount,
+                'unit': unit,
+                'original': f"{amount} {unit} {name}".replace('  ', ' ')
+            }
+            for index, (name, amount, unit) in enumerate(ingredients)
+        ],
+        'nutrition': {
+            'nutrients': [
+                {'name': 'Calories', 'amount': rng.randint(150, 900), 'unit': 'kcal'},
+                {'name': 'Fat', 'amount': rng.randint(2, 60), 'unit': 'g'},
+                {'name': 'Saturated Fat', 'amount': rng.randint(1, 20), 'unit': 'g'},
+                {'name': 'Carbohydrates', 'amount': rng.randint(5, 120), 'unit': 'g'},
+                {'name': 'Sugar', 'amount': rng.randint(0, 40), 'unit': 'g'},
+                {'name': 'Sodium', 'amount': rng.randint(50, 2000), 'unit': 'mg'},
+                {'name': 'Protein', 'amount': rng.randint(3, 70), 'unit': 'g'},
+                {'name': 'Fiber', 'amount': rng.randint(0, 15), 'unit': 'g'}
+            ]
+        }
+    }
+    if detailed:
+        recipe['instructions'] = ''
+        recipe['analyzedInstructions'] = make_instructions(recipe_id)
+    return recipe
+
+
+def make_image(width, height):
+    """A solid-colour PNG of the given size, standing in for a recipe photo"""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    rows = b''.join(b'\x00' + b'\xe0\x80\x40' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows))
+            + chunk(b'IEND', b''))
+
+
+class GeneratedPayloads:
+    """Deterministic synthetic payloads, varied per recipe id"""
+
+    @staticmethod
+    def recipe(recipe_id, detailed=True):
+        return make_recipe(recipe_id, detailed)
+
+    @staticmethod
+    def instructions(recipe_id):
+        return make_instructions(recipe_id)
+
+
+class RecordedPayloads:
+    """Replays recorded Spoonacular responses, giving each recipe the id that was asked for"""
+
+    def __init__(self, directory=FIXTURES):
+        def load(name):
+            with open(os.path.join(directory, name)) as f:
+                return json.load(f)
+
+        self.search_results = load('complex_search.json')['results']
+        self.information = load('information.json')
+        self.analyzed_instructions = load('analyzed_instructions.json')
+
+    def recipe(self, recipe_id, detailed=True):
+        if detailed:
+            recipe = copy.deepcopy(self.information)
+        else:
+            recipe = copy.deepcopy(self.search_results[recipe_id % len(self.search_results)])
+        recipe['id'] = recipe_id
+        return recipe
+
+    def instructions(self, recipe_id):
+        return copy.deepcopy(self.analyzed_instructions)
+
+
+def make_instructions(recipe_id):
+    rng = random.Random(-recipe_id)
+    return [{
+        'name': '',
+        'steps': [
+            {'number': number, 'step': f"Step {number} of recipe {recipe_id}."}
+            for number in range(1, rng.randint(3, 8) + 1)
+        ]
+    }]
+
+
+class FakeSpoonacularHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        endpoint, payload = self._route(url.path, params)
+        server.record(endpoint)
+
+        if server.latency:
+            time.sleep(server.latency)
+        if endpoint is None:
+            return self._send(404, {'status': 'failure', 'message': 'Not found'})
+        if endpoint == 'image':
+            # The image CDN is not metered and does not fail like the API
+            return self._send_bytes(payload, 'image/png')
+        if server.error_rate and server.rng.random() < server.error_rate:
+            headers = {'Retry-After': str(server.retry_after)} if server.retry_after is not None else None
+            return self._send(503, {'status': 'failure', 'message': 'Injected error'}, headers)
+        quota_headers = server.charge(endpoint, params)
+        if quota_headers is None:
+            return self._send(402, {'status': 'failure', 'message': 'Daily points limit reached'})
+        self._send(200, payload, quota_headers)
+
+    def _route(self, path, params):
+        payloads = self.server.payloads
+        if path.endswith('/complexSearch'):
+            number = int(params.get('number', 10))
+            # Stable across runs, so replayed searches return the same ids every time
+            offset = zlib.crc32(params.get('query', '').encode()) % 100000
+            total = number if self.server.total_results is None else self.server.total_results
+            results = [payloads.recipe(offset + index, detailed=False) for index in range(min(number, total))]
+            return 'complexSearch', {'results': results, 'offset': 0, 'number': number,
+                                     'totalResults': total}
+        if path.endswith('/informationBulk'):
+            ids = [int(value) for value in params.get('ids', '').split(',') if value.strip().isdigit()]
+            return 'informationBulk', [payloads.recipe(recipe_id) for recipe_id in ids]
+        match = re.search(r'/(\d+)-(\d+)x(\d+)\.[a-z]+$', path)
+        if match:
+            return 'image', make_image(int(match.group(2)), int(match.group(3)))
+        match = re.search(r'/(\d+)/(information|analyzedInstructions)$', path)
+        if match:
+            recipe_id, endpoint = int(match.group(1)), match.group(2)
+            if endpoint == 'information':
+                return endpoint, payloads.recipe(recipe_id)
+            return endpoint, payloads.instructions(recipe_id)
+        return None, None
+
+    def _send(self, status, payload, headers=None):
+        self._send_bytes(json.dumps(payload).encode(), 'application/json', status, headers)
+
+    def _send_bytes(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSpoonacularServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, error_rate=0.0, seed=0, daily_points=None,
+                 fixtures=None, retry_after=None):
+        super().__init__(address, FakeSpoonacularHandler)
+        self.payloads = RecordedPayloads(fixtures) if fixtures else GeneratedPayloads()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        # Matches each search has; None answers every search with a full page
+        self.total_results = None
+        self.daily_points = daily_points
+        self.points_used = 0.0
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self._calls_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/recipes"
+
+    def record(self, endpoint):
+        with self._calls_lock:
+            self.calls[endpoint or 'unknown'] += 1
+
+    def charge(self, endpoint, params):
+        """Charge a request's points, returning the quota headers or None once the quota is spent"""
+        if endpoint == 'complexSearch':
+            number = int(params.get('number', 10))
+            points = 1 + 0.01 * number + sum(0.025 * number for option in
+                                             ('addRecipeInformation', 'fillIngredients', 'addRecipeNutrition')
+                                             if params.get(option) == 'True')
+        elif endpoint == 'informationBulk':
+            points = 1 + 0.5 * max(len(params.get('ids', '').split(',')) - 1, 0)
+        else:
+            points = 1.0
+        with self._calls_lock:
+            if self.daily_points is not None and self.points_used + points > self.daily_points:
+                return None
+            self.points_used += points
+            headers = {'X-API-Quota-Request': f"{points:g}", 'X-API-Quota-Used': f"{self.points_used:g}"}
+            if self.daily_points is not None:
+                headers['X-API-Quota-Left'] = f"{self.daily_points - self.points_used:g}"
+            return headers
+
+
+def start_fake_server(latency=0.0, error_rate=0.0, port=0, daily_points=None, fixtures=None, seed=0,
+                      retry_after=None):
+    """Start a FakeSpoonacularServer on a daemon thread and return it"""
+    server = FakeSpoonacularServer(('127.0.0.1', port), latency=latency, error_rate=error_rate,
+                                   daily_points=daily_points, fixtures=fixtures, seed=seed,
+                                   retry_after=retry_after)
+    threading.Thread(target=server.serve_forever, name='fake-spoonacular', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--daily-points', type=float, default=None, help='answer 402 once this many points are used')
+    parser.add_argument('--fixtures', nargs='?', const=FIXTURES, default=None,
+                        help='replay recorded payloads from this directory (default: benchmarks/fixtures)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for injected errors')
+    parser.add_argument('--retry-after', type=int, default=None, help='Retry-After seconds sent with injected 503s')
+    args = parser.parse_args()
+
+    server = FakeSpoonacularServer(('127.0.0.1', args.port), latency=args.latency, error_rate=args.error_rate,
+                                   daily_points=args.daily_points, fixtures=args.fixtures, seed=args.seed,
+                                   retry_after=args.retry_after)
+    print(f"Fake Spoonacular listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
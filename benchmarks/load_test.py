@@ -0,0 +1,269 @@
+"""End-to-end load scenarios against the Flask routes.
+
+    python -m benchmarks.load_test --users 20 --duration 15 --output results.json
+    python -m benchmarks.load_test --scenario search_storm --baseline results.json
+
+By default the app runs in-process on a threaded WSGI server, in front of a
+fake Spoonacular replaying the recorded fixtures with ``--latency`` and
+``--error-rate``; ``--target`` load-tests an app that is already running
+instead (point it at benchmarks.fake_spoonacular so no quota is spent).
+
+Scenarios:
+  search_storm      many users searching a small set of popular queries
+  detail_browsing   search, then open results and change their servings
+  favorites_heavy   logged-in users adding, listing and removing favorites
+
+Throughput and latency percentiles, overall and per request type, are
+printed and written as JSON so runs can be compared with ``--baseline``.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from benchmarks.bench_index import percentile
+from benchmarks.fake_spoonacular import FIXTURES, start_fake_server
+
+QUERIES = ['pasta', 'chicken', 'curry', 'salad', 'soup', 'tacos', 'pizza', 'stir fry', 'risotto',
+           'burger', 'pancakes', 'chili', 'lasagna', 'ramen', 'sushi', 'tofu', 'quinoa', 'omelette']
+CUISINES = ['', '', '', 'Italian', 'Mexican', 'Indian', 'Thai']
+SERVINGS = [1, 2, 3, 4, 6, 8, 12]
+# Popular queries are searched far more often than the rest
+QUERY_WEIGHTS = [1 / (rank + 1) for rank in range(len(QUERIES))]
+
+
+class User:
+    """One simulated client with its own cookie jar, recording every request it makes"""
+
+    def __init__(self, base_url, rng, record):
+        self.base_url = base_url
+        self.rng = rng
+        self.session = requests.Session()
+        self._record = record
+
+    def request(self, label, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=30, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 'error'
+        self._record(label, status, time.perf_counter() - start)
+        return response
+
+    def search(self):
+        query = self.rng.choices(QUERIES, QUERY_WEIGHTS)[0]
+        response = self.request('search', 'GET', '/api/recipes/search',
+                                params={'query': query, 'cuisine': self.rng.choice(CUISINES)})
+        if response is None or response.status_code != 200:
+            return []
+        return [recipe['id'] for recipe in response.json().get('recipes', [])]
+
+
+def search_storm(user):
+    user.search()
+
+
+def detail_browsing(user):
+    results = user.search()
+    for recipe_id in user.rng.sample(results, k=min(3, len(results))):
+        user.request('detail', 'GET', f'/api/recipes/{recipe_id}')
+        user.request('detail_servings', 'GET', f'/api/recipes/{recipe_id}',
+                     params={'servings': user.rng.choice(SERVINGS)})
+
+
+def favorites_setup(user):
+    username = f"load-{os.getpid()}-{user.rng.getrandbits(48):x}"
+    user.request('register', 'POST', '/api/register',
+                 json={'username': username, 'email': f"{username}@example.com", 'password': 'load-test-pw'})
+    user.favorites = []
+
+
+def favorites_heavy(user):
+    recipe_id = user.rng.randint(1, 500)
+    response = user.request('favorite_add', 'POST', '/api/favorites', json={'recipe_id': recipe_id})
+    if response is not None and response.status_code == 200:
+        user.favorites.append(recipe_id)
+    user.request('favorites_list', 'GET', '/api/favorites', params={'limit': 20})
+    user.request('favorites_summary', 'GET', '/api/favorites', params={'fields': 'summary'})
+    if len(user.favorites) > 10:
+        removed = user.favorites.pop(user.rng.randrange(len(user.favorites)))
+        user.request('favorite_remove', 'DELETE', f'/api/favorites/{removed}')
+
+
+SCENARIOS = {
+    'search_storm': (None, search_storm),
+    'detail_browsing': (None, detail_browsing),
+    'favorites_heavy': (favorites_setup, favorites_heavy)
+}
+
+
+def latency_summary(samples):
+    samples_ms = [seconds * 1000 for seconds in samples]
+    return {
+        'p50': round(statistics.median(samples_ms), 2),
+        'p90': round(percentile(samples_ms, 0.90), 2),
+        'p95': round(percentile(samples_ms, 0.95), 2),
+        'p99': round(percentile(samples_ms, 0.99), 2),
+        'max': round(max(samples_ms), 2)
+    }
+
+
+def run_scenario(name, base_url, users, duration, seed=0):
+    """Run users concurrently for duration seconds and summarize what they saw"""
+    setup, step = SCENARIOS[name]
+    samples = defaultdict(list)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def record(label, status, seconds):
+        with lock:
+            samples[label].append(seconds)
+            statuses[status] += 1
+
+    clients = [User(base_url, random.Random(seed * 1000 + index), record) for index in range(users)]
+    if setup is not None:
+        for user in clients:
+            setup(user)
+    # Setup requests are not part of the measurement
+    samples.clear()
+    statuses.clear()
+
+    deadline = time.monotonic() + duration
+    errors = []
+
+    def loop(user):
+        try:
+            while time.monotonic() < deadline:
+                step(user)
+        except Exception as e:  # a broken scenario should not hang the run
+            errors.append(repr(e))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=loop, args=(user,)) for user in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_samples = [seconds for label_samples in samples.values() for seconds in label_samples]
+    failed = sum(count for status, count in statuses.items() if status == 'error' or status >= 500)
+    return {
+        'users': users,
+        'duration_s': round(elapsed, 2),
+        'requests': len(all_samples),
+        'throughput_rps': round(len(all_samples) / elapsed, 1),
+        'error_rate': round(failed / len(all_samples), 4) if all_samples else 0,
+        'latency_ms': latency_summary(all_samples) if all_samples else {},
+        'by_request': {label: {'requests': len(label_samples), **latency_summary(label_samples)}
+                       for label, label_samples in sorted(samples.items())},
+        'status': {str(status): count
+                   for status, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        'scenario_errors': errors[:5]
+    }
+
+
+def start_local_app(args):
+    """Serve the app in-process against a fake Spoonacular, returning its base URL"""
+    fake = start_fake_server(latency=args.latency, error_rate=args.error_rate, fixtures=args.fixtures,
+                             seed=args.seed)
+    workdir = tempfile.mkdtemp(prefix='mealbuddy-load-')
+    os.environ.update({
+        'SPOONACULAR_BASE_URL': fake.base_url,
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        'RATE_LIMIT_DB': '',
+        'CLIENT_RATE_LIMIT': '0',
+        'SPOONACULAR_DAILY_POINTS': '1000000000',
+        'SPOONACULAR_POINTS_BURST': '1000000000',
+        'PREFETCH_RPM': '0',
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING')
+    })
+
+    from werkzeug.serving import make_server
+    from main import app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='load-test-app', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", fake
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print throughput and p95 changes against an earlier results file"""
+    for name, scenario in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before or not before.get('throughput_rps') or not before.get('latency_ms'):
+            continue
+        throughput = (scenario['throughput_rps'] / before['throughput_rps'] - 1) * 100
+        p95 = (scenario['latency_ms']['p95'] / before['latency_ms']['p95'] - 1) * 100
+        print(f"{name}: throughput {throughput:+.1f}%, p95 latency {p95:+.1f}% "
+              f"(baseline {before['throughput_rps']} rps, {before['latency_ms']['p95']} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', choices=[*SCENARIOS, 'all'], default='all')
+    parser.add_argument('--users', type=int, default=20, help='concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=15, help='seconds per scenario')
+    parser.add_argument('--target', help='base URL of a running app, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake upstream latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of fake upstream 503s')
+    parser.add_argument('--fixtures', default=FIXTURES, help='recorded payloads for the fake upstream')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare with a results file from an earlier run')
+    args = parser.parse_args()
+
+    fake = None
+    base_url = args.target.rstrip('/') if args.target else None
+    if base_url is None:
+        base_url, fake = start_local_app(args)
+
+    names = list(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'target': args.target or 'in-process',
+            'users': args.users,
+            'duration_s': args.duration,
+            'upstream_latency_s': None if args.target else args.latency,
+            'upstream_error_rate': None if args.target else args.error_rate
+        },
+        'scenarios': {name: run_scenario(name, base_url, args.users, args.duration, args.seed)
+                      for name in names}
+    }
+    if fake is not None:
+        results['meta']['upstream_calls'] = dict(fake.calls)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Bundle, minify and fingerprint the frontend for production.
+
+    python build_assets.py            # requires Node; uses npx esbuild
+    ESBUILD=/usr/local/bin/esbuild python build_assets.py
+
+The JSX sources in static/js are concatenated in load order into a single
+script, compiled and minified with esbuild, and written to static/dist under
+content-hashed names together with .gz (and .br, when the brotli package is
+installed) copies. static/dist/manifest.json maps each source name to its
+built file; the app serves those from /assets/ once the manifest exists.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+from assets import DIST_DIR, MANIFEST_PATH
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# Same order as the development <script> tags in templates/index.html
+SCRIPTS = [
+    'js/services/api.js',
+    'js/utils/helpers.js',
+    'js/components/RecipeCard.js',
+    'js/components/RecipeFilter.js',
+    'js/components/RecipeDetail.js',
+    'js/components/UserHistory.js',
+    'js/app.js'
+]
+STYLESHEETS = ['css/style.css']
+# Each source file destructures the hooks it uses from the React global
+REACT_IMPORT_RE = re.compile(r'^const\s*\{([^}]*)\}\s*=\s*React;[ \t]*\n?', re.MULTILINE)
+
+
+def concatenate(paths):
+    """Join the scripts into one, declaring the React hooks they share only once"""
+    hooks = {}
+    parts = []
+    for path in paths:
+        with open(os.path.join(STATIC_DIR, path)) as f:
+            source = f.read()
+        for match in REACT_IMPORT_RE.finditer(source):
+            hooks.update(dict.fromkeys(name.strip() for name in match.group(1).split(',') if name.strip()))
+        parts.append(f"// {path}\n{REACT_IMPORT_RE.sub('', source)}")
+    header = f"const {{ {', '.join(hooks)} }} = React;\n" if hooks else ''
+    # Wrapping in a function keeps the app's names out of the global scope and lets them be minified
+    return f"(() => {{\n{header}{''.join(parts)}\n}})();\n"
+
+
+def esbuild(source, loader, minify=True):
+    command = shlex.split(os.environ.get("ESBUILD", "npx --yes esbuild"))
+    command += [f"--loader={loader}", "--target=es2018"]
+    if minify:
+        command.append("--minify")
+    result = subprocess.run(command, input=source, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"esbuild failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def write_fingerprinted(name, content):
+    """Write content as name.<hash>.ext plus compressed copies, returning the file name"""
+    data = content.encode()
+    stem, ext = os.path.splitext(os.path.basename(name))
+    filename = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+    path = os.path.join(DIST_DIR, filename)
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+    return filename
+
+
+def build(minify=True):
+    bundle = esbuild(concatenate(SCRIPTS), 'jsx', minify)
+    stylesheets = {}
+    for path in STYLESHEETS:
+        with open(os.path.join(STATIC_DIR, path)) as f:
+            stylesheets[path] = esbuild(f.read(), 'css', minify)
+
+    # Only replace the previous build once every step has succeeded
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+    manifest = {'js/bundle.js': write_fingerprinted('bundle.js', bundle)}
+    for path, content in stylesheets.items():
+        manifest[path] = write_fingerprinted(path, content)
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--no-minify', action='store_true', help='keep the output readable')
+    args = parser.parse_args()
+
+    try:
+        manifest = build(minify=not args.no_minify)
+    except (OSError, RuntimeError) as e:
+        sys.exit(f"Asset build failed: {e}")
+    for name, filename in manifest.items():
+        size = os.path.getsize(os.path.join(DIST_DIR, filename))
+        print(f"{name} -> static/dist/{filename} ({size / 1024:.1f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
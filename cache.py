@@ -0,0 +1,446 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    Expired entries are kept for an extra ``stale_ttl`` seconds so callers can
+    still serve them (stale-while-revalidate) while a fresh copy is fetched.
+    ``clock`` returns the current epoch time; tests pass a fake one.
+    """
+
+    def __init__(self, maxsize=512, ttl=3600, stale_ttl=0, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def get_entry(self, key):
+        """Return ``(value, is_fresh, expires_at)`` or None if absent or too old"""
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if now >= expires_at + self.stale_ttl:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if now < expires_at:
+                self.hits += 1
+                return value, True, expires_at
+            self.stale_hits += 1
+            return value, False, expires_at
+
+    def get(self, key, default=None):
+        """Return a fresh value for key, or default"""
+        entry = self.get_entry(key)
+        if entry is None or not entry[1]:
+            return default
+        return entry[0]
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        if expires_at is None:
+            expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._insert(key, value, expires_at)
+
+    def add(self, key, value, expires_at):
+        """Set key unless it holds an entry that can still be served, returning whether it was set"""
+        with self._lock:
+            # Checked and inserted under one lock, so a concurrent set() is never overwritten
+            entry = self._data.get(key)
+            if entry is not None and self.clock() < entry[1] + self.stale_ttl:
+                return False
+            self._insert(key, value, expires_at)
+            return True
+
+    def _insert(self, key, value, expires_at):
+        # Callers hold self._lock
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self):
+        """Return ``(key, value, expires_at)`` for every servable entry, least recently used first"""
+        cutoff = self.clock() - self.stale_ttl
+        with self._lock:
+            return [(key, value, expires_at) for key, (value, expires_at) in self._data.items()
+                    if expires_at > cutoff]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'evictions': self.evictions
+        }
+
+
+class SQLiteFile:
+    """A SQLite file every worker on the host can open: WAL mode, one connection per thread.
+
+    Nothing touches the disk until the first ``connection()``, which creates
+    the directory and runs the ``schema`` statements, so importing a module
+    that builds a store costs no I/O. ``prune_due`` counts writes and is true
+    every ``prune_every``-th one, so stores can clear out expired rows without
+    a background thread.
+    """
+
+    def __init__(self, path, prune_every=256, schema=()):
+        self.path = path
+        self.prune_every = prune_every
+        self.schema = schema
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._ready = False
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if not self._ready:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._ready:
+                with self._lock:
+                    if not self._ready:
+                        for statement in self.schema:
+                            conn.execute(statement)
+                        self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def prune_due(self):
+        with self._lock:
+            self._writes += 1
+            return self._writes % self.prune_every == 0
+
+
+class SQLiteCache:
+    """On-disk cache shared by every worker process that opens the same file.
+
+    Values are stored as JSON text; ``encode``/``decode`` convert between the
+    cached objects and JSON-compatible data.
+    """
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, path, ttl=3600, stale_ttl=0, encode=None, decode=None):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._db = SQLiteFile(path, self.PRUNE_EVERY, schema=(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)"
+        ))
+
+    def get_entry(self, key):
+        """Return ``(value, is_fresh, expires_at)`` or None if absent or too old"""
+        try:
+            row = self._db.connection().execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.warning(f"Shared cache read failed: {e}")
+            return None
+
+        now = time.time()
+        if row is None or now >= row[1] + self.stale_ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.decode(json.loads(row[0])), now < row[1], row[1]
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        if expires_at is None:
+            expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._db.connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(self.encode(value)), expires_at)
+            )
+            if self._db.prune_due():
+                conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time() - self.stale_ttl,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.warning(f"Shared cache write failed: {e}")
+
+    def delete(self, key):
+        try:
+            self._db.connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.warning(f"Shared cache delete failed: {e}")
+
+    def clear(self):
+        self._db.connection().execute("DELETE FROM cache")
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
+
+
+class TieredCache:
+    """In-process LRU in front of an optional shared second tier.
+
+    ``get_or_load`` implements stale-while-revalidate: a stale entry is
+    returned immediately and refreshed on a background thread, so only a
+    true miss blocks on the loader.
+    """
+
+    def __init__(self, local, shared=None, name='cache', encode=None, decode=None):
+        self.local = local
+        self.shared = shared
+        self.name = name
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+        self.loads = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+    def get_entry(self, key):
+        """Look a key up in both tiers, promoting shared hits into the local tier"""
+        entry = self.local.get_entry(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get_entry(key)
+            if entry is not None:
+                self.local.set(key, entry[0], expires_at=entry[2])
+        return entry
+
+    def get(self, key, default=None):
+        """Return a fresh value for key, or default"""
+        entry = self.get_entry(key)
+        if entry is None or not entry[1]:
+            return default
+        return entry[0]
+
+    def get_stale(self, key, default=None):
+        """Return the cached value for key even if it has expired"""
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = self.local.clock() + (self.local.ttl if ttl is None else ttl)
+        self.local.set(key, value, expires_at=expires_at)
+        if self.shared is not None:
+            self.shared.set(key, value, expires_at=expires_at)
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def snapshot(self):
+        """Return the in-process tier as JSON-compatible ``[key, value, expires_at]`` rows"""
+        return [[key, self.encode(value), expires_at] for key, value, expires_at in self.local.items()]
+
+    def restore(self, rows):
+        """Load rows from snapshot() into the in-process tier, keeping their expiry times.
+
+        Returns the number of entries restored; rows too old to serve, and keys
+        cached since startup (which are newer), are skipped.
+        """
+        cutoff = self.local.clock() - self.local.stale_ttl
+        restored = 0
+        for key, value, expires_at in rows:
+            if expires_at > cutoff and self.local.add(key, self.decode(value), expires_at):
+                restored += 1
+        return restored
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Return the cached value for key, calling loader() on a miss.
+
+        Loader results of None are not cached. Exceptions from loader
+        propagate to the caller on a miss and are logged on a refresh.
+        """
+        entry = self.get_entry(key)
+        if entry is not None:
+            value, is_fresh, _ = entry
+            if not is_fresh:
+                self._refresh_in_background(key, loader, ttl)
+            return value
+
+        self.loads += 1
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def _refresh_in_background(self, key, loader, ttl):
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(key, value, ttl)
+                self.refreshes += 1
+            except Exception as e:
+                self.refresh_failures += 1
+                logging.warning(f"Background refresh of {self.name} key {key} failed: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+    def stats(self):
+        stats = {
+            'local': self.local.stats(),
+            'loads': self.loads,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures
+        }
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+
+def build_cache(name, maxsize, ttl, stale_ttl, shared_path=None, encode=None, decode=None):
+    """Create a TieredCache, adding the SQLite tier when shared_path is set"""
+    shared = None
+    if shared_path:
+        try:
+            shared = SQLiteCache(shared_path, ttl=ttl, stale_ttl=stale_ttl, encode=encode, decode=decode)
+        except sqlite3.Error as e:
+            logging.error(f"Could not open shared cache at {shared_path}: {e}")
+    return TieredCache(TTLCache(maxsize=maxsize, ttl=ttl, stale_ttl=stale_ttl), shared, name=name,
+                       encode=encode, decode=decode)
+
+
+class _Flight:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single execution.
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+    def stream(self, key, fn):
+        """Like do() for a function returning an iterator.
+
+        The leader yields items as fn produces them; callers arriving while
+        it is in flight wait for it to finish and then replay its items. If
+        the leader stops early, waiting callers run fn themselves.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            yield from fn() if flight.result is None else flight.result
+            return
+
+        items = []
+        try:
+            for item in fn():
+                items.append(item)
+                yield item
+            flight.result = items
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+    def stats(self):
+        return {'executions': self.executions, 'coalesced': self.coalesced}
@@ -0,0 +1,71 @@
+"""gzip/brotli compression for JSON and HTML responses above a size threshold.
+
+Streamed responses (NDJSON/SSE search) and files passed straight through
+(static assets) are left alone. Brotli is used when the ``brotli`` package
+is installed and the client accepts it.
+"""
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speedup
+    brotli = None
+
+COMPRESSIBLE_TYPES = {'application/json', 'text/html', 'text/plain'}
+MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings listed in an Accept-Encoding header, minus those refused with q=0"""
+    accepted = set()
+    for value in (accept_encoding or '').split(','):
+        name, _, params = value.partition(';')
+        name = name.strip().lower()
+        if name and params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name)
+    return accepted
+
+
+def negotiate(accept_encoding):
+    """Pick the best encoding the client accepts, or None"""
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def init_app(app):
+    """Compress eligible responses after every request"""
+    from flask import request
+
+    @app.after_request
+    def _compress_response(response):
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+
+        data = response.get_data()
+        encoding = negotiate(request.headers.get('Accept-Encoding')) if len(data) >= MIN_SIZE else None
+        if encoding is None:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        # The compressed body is a different representation of the same content
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,20 @@
+"""Gunicorn settings, picked up automatically from the working directory.
+
+    gunicorn main:app                       # threaded WSGI workers
+    SERVER_MODE=async gunicorn asgi:app     # uvicorn event-loop workers
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+if os.environ.get("SERVER_MODE") == "async":
+    # Needs the "async" extra: pip install .[async]
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    # Requests mostly wait on Spoonacular, so each worker serves them on threads
+    worker_class = "gthread"
+    threads = int(os.environ.get("GUNICORN_THREADS", 32))
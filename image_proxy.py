@@ -0,0 +1,245 @@
+"""Recipe image proxy backing the /img/<recipe_id>?w= route.
+
+Images are fetched from Spoonacular's image CDN at the published size
+closest to the requested width, optionally re-encoded (WebP when the client
+accepts it, JPEG otherwise) when Pillow is installed, and kept in a
+size-bounded on-disk cache shared by every worker. Only hosts in the
+allowlist are ever fetched, and the fetched URL is built from the recipe id
+rather than taken from the request.
+"""
+import hashlib
+import importlib.util
+import io
+import os
+import re
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+import requests
+
+from cache import SingleFlight
+
+# Pillow is optional, and imported on the first resize rather than at startup
+HAVE_PILLOW = importlib.util.find_spec('PIL') is not None
+
+# Image sizes Spoonacular publishes for every recipe, keyed by width
+SPOONACULAR_SIZES = {90: '90x90', 240: '240x150', 312: '312x231', 480: '480x360', 556: '556x370', 636: '636x393'}
+WIDTHS = sorted(SPOONACULAR_SIZES)
+DEFAULT_WIDTH = 556
+CONTENT_TYPES = {'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif',
+                 'webp': 'image/webp'}
+RECIPE_IMAGE_RE = re.compile(r'/recipes/(\d+)-\d+x\d+\.([A-Za-z]+)$')
+
+
+class DiskLRUCache:
+    """Size-bounded file cache that any number of workers can share.
+
+    Reads bump a file's mtime; once a write takes the directory past
+    ``max_bytes``, the least recently used files are removed until it is
+    back under 90% of the limit. The directory is created and sized on the
+    first write or stats() call, not at import.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _ensure_scanned(self):
+        if self._size is None:
+            os.makedirs(self.directory, exist_ok=True)
+            size = sum(size for _, size, _ in self._entries())
+            with self._lock:
+                if self._size is None:
+                    self._size = size
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def set(self, key, data):
+        self._ensure_scanned()
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(data)
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self):
+        # Rescan rather than trust the running total: other workers write here too
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.evictions += 1
+        with self._lock:
+            self._size = total
+
+    def stats(self):
+        self._ensure_scanned()
+        return {'bytes': self._size, 'max_bytes': self.max_bytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+class ImageProxy:
+    """Fetches, resizes and caches recipe images from an allowlisted origin"""
+
+    def __init__(self, cache, origin="https://img.spoonacular.com/recipes",
+                 allowed_hosts=("img.spoonacular.com", "spoonacular.com"), timeout=5.0,
+                 max_image_bytes=5 * 1024 * 1024, quality=80, max_age=30 * 24 * 3600):
+        self.cache = cache
+        self.origin = origin.rstrip('/')
+        self.allowed_hosts = {host.lower() for host in allowed_hosts}
+        if not self._allowed(self.origin):
+            raise ValueError(f"Image origin {origin} is not in the allowed hosts")
+        self.timeout = timeout
+        self.max_image_bytes = max_image_bytes
+        self.quality = quality
+        self.max_age = max_age
+        self.session = requests.Session()
+        self._flights = SingleFlight()
+        self.fetches = 0
+
+    def _allowed(self, url):
+        parts = urlsplit(url)
+        return parts.scheme in ('http', 'https') and (parts.hostname or '').lower() in self.allowed_hosts
+
+    @staticmethod
+    def snap_width(width):
+        """Round a requested width up to a published size, so each recipe has few variants"""
+        for candidate in WIDTHS:
+            if width <= candidate:
+                return candidate
+        return WIDTHS[-1]
+
+    def proxied_url(self, recipe_id, image_url):
+        """Rewrite a Spoonacular image URL to the proxy; any other URL is returned unchanged"""
+        if not image_url or not self._allowed(image_url):
+            return image_url
+        match = RECIPE_IMAGE_RE.search(urlsplit(image_url).path)
+        if not match or int(match.group(1)) != recipe_id:
+            return image_url
+        image_type = match.group(2).lower()
+        return f"/img/{recipe_id}" if image_type == 'jpg' else f"/img/{recipe_id}?t={image_type}"
+
+    def get(self, recipe_id, width=DEFAULT_WIDTH, image_type='jpg', accept=''):
+        """Return ``(bytes, content_type)`` for a recipe image.
+
+        Raises ValueError when there is no such image and
+        requests.RequestException when the CDN cannot be reached.
+        """
+        image_type = (image_type or 'jpg').lower()
+        if image_type not in CONTENT_TYPES:
+            raise ValueError(f"Unsupported image type {image_type}")
+        width = self.snap_width(width)
+        if not HAVE_PILLOW:
+            output = image_type
+        else:
+            output = 'webp' if 'image/webp' in (accept or '') else 'jpeg'
+
+        key = f"{recipe_id}-{width}.{image_type}.{output}"
+        data = self.cache.get(key)
+        if data is None:
+            data = self._flights.do(key, lambda: self._render(key, recipe_id, width, image_type, output))
+        return data, CONTENT_TYPES[output]
+
+    def _render(self, key, recipe_id, width, image_type, output):
+        data = self._fetch(f"{self.origin}/{recipe_id}-{SPOONACULAR_SIZES[width]}.{image_type}")
+        if HAVE_PILLOW:
+            data = self._encode(data, width, output)
+        self.cache.set(key, data)
+        return data
+
+    def _fetch(self, url):
+        # Redirects are not followed, so a response can never point the proxy at another host
+        with self.session.get(url, timeout=self.timeout, stream=True, allow_redirects=False) as response:
+            if response.status_code in (403, 404):
+                raise ValueError(f"No image at {url}")
+            response.raise_for_status()
+            if not response.headers.get('Content-Type', '').startswith('image/'):
+                raise ValueError(f"{url} did not return an image")
+            self.fetches += 1
+            data = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                data += chunk
+                if len(data) > self.max_image_bytes:
+                    raise ValueError(f"Image at {url} is larger than {self.max_image_bytes} bytes")
+            return bytes(data)
+
+    def _encode(self, data, width, output):
+        from PIL import Image
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.thumbnail((width, width * 4))
+                if output == 'jpeg' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                buffer = io.BytesIO()
+                image.save(buffer, format=output.upper(), quality=self.quality)
+                return buffer.getvalue()
+        except OSError as e:
+            raise ValueError(f"Unreadable image: {e}")
+
+    def stats(self):
+        return {'fetches': self.fetches, 'disk': self.cache.stats(), 'flights': self._flights.stats()}
+
+
+def _create_image_proxy():
+    cache = DiskLRUCache(
+        os.environ.get("IMAGE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), 'mealbuddy-images'),
+        max_bytes=int(float(os.environ.get("IMAGE_CACHE_MAX_MB", 256)) * 1024 * 1024)
+    )
+    return ImageProxy(
+        cache,
+        origin=os.environ.get("IMAGE_ORIGIN", "https://img.spoonacular.com/recipes"),
+        allowed_hosts=[host.strip() for host in
+                       os.environ.get("IMAGE_PROXY_HOSTS", "img.spoonacular.com,spoonacular.com").split(',')
+                       if host.strip()],
+        quality=int(os.environ.get("IMAGE_QUALITY", 80)),
+        max_age=int(os.environ.get("IMAGE_CACHE_MAX_AGE", 30 * 24 * 3600))
+    )
+
+
+image_proxy = _create_image_proxy()
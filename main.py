@@ -1,5 +1,8 @@
 from app import app
-import routes  # noqa: F401
+import routes
+from prefetch import prefetcher
+
+prefetcher.start(seed_searches=routes.prefetch_seeds)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
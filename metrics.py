@@ -0,0 +1,295 @@
+"""In-process metrics exposed in the Prometheus text format at /metrics.
+
+Counters, histograms and per-route latency summaries live in a module-level
+registry; ``span(name)`` times a block of hot-path work. Everything is
+in-process, so with several gunicorn workers each scrape sees one worker.
+"""
+import cProfile
+import logging
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - optional sampling profiler
+    Profiler = None
+
+PREFIX = 'mealbuddy_'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+ID_SEGMENT_RE = re.compile(r'/\d+(?=/|$)')
+
+
+def _label_values(values):
+    # Label values are text in the exposition format; keeping them as str also keeps
+    # label sets sortable when a caller mixes e.g. a status code with an exception name
+    return tuple(str(value) for value in values)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = labels
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        labels = _label_values(labels)
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                yield f"{self.name}{_format_labels(self.labels, labels)} {value:g}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._counts = {}
+        self._sums = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        labels = _label_values(labels)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[labels] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            for labels, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else f"{bound:g}"
+                    yield f"{self.name}_bucket{_format_labels(self.labels, labels, [('le', le)])} {cumulative}"
+                yield f"{self.name}_sum{_format_labels(self.labels, labels)} {self._sums[labels]:g}"
+                yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+class Summary:
+    """Quantiles over the most recent ``window`` observations of each label set"""
+
+    def __init__(self, name, help, labels=(), window=1024):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = labels
+        self.window = window
+        self._samples = {}
+        self._counts = defaultdict(int)
+        self._sums = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        labels = _label_values(labels)
+        with self._lock:
+            samples = self._samples.get(labels)
+            if samples is None:
+                samples = self._samples[labels] = deque(maxlen=self.window)
+            samples.append(value)
+            self._counts[labels] += 1
+            self._sums[labels] += value
+
+    def quantiles(self, *labels):
+        labels = _label_values(labels)
+        with self._lock:
+            samples = sorted(self._samples.get(labels, ()))
+        if not samples:
+            return {}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} summary"
+        with self._lock:
+            label_sets = sorted(self._samples)
+        for labels in label_sets:
+            for q, value in self.quantiles(*labels).items():
+                yield f"{self.name}{_format_labels(self.labels, labels, [('quantile', f'{q:g}')])} {value:g}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {self._sums[labels]:g}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {self._counts[labels]}"
+
+
+http_requests = Counter('http_requests_total', 'HTTP requests by route and status', ('route', 'method', 'status'))
+http_latency = Summary('http_request_duration_seconds', 'Time to produce a response, by route', ('route', 'method'))
+upstream_latency = Histogram('upstream_request_duration_seconds', 'Spoonacular request latency',
+                             ('endpoint', 'status'))
+span_latency = Histogram('span_duration_seconds', 'Time spent in instrumented hot-path work', ('span',))
+REGISTRY = [http_requests, http_latency, upstream_latency, span_latency]
+_stats_providers = []
+
+
+@contextmanager
+def span(name):
+    """Time a block of work into span_duration_seconds{span=name}"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_latency.observe(time.perf_counter() - start, name)
+
+
+def endpoint_label(url):
+    """Reduce an upstream URL to a low-cardinality endpoint name, e.g. '{id}/information'"""
+    path = url.split('?', 1)[0].rsplit('/recipes', 1)[-1]
+    return ID_SEGMENT_RE.sub('/{id}', path).lstrip('/') or 'root'
+
+
+def observe_upstream(url, status, seconds):
+    upstream_latency.observe(seconds, endpoint_label(url), status)
+
+
+def observe_request(route, method, status, seconds):
+    http_requests.inc(route, method, status)
+    http_latency.observe(seconds, route, method)
+
+
+def register_stats(provider):
+    """Add a callable returning a nested dict of counters to render as gauges"""
+    _stats_providers.append(provider)
+
+
+def _flatten(prefix, stats):
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+
+def render_stats(stats):
+    """Render nested service stats dicts as gauges, with cache hit ratios"""
+    lines = []
+    for cache, cache_stats in stats.items():
+        for tier in ('local', 'shared'):
+            tier_stats = cache_stats.get(tier) if isinstance(cache_stats, dict) else None
+            if not tier_stats or 'hits' not in tier_stats:
+                continue
+            lookups = tier_stats['hits'] + tier_stats['misses'] + tier_stats.get('stale_hits', 0)
+            ratio = tier_stats['hits'] / lookups if lookups else 0
+            lines.append(f'{PREFIX}cache_hit_ratio{{cache="{cache}",tier="{tier}"}} {ratio:g}')
+    if lines:
+        lines.insert(0, f"# TYPE {PREFIX}cache_hit_ratio gauge")
+    for name, value in _flatten(PREFIX.rstrip('_'), stats):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value:g}")
+    return lines
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    stats = {}
+    for provider in _stats_providers:
+        try:
+            stats.update(provider())
+        except Exception as e:
+            logging.error(f"Error collecting stats for /metrics: {e}")
+    lines.extend(render_stats(stats))
+    return '\n'.join(lines) + '\n'
+
+
+class RequestProfiler:
+    """Profiles a random sample of requests and writes one file per request.
+
+    Uses pyinstrument (a sampling profiler, HTML output) when installed and
+    cProfile (.prof files) otherwise. Only one request is profiled at a time.
+    """
+
+    def __init__(self, sample_rate=0.0, directory=None):
+        self.sample_rate = sample_rate
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'mealbuddy-profiles')
+        self._busy = threading.Lock()
+        if sample_rate:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def start(self):
+        """Maybe start profiling the current request; returns a handle for stop()"""
+        if not self.sample_rate or random.random() >= self.sample_rate or not self._busy.acquire(blocking=False):
+            return None
+        profiler = Profiler() if Profiler is not None else cProfile.Profile()
+        try:
+            if Profiler is not None:
+                profiler.start()
+            else:
+                profiler.enable()
+        except Exception:
+            self._busy.release()
+            raise
+        return profiler
+
+    def stop(self, profiler, route):
+        try:
+            route_name = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}-{route_name}"
+            if Profiler is not None:
+                profiler.stop()
+                with open(os.path.join(self.directory, name + '.html'), 'w') as f:
+                    f.write(profiler.output_html())
+            else:
+                profiler.disable()
+                profiler.dump_stats(os.path.join(self.directory, name + '.prof'))
+        except Exception as e:
+            logging.warning(f"Could not write request profile: {e}")
+        finally:
+            self._busy.release()
+
+
+profiler = RequestProfiler(float(os.environ.get("PROFILE_SAMPLE_RATE", 0)), os.environ.get("PROFILE_DIR"))
+
+
+def init_app(app):
+    """Time every Flask request and profile a sample of them"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_profile = profiler.start()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('metrics_start', None)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        if start is not None:
+            observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+        profile = g.pop('metrics_profile', None)
+        if profile is not None:
+            profiler.stop(profile, route)
+        return response
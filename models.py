@@ -1,5 +1,14 @@
 # Models file - simplified version without database
-# This file is kept for compatibility but no longer uses database models
+# Recipes are kept as compact slotted dataclasses and only turned into JSON
+# at the response boundary (see serialization.py).
+import json
+import re
+from dataclasses import dataclass, field
+
+
+TAG_RE = re.compile(r'<[^>]+>')
+SNAPSHOT_SUMMARY_LENGTH = 200
+
 
 # Placeholder for any future data structures if needed
 class SimpleUser:
@@ -7,9 +16,117 @@ class SimpleUser:
         self.username = username
         self.email = email
 
-class SimpleRecipe:
-    def __init__(self, recipe_data):
-        self.data = recipe_data
-        
-    def to_dict(self):
-        return self.data
\ No newline at end of file
+
+@dataclass(slots=True)
+class Ingredient:
+    name: str = ''
+    amount: float = 0
+    unit: str = ''
+    original: str = ''
+
+    def to_dict(self, legacy=False):
+        # The same in both API versions; legacy is accepted so every model serializes alike
+        return {
+            'name': self.name,
+            'amount': self.amount,
+            'unit': self.unit,
+            'original': self.original
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data.get('name', ''),
+            amount=data.get('amount', 0),
+            unit=data.get('unit', ''),
+            original=data.get('original', '')
+        )
+
+
+@dataclass(slots=True)
+class Recipe:
+    id: int
+    title: str = ''
+    image_url: str = ''
+    ready_in_minutes: int = 30
+    servings: int = 1
+    summary: str = ''
+    instructions: str = ''
+    ingredients: list = field(default_factory=list)
+    cuisine_types: list = field(default_factory=list)
+    meal_types: list = field(default_factory=list)
+    dietary_info: list = field(default_factory=list)
+    nutrition_info: dict = field(default_factory=dict)
+    difficulty_level: str = 'Medium'
+    average_rating: float = 0
+
+    @property
+    def spoonacular_id(self):
+        return self.id
+
+    def to_dict(self, legacy=False):
+        """Return the API representation of the recipe.
+
+        With legacy=True, ingredients and nutrition_info are JSON-encoded
+        strings, which is the shape version 1 clients expect.
+        """
+        ingredients = [ingredient.to_dict() for ingredient in self.ingredients]
+        return {
+            'id': self.id,
+            'spoonacular_id': self.id,
+            'title': self.title,
+            'image_url': self.image_url,
+            'ready_in_minutes': self.ready_in_minutes,
+            'servings': self.servings,
+            'summary': self.summary,
+            'instructions': self.instructions,
+            'ingredients': json.dumps(ingredients) if legacy else ingredients,
+            'cuisine_types': self.cuisine_types,
+            'meal_types': self.meal_types,
+            'dietary_info': self.dietary_info,
+            'nutrition_info': json.dumps(self.nutrition_info) if legacy else self.nutrition_info,
+            'difficulty_level': self.difficulty_level,
+            'average_rating': self.average_rating
+        }
+
+    def to_snapshot(self):
+        """Return the card-sized subset of the recipe stored with favorites"""
+        return {
+            'id': self.id,
+            'spoonacular_id': self.id,
+            'title': self.title,
+            'image_url': self.image_url,
+            'ready_in_minutes': self.ready_in_minutes,
+            'servings': self.servings,
+            'summary': TAG_RE.sub('', self.summary)[:SNAPSHOT_SUMMARY_LENGTH],
+            'cuisine_types': self.cuisine_types,
+            'meal_types': self.meal_types,
+            'dietary_info': self.dietary_info,
+            'difficulty_level': self.difficulty_level,
+            'average_rating': self.average_rating
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        ingredients = data.get('ingredients', [])
+        if isinstance(ingredients, str):
+            ingredients = json.loads(ingredients)
+        nutrition_info = data.get('nutrition_info', {})
+        if isinstance(nutrition_info, str):
+            nutrition_info = json.loads(nutrition_info)
+        return cls(
+            id=data['id'],
+            title=data.get('title', ''),
+            image_url=data.get('image_url', ''),
+            ready_in_minutes=data.get('ready_in_minutes', 30),
+            servings=data.get('servings', 1),
+            summary=data.get('summary', ''),
+            instructions=data.get('instructions', ''),
+            ingredients=[Ingredient.from_dict(ingredient) for ingredient in ingredients],
+            cuisine_types=data.get('cuisine_types', []),
+            meal_types=data.get('meal_types', []),
+            dietary_info=data.get('dietary_info', []),
+            nutrition_info=nutrition_info,
+            difficulty_level=data.get('difficulty_level', 'Medium'),
+            average_rating=data.get('average_rating', 0)
+        )
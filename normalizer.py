@@ -0,0 +1,116 @@
+import logging
+
+from models import Ingredient, Recipe
+
+# Spoonacular nutrient name -> nutrition_info field
+DEFAULT_NUTRIENTS = {
+    'Calories': 'calories',
+    'Protein': 'protein',
+    'Carbohydrates': 'carbs',
+    'Fat': 'fat'
+}
+
+# Spoonacular boolean flag -> dietary_info label
+DIETARY_FLAGS = (
+    ('vegetarian', 'vegetarian'),
+    ('vegan', 'vegan'),
+    ('glutenFree', 'gluten-free'),
+    ('dairyFree', 'dairy-free')
+)
+
+
+def nutrient_field(name):
+    """Field name used for a Spoonacular nutrient, e.g. 'Saturated Fat' -> 'saturated_fat'"""
+    return name.strip().lower().replace(' ', '_')
+
+
+def parse_nutrient_names(value):
+    """Parse a comma-separated list of extra nutrient names into a lookup"""
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    return {name: nutrient_field(name) for name in names}
+
+
+def difficulty_for(ready_time):
+    if ready_time <= 20:
+        return 'Easy'
+    if ready_time <= 45:
+        return 'Medium'
+    return 'Hard'
+
+
+class RecipeNormalizer:
+    """Turns raw Spoonacular recipe payloads into Recipe objects.
+
+    The nutrient lookup is built once, so each recipe's nutrient list is
+    scanned a single time whatever the number of extracted nutrients.
+    """
+
+    def __init__(self, extra_nutrients=None, image_url_rewriter=None):
+        self.nutrient_fields = dict(DEFAULT_NUTRIENTS)
+        self.nutrient_fields.update(extra_nutrients or {})
+        self._nutrition_defaults = dict.fromkeys(self.nutrient_fields.values(), 0)
+        # Optional (recipe_id, image_url) -> image_url hook, e.g. ImageProxy.proxied_url
+        self.image_url_rewriter = image_url_rewriter
+
+    def normalize(self, recipe_data, detailed=False):
+        """Normalize a single recipe payload; raises on malformed data"""
+        get = recipe_data.get
+
+        nutrition_info = {}
+        nutrition = get('nutrition')
+        if nutrition and 'nutrients' in nutrition:
+            nutrition_info = self._nutrition_defaults.copy()
+            fields = self.nutrient_fields
+            for nutrient in nutrition['nutrients']:
+                field = fields.get(nutrient.get('name'))
+                if field is not None:
+                    nutrition_info[field] = nutrient['amount']
+
+        instructions = get('instructions') or ""
+        if not instructions and 'analyzedInstructions' in recipe_data:
+            instructions = "\n".join(
+                f"{step['number']}. {step['step']}"
+                for instruction_group in recipe_data['analyzedInstructions']
+                for step in instruction_group.get('steps', [])
+            )
+
+        image_url = get('image', '')
+        if self.image_url_rewriter is not None:
+            image_url = self.image_url_rewriter(recipe_data['id'], image_url)
+
+        ready_time = get('readyInMinutes', 30)
+        return Recipe(
+            id=recipe_data['id'],
+            title=get('title', ''),
+            image_url=image_url,
+            ready_in_minutes=ready_time,
+            servings=get('servings', 1),
+            summary=get('summary', ''),
+            instructions=instructions,
+            ingredients=[
+                Ingredient(
+                    name=ingredient.get('name', ''),
+                    amount=ingredient.get('amount', 0),
+                    unit=ingredient.get('unit', ''),
+                    original=ingredient.get('original', '')
+                )
+                for ingredient in get('extendedIngredients', ())
+            ],
+            cuisine_types=get('cuisines', []),
+            meal_types=get('dishTypes', []),
+            dietary_info=[label for flag, label in DIETARY_FLAGS if get(flag)],
+            nutrition_info=nutrition_info,
+            difficulty_level=difficulty_for(ready_time),
+            average_rating=0
+        )
+
+    def normalize_page(self, results, detailed=False):
+        """Normalize a whole result page, skipping recipes that fail to parse"""
+        recipes = []
+        normalize = self.normalize
+        for recipe_data in results:
+            try:
+                recipes.append(normalize(recipe_data, detailed))
+            except Exception as e:
+                logging.error(f"Error processing recipe data: {e}")
+        return recipes
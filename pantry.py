@@ -0,0 +1,158 @@
+import importlib.util
+import re
+import threading
+from array import array
+from collections import Counter
+
+# numpy is an optional speedup, imported on the first ranking rather than at startup
+HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
+
+WORD_RE = re.compile(r'[a-z]+')
+
+# Preparation words that do not change which ingredient is meant
+DESCRIPTORS = frozenset({
+    'fresh', 'freshly', 'chopped', 'minced', 'diced', 'sliced', 'grated', 'shredded', 'crushed',
+    'large', 'medium', 'small', 'whole', 'boneless', 'skinless', 'peeled', 'ripe', 'dried',
+    'frozen', 'raw', 'cooked', 'finely', 'roughly', 'thinly', 'extra', 'virgin', 'organic',
+    'unsalted', 'salted', 'softened', 'melted', 'to', 'taste', 'of', 'and', 'or', 'for'
+})
+
+# Dropped only when other words remain, so 'garlic cloves' -> 'garlic' but 'cloves' stays
+MEASURE_WORDS = frozenset({'clove', 'can', 'stalk', 'sprig', 'head', 'bunch', 'pinch', 'slice', 'piece'})
+
+
+def singular(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith('oes'):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient_name(name):
+    """Reduce an ingredient name to a comparable key, e.g. 'Fresh Tomatoes' -> 'tomato'"""
+    words = [singular(word) for word in WORD_RE.findall((name or '').lower()) if word not in DESCRIPTORS]
+    if len(words) > 1:
+        words = [word for word in words if word not in MEASURE_WORDS] or words
+    return ' '.join(words)
+
+
+class PantryIndex:
+    """Ranks indexed recipes by how much of a pantry they use.
+
+    Each normalized ingredient has a posting list of the documents (recipes)
+    that need it. A query concatenates the pantry's posting lists and counts
+    matches per document in one vectorized pass (NumPy when installed), then
+    ranks by fewest missing ingredients and highest coverage.
+    """
+
+    def __init__(self, max_docs=100000):
+        self.max_docs = max_docs
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._docs = []
+        self._doc_ingredients = []
+        self._doc_by_id = {}
+        self._ingredient_ids = {}
+        self._postings = []
+        self._counts = array('H')
+        self._live = bytearray()
+
+    def __len__(self):
+        return len(self._doc_by_id)
+
+    def add_many(self, recipes):
+        with self._lock:
+            for recipe in recipes:
+                self._add(recipe)
+            if len(self._docs) > self.max_docs:
+                live = [self._docs[doc] for doc in sorted(self._doc_by_id.values())]
+                self._reset()
+                for recipe in live[-(self.max_docs // 2):]:
+                    self._add(recipe)
+
+    def _add(self, recipe):
+        names = frozenset(filter(None, (normalize_ingredient_name(i.name) for i in recipe.ingredients)))
+        doc = self._doc_by_id.get(recipe.id)
+        if doc is not None:
+            if self._doc_ingredients[doc] == names:
+                self._docs[doc] = recipe
+                return
+            self._live[doc] = 0
+        if not names:
+            self._doc_by_id.pop(recipe.id, None)
+            return
+
+        doc = len(self._docs)
+        self._docs.append(recipe)
+        self._doc_ingredients.append(names)
+        self._doc_by_id[recipe.id] = doc
+        self._counts.append(min(len(names), 0xFFFF))
+        self._live.append(1)
+        for name in names:
+            ingredient_id = self._ingredient_ids.get(name)
+            if ingredient_id is None:
+                ingredient_id = self._ingredient_ids[name] = len(self._postings)
+                self._postings.append(array('I'))
+            self._postings[ingredient_id].append(doc)
+
+    def rank(self, pantry, max_results=20, max_missing=None):
+        """Return ``(recipe, matched, missing_names)`` tuples, best matches first"""
+        pantry_names = {normalize_ingredient_name(name) for name in pantry} - {''}
+        with self._lock:
+            postings = [self._postings[self._ingredient_ids[name]]
+                        for name in pantry_names if name in self._ingredient_ids]
+            if not postings:
+                return []
+            if HAVE_NUMPY:
+                ranked = self._rank_numpy(postings, max_results, max_missing)
+            else:
+                ranked = self._rank_python(postings, max_results, max_missing)
+            return [
+                (self._docs[doc], matched, sorted(self._doc_ingredients[doc] - pantry_names))
+                for doc, matched in ranked
+            ]
+
+    def _rank_numpy(self, postings, max_results, max_missing):
+        import numpy as np
+
+        doc_count = len(self._docs)
+        docs = np.concatenate([np.frombuffer(p, dtype=np.uint32) for p in postings])
+        matched = np.bincount(docs, minlength=doc_count)
+        totals = np.frombuffer(self._counts, dtype=np.uint16).astype(np.int64)
+        missing = totals - matched
+        mask = (matched > 0) & np.frombuffer(self._live, dtype=np.bool_)
+        if max_missing is not None:
+            mask &= missing <= max_missing
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return []
+
+        coverage = matched[candidates] / totals[candidates]
+        # Sort key: fewest missing first, then highest coverage
+        score = missing[candidates] - coverage
+        if candidates.size > max_results:
+            top = np.argpartition(score, max_results - 1)[:max_results]
+            candidates, score = candidates[top], score[top]
+        order = np.lexsort((candidates, score))
+        return [(int(doc), int(matched[doc])) for doc in candidates[order]]
+
+    def _rank_python(self, postings, max_results, max_missing):
+        matched = Counter()
+        for posting in postings:
+            matched.update(posting)
+        scored = []
+        for doc, count in matched.items():
+            missing = self._counts[doc] - count
+            if not self._live[doc] or (max_missing is not None and missing > max_missing):
+                continue
+            scored.append((missing - count / self._counts[doc], doc, count))
+        scored.sort()
+        return [(doc, count) for _, doc, count in scored[:max_results]]
+
+    def stats(self):
+        return {'recipes': len(self._doc_by_id), 'ingredients': len(self._ingredient_ids)}
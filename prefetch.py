@@ -0,0 +1,256 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from recipe_service import recipe_service
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path, service):
+    """Write the service's warm caches to path as gzipped JSON, atomically"""
+    data = {'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'caches': service.snapshot_caches()}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    # Several workers may save at once; each replace is atomic and the last one wins
+    os.replace(tmp_path, path)
+    return sum(len(rows) for rows in data['caches'].values())
+
+
+def load_snapshot(path, service):
+    """Restore caches written by save_snapshot, returning the number of entries loaded"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != SNAPSHOT_VERSION:
+            return 0
+        return service.restore_caches(data['caches'])
+    except FileNotFoundError:
+        return 0
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable cache snapshot {path}: {e}")
+        return 0
+
+
+class PrefetchScheduler:
+    """Keeps the searches and recipes users ask for most in the cache.
+
+    Searches and recipe views are counted as they happen; counts halve every
+    ``decay_interval`` seconds so old favourites fade. Once no request has
+    arrived for ``idle_seconds``, a background thread refreshes the top-K
+    searches and recipes that are missing or expire within ``refresh_ahead``
+    seconds, spending at most ``rpm`` upstream requests per minute. Seed
+    searches fill the list until there is enough live traffic.
+
+    With a ``snapshot_path`` the warm caches are saved periodically and on
+    exit, and restored on the background thread as soon as start() is called,
+    so new instances begin hot without holding up their first request.
+    """
+
+    def __init__(self, service, rpm=0, top_k=20, max_results=12, idle_seconds=2.0, interval=10.0,
+                 refresh_ahead=120.0, decay_interval=3600.0, snapshot_path=None, snapshot_interval=300.0):
+        self.service = service
+        self.rpm = rpm
+        self.top_k = top_k
+        self.max_results = max_results
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.decay_interval = decay_interval
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+
+        self._searches = Counter()
+        self._recipes = Counter()
+        self._seeds = []
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+        # Token bucket holding at most ten seconds' worth of the budget
+        self._capacity = max(1.0, rpm / 6)
+        self._tokens = 0.0
+        self._tokens_at = time.monotonic()
+        self._stop = threading.Event()
+        self._restored = threading.Event()
+        self._thread = None
+
+        self.warmed_searches = 0
+        self.warmed_recipes = 0
+        self.upstream_requests = 0
+        self.snapshots = 0
+        self.restored_entries = 0
+
+    def record_search(self, query="", cuisine="", meal_type="", diet=""):
+        key = tuple((value or "").strip().lower() for value in (query, cuisine, meal_type, diet))
+        with self._lock:
+            self._searches[key] += 1
+            self._last_request = time.monotonic()
+
+    def record_recipe(self, recipe_id):
+        with self._lock:
+            self._recipes[recipe_id] += 1
+            self._last_request = time.monotonic()
+
+    def start(self, seed_searches=None):
+        """Start restoring the cache snapshot and warming in the background.
+
+        seed_searches is called once, on the background thread, and returns
+        ``(query, cuisine, meal_type, diet)`` tuples to warm after the
+        searches seen live.
+        """
+        if self.snapshot_path:
+            atexit.register(self.save)
+        if self._thread is not None or not (self.rpm or self.snapshot_path):
+            return
+        self._thread = threading.Thread(target=self._run, args=(seed_searches,),
+                                        name="recipe-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def restore(self):
+        """Load the cache snapshot; entries cached since startup are kept"""
+        try:
+            self.restored_entries = load_snapshot(self.snapshot_path, self.service)
+            if self.restored_entries:
+                logging.info(f"Restored {self.restored_entries} cache entries from {self.snapshot_path}")
+        finally:
+            self._restored.set()
+        return self.restored_entries
+
+    def save(self):
+        # Until the snapshot is restored, saving would overwrite it with a colder cache
+        if not self.snapshot_path or not self._restored.is_set():
+            return 0
+        try:
+            saved = save_snapshot(self.snapshot_path, self.service)
+            self.snapshots += 1
+            return saved
+        except OSError as e:
+            logging.error(f"Error saving cache snapshot: {e}")
+            return 0
+
+    def _run(self, seed_searches):
+        if self.snapshot_path:
+            self.restore()
+        if seed_searches is not None:
+            try:
+                self._seeds = list(dict.fromkeys(
+                    tuple((value or "").strip().lower() for value in seed) for seed in seed_searches()
+                ))
+            except Exception as e:
+                logging.error(f"Error loading prefetch seeds: {e}")
+
+        next_snapshot = time.monotonic() + self.snapshot_interval
+        next_decay = time.monotonic() + self.decay_interval
+        while not self._stop.wait(self.interval):
+            try:
+                if self.rpm:
+                    self.run_once()
+                now = time.monotonic()
+                if self.snapshot_path and now >= next_snapshot:
+                    self.save()
+                    next_snapshot = now + self.snapshot_interval
+                if now >= next_decay:
+                    self._decay()
+                    next_decay = now + self.decay_interval
+            except Exception as e:
+                logging.error(f"Prefetch error: {e}")
+
+    def _idle(self):
+        return time.monotonic() - self._last_request >= self.idle_seconds
+
+    def _take(self, cost=1):
+        """Spend cost upstream requests from the budget if they are available"""
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._tokens_at) * self.rpm / 60)
+        self._tokens_at = now
+        if self._tokens < cost:
+            return False
+        self._tokens -= cost
+        self.upstream_requests += cost
+        return True
+
+    def _decay(self):
+        with self._lock:
+            for counter in (self._searches, self._recipes):
+                for key, count in list(counter.items()):
+                    if count > 1:
+                        counter[key] = count // 2
+                    else:
+                        del counter[key]
+
+    def top_searches(self):
+        with self._lock:
+            searches = [key for key, _ in self._searches.most_common(self.top_k)]
+        for seed in self._seeds:
+            if len(searches) >= self.top_k:
+                break
+            if seed not in searches:
+                searches.append(seed)
+        return searches
+
+    def top_recipes(self):
+        with self._lock:
+            return [recipe_id for recipe_id, _ in self._recipes.most_common(self.top_k)]
+
+    def run_once(self):
+        """Refresh the popular entries that are due while the app stays idle"""
+        deadline = time.time() + self.refresh_ahead
+        for search in self.top_searches():
+            if not self._idle():
+                return
+            expires_at = self.service.search_expires_at(*search)
+            if expires_at is not None and expires_at > deadline:
+                continue
+            if not self._take():
+                return
+            try:
+                self.service.refresh_search(*search, max_results=self.max_results)
+            except requests.RequestException as e:
+                logging.warning(f"Prefetching search {search} failed: {e}")
+                return
+            self.warmed_searches += 1
+
+        due = [recipe_id for recipe_id in self.top_recipes()
+               if (self.service.recipe_expires_at(recipe_id) or 0) <= deadline]
+        chunk_size = self.service.bulk_chunk_size
+        for start in range(0, len(due), chunk_size):
+            if not self._idle() or not self._take():
+                return
+            self.warmed_recipes += len(self.service.refresh_recipes(due[start:start + chunk_size]))
+
+    def stats(self):
+        return {
+            'rpm': self.rpm,
+            'tracked_searches': len(self._searches),
+            'tracked_recipes': len(self._recipes),
+            'warmed_searches': self.warmed_searches,
+            'warmed_recipes': self.warmed_recipes,
+            'upstream_requests': self.upstream_requests,
+            'snapshots': self.snapshots,
+            'restored_entries': self.restored_entries
+        }
+
+
+def _create_prefetcher():
+    return PrefetchScheduler(
+        recipe_service,
+        rpm=float(os.environ.get("PREFETCH_RPM", 0)),
+        top_k=int(os.environ.get("PREFETCH_TOP_K", 20)),
+        idle_seconds=float(os.environ.get("PREFETCH_IDLE_SECONDS", 2)),
+        interval=float(os.environ.get("PREFETCH_INTERVAL", 10)),
+        snapshot_path=os.environ.get("CACHE_SNAPSHOT_PATH"),
+        snapshot_interval=float(os.environ.get("CACHE_SNAPSHOT_INTERVAL", 300))
+    )
+
+
+prefetcher = _create_prefetcher()
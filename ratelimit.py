@@ -0,0 +1,272 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+
+from cache import SQLiteFile
+
+
+class QuotaExceededError(requests.RequestException):
+    """Raised instead of calling upstream when the point budget is spent"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_cost(url, params=None):
+    """Estimate the Spoonacular points a request will be charged"""
+    params = params or {}
+    path = urlsplit(url).path
+    if path.endswith('/complexSearch'):
+        number = int(params.get('number', 10))
+        cost = 1 + 0.01 * number
+        for option in ('addRecipeInformation', 'fillIngredients', 'addRecipeNutrition'):
+            if params.get(option):
+                cost += 0.025 * number
+        return cost
+    if path.endswith('/informationBulk'):
+        count = len([value for value in str(params.get('ids', '')).split(',') if value])
+        return 1 + 0.5 * max(count - 1, 0)
+    return 1.0
+
+
+def _utc_day_start(now):
+    return datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0,
+                                                             microsecond=0).timestamp()
+
+
+class TokenBucketStore:
+    """Token buckets and counters, shared by every worker that opens the same SQLite file.
+
+    Without a path the state is kept in memory for this process only. If
+    the file cannot be used, requests are allowed rather than failed.
+    """
+
+    PRUNE_EVERY = 1024
+
+    def __init__(self, path=None):
+        self.path = path
+        self.errors = 0
+        self._memory = {}
+        self._values = {}
+        self._lock = threading.Lock()
+        if path:
+            self._db = SQLiteFile(path, self.PRUNE_EVERY, schema=(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)",
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "key TEXT PRIMARY KEY, value REAL NOT NULL, updated_at REAL NOT NULL)"
+            ))
+
+    @staticmethod
+    def _refill(row, now, rate, capacity):
+        if row is None:
+            return capacity
+        tokens, updated_at = row
+        return min(capacity, tokens + max(now - updated_at, 0) * rate)
+
+    def take(self, key, cost, rate, capacity):
+        """Spend cost tokens from a bucket refilling at rate per second.
+
+        Returns ``(allowed, retry_after)``; a negative cost refunds tokens.
+        """
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                tokens = self._refill(self._memory.get(key), now, rate, capacity)
+                allowed = tokens >= cost
+                self._memory[key] = (tokens - cost if allowed else tokens, now)
+        else:
+            try:
+                conn = self._db.connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?",
+                                       (key,)).fetchone()
+                    tokens = self._refill(row, now, rate, capacity)
+                    allowed = tokens >= cost
+                    conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                                 (key, tokens - cost if allowed else tokens, now))
+                    if self._db.prune_due():
+                        # Buckets untouched for an hour have refilled; forget them
+                        conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - 3600,))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                self.errors += 1
+                logging.warning(f"Rate limit store failed, allowing request: {e}")
+                return True, 0
+        if allowed:
+            return True, 0
+        return False, (cost - tokens) / rate if rate else None
+
+    def level(self, key, rate, capacity):
+        """Return the tokens currently in a bucket without spending any"""
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                return self._refill(self._memory.get(key), now, rate, capacity)
+        try:
+            row = self._db.connection().execute("SELECT tokens, updated_at FROM buckets WHERE key = ?",
+                                                (key,)).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.warning(f"Rate limit store read failed: {e}")
+            return capacity
+        return self._refill(row, now, rate, capacity)
+
+    def set_value(self, key, value):
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                self._values[key] = (value, now)
+            return
+        try:
+            self._db.connection().execute(
+                "INSERT OR REPLACE INTO counters (key, value, updated_at) VALUES (?, ?, ?)", (key, value, now)
+            )
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.warning(f"Rate limit store write failed: {e}")
+
+    def get_value(self, key):
+        """Return ``(value, updated_at)`` or None"""
+        if not self.path:
+            with self._lock:
+                return self._values.get(key)
+        try:
+            return self._db.connection().execute(
+                "SELECT value, updated_at FROM counters WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.warning(f"Rate limit store read failed: {e}")
+            return None
+
+
+class QuotaLimiter:
+    """Budgets Spoonacular points across every worker.
+
+    Each call is charged its estimated cost (see estimate_cost) from a token
+    bucket that refills at ``daily_points`` per day and holds at most
+    ``burst`` points, so a busy hour cannot spend the whole day's quota. The
+    ``X-API-Quota-*`` response headers correct the estimate and record how
+    many points Spoonacular says are left today.
+    """
+
+    BUCKET = 'upstream-points'
+
+    def __init__(self, store, daily_points=150, burst=None, near_limit=0.1):
+        self.store = store
+        self.daily_points = daily_points
+        self.rate = daily_points / 86400
+        self.capacity = burst or daily_points / 4
+        self.near_limit_fraction = near_limit
+        self.rejected = 0
+        self.points_estimated = 0.0
+
+    def acquire(self, url, params=None):
+        """Charge a request's estimated cost, raising QuotaExceededError if it cannot be paid"""
+        left = self.points_left()
+        if left is not None and left <= 0:
+            self.rejected += 1
+            raise QuotaExceededError("Spoonacular daily quota used up")
+
+        cost = estimate_cost(url, params)
+        allowed, retry_after = self.store.take(self.BUCKET, cost, self.rate, self.capacity)
+        if not allowed:
+            self.rejected += 1
+            raise QuotaExceededError(f"Upstream point budget exhausted, {cost:.2f} points needed",
+                                     retry_after=retry_after)
+        self.points_estimated += cost
+        return cost
+
+    def refund(self, cost):
+        """Return points charged for a request that was never sent"""
+        self.points_estimated -= cost
+        self.store.take(self.BUCKET, -cost, self.rate, self.capacity)
+
+    def record(self, response, estimated):
+        """Reconcile with the quota headers (or a 402) from a Spoonacular response"""
+        if response.status_code == 402:
+            self.store.set_value('points_left', 0)
+            return
+
+        headers = response.headers
+        try:
+            left = headers.get('X-API-Quota-Left')
+            if left is not None:
+                self.store.set_value('points_left', float(left))
+            used = headers.get('X-API-Quota-Used')
+            if used is not None:
+                self.store.set_value('points_used', float(used))
+            charged = headers.get('X-API-Quota-Request')
+            if charged is not None and abs(float(charged) - estimated) > 1e-6:
+                # Refund an overestimate, or charge the difference
+                self.store.take(self.BUCKET, float(charged) - estimated, self.rate, self.capacity)
+        except ValueError:
+            logging.warning("Ignoring malformed X-API-Quota headers")
+
+    def points_left(self):
+        """Points Spoonacular reported left today, or None if not known since midnight UTC"""
+        row = self.store.get_value('points_left')
+        if row is None or row[1] < _utc_day_start(time.time()):
+            return None
+        return row[0]
+
+    def near_limit(self):
+        """Whether callers should cut back on upstream calls"""
+        left = self.points_left()
+        if left is not None and left < self.near_limit_fraction * self.daily_points:
+            return True
+        return self.store.level(self.BUCKET, self.rate, self.capacity) < self.near_limit_fraction * self.capacity
+
+    def stats(self):
+        return {
+            'points_left': self.points_left(),
+            'bucket': round(self.store.level(self.BUCKET, self.rate, self.capacity), 2),
+            'capacity': self.capacity,
+            'points_estimated': round(self.points_estimated, 2),
+            'rejected': self.rejected,
+            'near_limit': self.near_limit()
+        }
+
+
+class ClientLimiter:
+    """Per-client request throttling: ``per_minute`` requests with bursts of ``burst``"""
+
+    def __init__(self, store, per_minute=60, burst=20):
+        self.store = store
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.rejected = 0
+
+    def check(self, client, cost=1):
+        """Charge a client for a request, returning ``(allowed, retry_after)``"""
+        if not self.rate:
+            return True, 0
+        allowed, retry_after = self.store.take(f"client:{client}", cost, self.rate, self.capacity)
+        if not allowed:
+            self.rejected += 1
+        return allowed, retry_after
+
+
+def _create_store():
+    # Shared by every worker on the host, so limits hold across gunicorn workers
+    return TokenBucketStore(os.environ.get("RATE_LIMIT_DB", "ratelimit.db") or None)
+
+
+rate_limit_store = _create_store()
+client_limiter = ClientLimiter(
+    rate_limit_store,
+    per_minute=float(os.environ.get("CLIENT_RATE_LIMIT", 60)),
+    burst=float(os.environ.get("CLIENT_RATE_BURST", 20))
+)
@@ -0,0 +1,171 @@
+import re
+import threading
+from array import array
+
+from pantry import singular
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset({'a', 'an', 'and', 'the', 'of', 'with', 'in', 'on', 'for', 'to', 'or'})
+
+
+def tokenize(text):
+    """Split text into lowercase, singularized search tokens"""
+    tokens = []
+    for token in TOKEN_RE.findall((text or '').lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(singular(token))
+    return tokens
+
+
+def facet_value(value):
+    """Normalize a facet value so 'Gluten Free' matches the 'gluten-free' label"""
+    return '-'.join((value or '').strip().lower().replace('-', ' ').split())
+
+
+def _set_bit(bitset, doc):
+    index = doc >> 3
+    if index >= len(bitset):
+        bitset.extend(bytes(index - len(bitset) + 1))
+    bitset[index] |= 1 << (doc & 7)
+
+
+def _clear_bit(bitset, doc):
+    index = doc >> 3
+    if index < len(bitset):
+        bitset[index] &= ~(1 << (doc & 7)) & 0xFF
+
+
+class RecipeIndex:
+    """In-memory full-text and faceted index over recipes seen from upstream.
+
+    Every recipe gets a document number. Title and ingredient tokens map to
+    append-only posting lists; cuisine, dish type and dietary facets are kept
+    as bitsets. Queries AND the bitsets together, so filtering costs a few
+    big-integer operations whatever the index size. Re-indexing a recipe
+    whose terms changed tombstones its old document.
+    """
+
+    def __init__(self, max_docs=100000):
+        self.max_docs = max_docs
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._docs = []
+        self._doc_keys = []
+        self._doc_by_id = {}
+        self._postings = {}
+        self._token_bits = {}
+        self._facets = {}
+        self._live = bytearray()
+
+    def __len__(self):
+        return len(self._doc_by_id)
+
+    @staticmethod
+    def _keys(recipe):
+        tokens = set(tokenize(recipe.title))
+        for ingredient in recipe.ingredients:
+            tokens.update(tokenize(ingredient.name))
+        facets = {('cuisine', facet_value(value)) for value in recipe.cuisine_types}
+        facets.update(('meal_type', facet_value(value)) for value in recipe.meal_types)
+        facets.update(('diet', facet_value(value)) for value in recipe.dietary_info)
+        return frozenset(tokens), frozenset(facets)
+
+    def add(self, recipe):
+        self.add_many([recipe])
+
+    def add_many(self, recipes):
+        with self._lock:
+            for recipe in recipes:
+                self._add(recipe)
+            if len(self._docs) > self.max_docs:
+                self._compact(self.max_docs // 2)
+
+    def _add(self, recipe):
+        keys = self._keys(recipe)
+        doc = self._doc_by_id.get(recipe.id)
+        if doc is not None:
+            if self._doc_keys[doc] == keys:
+                self._docs[doc] = recipe
+                return
+            _clear_bit(self._live, doc)
+
+        doc = len(self._docs)
+        self._docs.append(recipe)
+        self._doc_keys.append(keys)
+        self._doc_by_id[recipe.id] = doc
+        _set_bit(self._live, doc)
+
+        tokens, facets = keys
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = array('I')
+            postings.append(doc)
+        for facet in facets:
+            bitset = self._facets.get(facet)
+            if bitset is None:
+                bitset = self._facets[facet] = bytearray()
+            _set_bit(bitset, doc)
+
+    def _compact(self, keep):
+        """Rebuild the index from the newest `keep` live recipes"""
+        live = [self._docs[doc] for doc in sorted(self._doc_by_id.values())]
+        self._reset()
+        for recipe in live[-keep:]:
+            self._add(recipe)
+
+    def _bits_for_token(self, token):
+        """Materialize a posting list as a bitset, cached until the list grows"""
+        postings = self._postings.get(token)
+        if postings is None:
+            return 0
+        cached = self._token_bits.get(token)
+        if cached is not None and cached[0] == len(postings):
+            return cached[1]
+        bitset = bytearray((len(self._docs) >> 3) + 1)
+        for doc in postings:
+            bitset[doc >> 3] |= 1 << (doc & 7)
+        bits = int.from_bytes(bitset, 'little')
+        self._token_bits[token] = (len(postings), bits)
+        return bits
+
+    def search(self, query="", cuisine="", meal_type="", diet="", max_results=12):
+        """Return up to max_results indexed recipes matching every filter"""
+        with self._lock:
+            bits = int.from_bytes(self._live, 'little')
+            for name, value in (('cuisine', cuisine), ('meal_type', meal_type), ('diet', diet)):
+                if value and bits:
+                    bitset = self._facets.get((name, facet_value(value)))
+                    bits &= int.from_bytes(bitset, 'little') if bitset else 0
+            for token in set(tokenize(query)):
+                if not bits:
+                    break
+                bits &= self._bits_for_token(token)
+
+            results = []
+            while bits and len(results) < max_results:
+                lowest = bits & -bits
+                results.append(self._docs[lowest.bit_length() - 1])
+                bits ^= lowest
+            return results
+
+    def facet_counts(self, name):
+        """Return {value: live recipe count} for one facet"""
+        with self._lock:
+            live = int.from_bytes(self._live, 'little')
+            return {
+                value: (int.from_bytes(bitset, 'little') & live).bit_count()
+                for (facet, value), bitset in self._facets.items()
+                if facet == name
+            }
+
+    def stats(self):
+        return {
+            'recipes': len(self._doc_by_id),
+            'documents': len(self._docs),
+            'tokens': len(self._postings),
+            'facets': len(self._facets)
+        }
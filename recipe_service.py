@@ -2,79 +2,445 @@ import os
 import requests
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+import metrics
+import scaling
+from cache import SingleFlight, TTLCache, build_cache
+from image_proxy import image_proxy
+from models import Recipe
+from normalizer import RecipeNormalizer, parse_nutrient_names
+from recipe_index import RecipeIndex
+from pantry import PantryIndex
+from ratelimit import QuotaLimiter, rate_limit_store
+from upstream import CircuitBreaker, UpstreamClient
 
 class RecipeService:
     def __init__(self):
         self.api_key = os.environ.get("SPOONACULAR_API_KEY", "default_key")
-        self.base_url = "https://api.spoonacular.com/recipes"
-        
-    def search_recipes(self, query="", cuisine="", meal_type="", diet="", max_results=12):
-        """Search for recipes using Spoonacular API"""
-        try:
-            params = {
-                "apiKey": self.api_key,
-                "query": query,
-                "number": max_results,
-                "addRecipeInformation": True,
-                "fillIngredients": True
-            }
-            
-            if cuisine:
-                params["cuisine"] = cuisine
-            if meal_type:
-                params["type"] = meal_type
-            if diet:
-                params["diet"] = diet
-                
-            response = requests.get(f"{self.base_url}/complexSearch", params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            recipes = []
-            
-            for recipe_data in data.get('results', []):
-                recipe = self._process_recipe_data(recipe_data)
-                if recipe:
-                    recipes.append(recipe)
-                    
+        self.base_url = os.environ.get("SPOONACULAR_BASE_URL", "https://api.spoonacular.com/recipes")
+        # Spoonacular points are budgeted across workers; defaults match the free plan
+        self.quota = QuotaLimiter(
+            rate_limit_store,
+            daily_points=float(os.environ.get("SPOONACULAR_DAILY_POINTS", 150)),
+            burst=float(os.environ.get("SPOONACULAR_POINTS_BURST", 0)) or None,
+            near_limit=float(os.environ.get("QUOTA_NEAR_LIMIT", 0.1))
+        )
+        self.http = UpstreamClient(
+            pool_size=int(os.environ.get("UPSTREAM_POOL_SIZE", 10)),
+            connect_timeout=float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", 3.05)),
+            read_timeout=float(os.environ.get("UPSTREAM_READ_TIMEOUT", 10)),
+            max_retries=int(os.environ.get("UPSTREAM_MAX_RETRIES", 2)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.environ.get("UPSTREAM_BREAKER_THRESHOLD", 5)),
+                reset_timeout=float(os.environ.get("UPSTREAM_BREAKER_RESET", 30))
+            ),
+            limiter=self.quota
+        )
+
+        # Nutrients beyond calories/protein/carbs/fat, e.g. "Fiber,Sugar,Sodium"
+        # IMAGE_PROXY_REWRITE points image_url at the /img/ proxy instead of Spoonacular's CDN
+        self.normalizer = RecipeNormalizer(
+            parse_nutrient_names(os.environ.get("RECIPE_EXTRA_NUTRIENTS")),
+            image_url_rewriter=image_proxy.proxied_url if os.environ.get("IMAGE_PROXY_REWRITE") else None
+        )
+
+        # "single" relies on /information already carrying analyzedInstructions,
+        # "concurrent" issues both calls at once, "sequential" is the old behaviour.
+        self.detail_fetch_mode = os.environ.get("RECIPE_DETAIL_FETCH_MODE", "single")
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("UPSTREAM_POOL_SIZE", 10)),
+            thread_name_prefix="recipe-upstream"
+        )
+
+        # Recipe details rarely change upstream, so serve them from a local LRU
+        # (optionally backed by a SQLite file shared between gunicorn workers)
+        # and refresh expired entries in the background.
+        self.detail_cache = build_cache(
+            "recipe-details",
+            maxsize=int(os.environ.get("RECIPE_CACHE_SIZE", 512)),
+            ttl=int(os.environ.get("RECIPE_CACHE_TTL", 3600)),
+            stale_ttl=int(os.environ.get("RECIPE_CACHE_STALE_TTL", 86400)),
+            shared_path=os.environ.get("RECIPE_CACHE_DB"),
+            encode=Recipe.to_dict,
+            decode=Recipe.from_dict
+        )
+
+        # Search pages are keyed by the normalized filters; concurrent identical
+        # searches share one upstream call through the single-flight group.
+        self.search_cache = build_cache(
+            "recipe-search",
+            maxsize=int(os.environ.get("SEARCH_CACHE_SIZE", 256)),
+            ttl=int(os.environ.get("SEARCH_CACHE_TTL", 900)),
+            stale_ttl=int(os.environ.get("SEARCH_CACHE_STALE_TTL", 3600)),
+            shared_path=os.environ.get("RECIPE_CACHE_DB"),
+            encode=lambda page: {'number': page['number'],
+                                 'recipes': [recipe.to_dict() for recipe in page['recipes']]},
+            decode=lambda page: {'number': page['number'],
+                                 'recipes': [Recipe.from_dict(recipe) for recipe in page['recipes']]}
+        )
+        self._search_flights = SingleFlight()
+        # Parsed ingredient lists for scaling, keyed by recipe id
+        self._scaling_templates = TTLCache(maxsize=int(os.environ.get("RECIPE_CACHE_SIZE", 512)),
+                                           ttl=int(os.environ.get("RECIPE_CACHE_TTL", 3600)))
+        # Every recipe seen from upstream is indexed for local searches
+        self.index = RecipeIndex(max_docs=int(os.environ.get("RECIPE_INDEX_MAX_DOCS", 100000)))
+        self.pantry_index = PantryIndex(max_docs=int(os.environ.get("RECIPE_INDEX_MAX_DOCS", 100000)))
+        self.default_search_source = os.environ.get("SEARCH_SOURCE", "remote")
+        self.bulk_chunk_size = int(os.environ.get("RECIPE_BULK_CHUNK_SIZE", 50))
+
+    def search_recipes(self, query="", cuisine="", meal_type="", diet="", max_results=12, source=None):
+        """Search for recipes.
+
+        source is "remote" (Spoonacular), "local" (only the local index) or
+        "hybrid" (local hits first, topped up from Spoonacular when there are
+        fewer than max_results).
+        """
+        source = source or self.default_search_source
+        if source == "remote":
+            return self._search_remote(query, cuisine, meal_type, diet, max_results)
+
+        recipes = self.index.search(query, cuisine, meal_type, diet, max_results)
+        if source == "local" or len(recipes) >= max_results:
             return recipes
-            
+
+        seen = {recipe.id for recipe in recipes}
+        for recipe in self._search_remote(query, cuisine, meal_type, diet, max_results):
+            if len(recipes) >= max_results:
+                break
+            if recipe.id not in seen:
+                seen.add(recipe.id)
+                recipes.append(recipe)
+        return recipes
+
+    def peek_search(self, query="", cuisine="", meal_type="", diet="", max_results=12, source=None):
+        """Answer a remote search from the in-process cache only, or return None.
+
+        Never blocks on I/O, so async callers can use it on the event loop.
+        """
+        if (source or self.default_search_source) != "remote":
+            return None
+        entry = self.search_cache.local.get_entry(self._search_key(query, cuisine, meal_type, diet))
+        if entry is None or not entry[1] or not self._page_covers(entry[0], max_results):
+            return None
+        return entry[0]['recipes'][:max_results]
+
+    def iter_search(self, query="", cuisine="", meal_type="", diet="", max_results=12, source=None):
+        """Yield ``(origin, recipe)`` pairs for a search as each becomes ready.
+
+        Recipes held locally come first: a cached search page ("cache"), then
+        for local and hybrid searches the local index ("local"). Spoonacular is
+        only asked when those fall short, and its results are normalized and
+        yielded one at a time ("remote"). Duplicates are skipped.
+        """
+        source = source or self.default_search_source
+        key = self._search_key(query, cuisine, meal_type, diet)
+        seen = set()
+
+        def take(recipes):
+            for recipe in recipes:
+                if len(seen) >= max_results:
+                    return
+                if recipe.id not in seen:
+                    seen.add(recipe.id)
+                    yield recipe
+
+        entry = self.search_cache.get_entry(key)
+        if entry is not None:
+            page, fresh = entry[0], entry[1]
+            for recipe in take(page['recipes']):
+                yield "cache", recipe
+            if fresh and self._page_covers(page, max_results):
+                return
+
+        if source != "remote":
+            for recipe in take(self.index.search(query, cuisine, meal_type, diet, max_results)):
+                yield "local", recipe
+            if source == "local":
+                return
+
+        if len(seen) >= max_results or (seen and self.quota.near_limit()):
+            return
+        try:
+            # Identical concurrent searches share one upstream call: followers replay the
+            # leader's page. The page is drained even once max_results is reached so it gets cached
+            results = self._search_flights.stream(
+                ('stream', key, max_results),
+                lambda: self._stream_search(key, query, cuisine, meal_type, diet, max_results)
+            )
+            for streamed in results:
+                for recipe in take([streamed]):
+                    yield "remote", recipe
+        except requests.RequestException as e:
+            logging.error(f"Error streaming search results: {e}")
+            if source == "remote":
+                for recipe in take(self.index.search(query, cuisine, meal_type, diet, max_results)):
+                    yield "local", recipe
+
+    def _stream_search(self, key, query, cuisine, meal_type, diet, max_results):
+        """Like _fetch_search, but yields each recipe as soon as it is normalized.
+
+        The page is cached once every result has been processed.
+        """
+        # A flight that just finished may have cached the page already
+        page = self.search_cache.get(key)
+        if self._page_covers(page, max_results):
+            yield from page['recipes'][:max_results]
+            return
+
+        response = self.http.get(f"{self.base_url}/complexSearch",
+                                 params=self._search_params(query, cuisine, meal_type, diet, max_results))
+        response.raise_for_status()
+
+        recipes = []
+        for result in response.json().get('results', []):
+            try:
+                with metrics.span('normalize'):
+                    recipe = self.normalizer.normalize(result)
+            except Exception as e:
+                logging.error(f"Error processing recipe data: {e}")
+                continue
+            self._index_recipes([recipe])
+            recipes.append(recipe)
+            yield recipe
+        self.search_cache.set(key, {'number': max_results, 'recipes': recipes})
+
+    def _search_remote(self, query, cuisine, meal_type, diet, max_results):
+        """Search Spoonacular through the search cache"""
+        key = self._search_key(query, cuisine, meal_type, diet)
+        page = self.search_cache.get(key)
+        if self._page_covers(page, max_results):
+            return page['recipes'][:max_results]
+
+        # Near the quota, any cached page beats spending points on a fresh one
+        if self.quota.near_limit():
+            page = self.search_cache.get_stale(key)
+            if page and page['recipes']:
+                return page['recipes'][:max_results]
+
+        try:
+            page = self._search_flights.do(
+                (key, max_results),
+                lambda: self._load_search_page(key, query, cuisine, meal_type, diet, max_results)
+            )
+            return page['recipes'][:max_results]
+
         except requests.RequestException as e:
             logging.error(f"Error searching recipes: {e}")
-            return []
-    
+            # Fall back to an expired page, then to the local index, rather than an empty result
+            page = self.search_cache.get_stale(key)
+            if page:
+                return page['recipes'][:max_results]
+            return self.index.search(query, cuisine, meal_type, diet, max_results)
+
+    @staticmethod
+    def _search_key(query, cuisine, meal_type, diet):
+        """Build the canonical cache key for a set of search filters"""
+        parts = [(value or "").strip().lower() for value in (query, cuisine, meal_type, diet)]
+        return "search:" + json.dumps(parts)
+
+    @staticmethod
+    def _page_covers(page, max_results):
+        """Whether a cached search page can answer a request for max_results"""
+        if page is None:
+            return False
+        # A page shorter than what was asked for upstream holds every match.
+        return page['number'] >= max_results or len(page['recipes']) < page['number']
+
+    def _load_search_page(self, key, query, cuisine, meal_type, diet, max_results):
+        """Fetch a search page and cache it unless a larger page is already cached"""
+        page = self.search_cache.get(key)
+        if self._page_covers(page, max_results):
+            return page
+
+        page = {
+            'number': max_results,
+            'recipes': self._fetch_search(query, cuisine, meal_type, diet, max_results)
+        }
+        self.search_cache.set(key, page)
+        return page
+
+    def search_expires_at(self, query="", cuisine="", meal_type="", diet=""):
+        """Return when the cached page for a search expires, or None if it is not cached"""
+        entry = self.search_cache.get_entry(self._search_key(query, cuisine, meal_type, diet))
+        return None if entry is None else entry[2]
+
+    def refresh_search(self, query="", cuisine="", meal_type="", diet="", max_results=12):
+        """Fetch a search page from upstream and cache it, whatever is cached now"""
+        key = self._search_key(query, cuisine, meal_type, diet)
+        page = {
+            'number': max_results,
+            'recipes': self._fetch_search(query, cuisine, meal_type, diet, max_results)
+        }
+        self.search_cache.set(key, page)
+        return page['recipes']
+
+    def _fetch_search(self, query, cuisine, meal_type, diet, max_results):
+        """Run complexSearch upstream and process every result"""
+        response = self.http.get(f"{self.base_url}/complexSearch",
+                                 params=self._search_params(query, cuisine, meal_type, diet, max_results))
+        response.raise_for_status()
+
+        data = response.json()
+        with metrics.span('normalize'):
+            recipes = self.normalizer.normalize_page(data.get('results', []))
+        self._index_recipes(recipes)
+        return recipes
+
+    def _search_params(self, query, cuisine, meal_type, diet, max_results):
+        params = {
+            "apiKey": self.api_key,
+            "query": query,
+            "number": max_results,
+            "addRecipeInformation": True
+        }
+        # fillIngredients costs extra points per result; skip it near the quota
+        if not self.quota.near_limit():
+            params["fillIngredients"] = True
+
+        if cuisine:
+            params["cuisine"] = cuisine
+        if meal_type:
+            params["type"] = meal_type
+        if diet:
+            params["diet"] = diet
+        return params
+
     def get_recipe_details(self, recipe_id):
         """Get detailed recipe information"""
         try:
-            # Fetch from API
-            params = {
-                "apiKey": self.api_key,
-                "includeNutrition": True
-            }
-            
-            response = requests.get(f"{self.base_url}/{recipe_id}/information", params=params)
-            response.raise_for_status()
-            
-            recipe_data = response.json()
-            
-            # Also get analyzed instructions
-            instructions_response = requests.get(f"{self.base_url}/{recipe_id}/analyzedInstructions", 
-                                               params={"apiKey": self.api_key})
-            if instructions_response.status_code == 200:
-                recipe_data['analyzedInstructions'] = instructions_response.json()
-            
-            return self._process_recipe_data(recipe_data, detailed=True)
-            
+            return self.detail_cache.get_or_load(
+                self._detail_key(recipe_id),
+                lambda: self._fetch_recipe_details(recipe_id)
+            )
         except requests.RequestException as e:
             logging.error(f"Error getting recipe details: {e}")
             return None
+
+    def recipe_expires_at(self, recipe_id):
+        """Return when the cached copy of a recipe expires, or None if it is not cached"""
+        entry = self.detail_cache.get_entry(self._detail_key(recipe_id))
+        return None if entry is None else entry[2]
+
+    def peek_recipe_details(self, recipe_id):
+        """Return a fresh recipe from the in-process cache only, or None"""
+        return self.detail_cache.local.get(self._detail_key(recipe_id))
+
+    @staticmethod
+    def _detail_key(recipe_id):
+        return f"recipe:{recipe_id}"
+
+    def get_recipes_bulk(self, recipe_ids):
+        """Get detailed information for several recipes.
+
+        Cached recipes are served from the cache; the rest are fetched with
+        informationBulk in chunks of ``bulk_chunk_size``, run concurrently.
+        Recipes that cannot be fetched are left out of the result.
+        """
+        recipe_ids = list(dict.fromkeys(recipe_ids))
+        recipes = {}
+        missing = []
+        for recipe_id in recipe_ids:
+            entry = self.detail_cache.get_entry(self._detail_key(recipe_id))
+            if entry is not None:
+                # Stale entries are returned as-is unless the refetch succeeds
+                recipes[recipe_id] = entry[0]
+                if entry[1]:
+                    continue
+            missing.append(recipe_id)
+
+        for recipe in self.refresh_recipes(missing):
+            recipes[recipe.id] = recipe
+        return [recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes]
+
+    def refresh_recipes(self, recipe_ids):
+        """Fetch recipes from upstream in concurrent chunks and cache them, whatever is cached now"""
+        chunks = [recipe_ids[start:start + self.bulk_chunk_size]
+                  for start in range(0, len(recipe_ids), self.bulk_chunk_size)]
+        futures = [self._executor.submit(self._fetch_recipes_bulk, chunk) for chunk in chunks]
+        recipes = []
+        for future in futures:
+            try:
+                fetched = future.result()
+            except requests.RequestException as e:
+                logging.error(f"Error getting recipes in bulk: {e}")
+                continue
+            for recipe in fetched:
+                self.detail_cache.set(self._detail_key(recipe.id), recipe)
+                recipes.append(recipe)
+        return recipes
+
+    def _fetch_recipes_bulk(self, recipe_ids):
+        """Fetch and process one informationBulk chunk, bypassing the cache"""
+        params = {
+            "apiKey": self.api_key,
+            "ids": ",".join(str(recipe_id) for recipe_id in recipe_ids),
+            "includeNutrition": True
+        }
+
+        response = self.http.get(f"{self.base_url}/informationBulk", params=params)
+        response.raise_for_status()
+
+        with metrics.span('normalize'):
+            recipes = self.normalizer.normalize_page(response.json(), detailed=True)
+        self._index_recipes(recipes)
+        return recipes
+
+    def _fetch_recipe_details(self, recipe_id):
+        """Fetch and process recipe details from the API, bypassing the cache"""
+        params = {
+            "apiKey": self.api_key,
+            "includeNutrition": True
+        }
+        information_url = f"{self.base_url}/{recipe_id}/information"
+        instructions_url = f"{self.base_url}/{recipe_id}/analyzedInstructions"
+
+        if self.detail_fetch_mode == "concurrent":
+            instructions_future = self._executor.submit(
+                self.http.get, instructions_url, params={"apiKey": self.api_key}
+            )
+            response = self.http.get(information_url, params=params)
+            response.raise_for_status()
+            recipe_data = response.json()
+            try:
+                instructions_response = instructions_future.result()
+            except requests.RequestException as e:
+                logging.warning(f"Error getting instructions for recipe {recipe_id}: {e}")
+                instructions_response = None
+        else:
+            response = self.http.get(information_url, params=params)
+            response.raise_for_status()
+            recipe_data = response.json()
+
+            # /information already includes analyzedInstructions; only ask
+            # separately when it is missing or the legacy mode is selected.
+            instructions_response = None
+            if self.detail_fetch_mode == "sequential" or 'analyzedInstructions' not in recipe_data:
+                instructions_response = self.http.get(instructions_url, params={"apiKey": self.api_key})
+
+        if instructions_response is not None and instructions_response.status_code == 200:
+            recipe_data['analyzedInstructions'] = instructions_response.json()
+
+        return self._process_recipe_data(recipe_data, detailed=True)
+
+    def cache_stats(self):
+        """Return hit/miss/eviction counters for the service caches"""
+        return {
+            'recipe_details': self.detail_cache.stats(),
+            'search': self.search_cache.stats(),
+            'search_flights': self._search_flights.stats(),
+            'upstream': self.http.stats(),
+            'index': self.index.stats(),
+            'pantry_index': self.pantry_index.stats()
+        }
     
     def get_recipe_instructions(self, recipe_id):
         """Get recipe cooking instructions"""
         try:
             params = {"apiKey": self.api_key}
             
-            response = requests.get(f"{self.base_url}/{recipe_id}/analyzedInstructions", params=params)
+            response = self.http.get(f"{self.base_url}/{recipe_id}/analyzedInstructions", params=params)
             response.raise_for_status()
             
             return response.json()
@@ -86,121 +452,111 @@ class RecipeService:
     def _process_recipe_data(self, recipe_data, detailed=False):
         """Process recipe data without database operations"""
         try:
-            spoonacular_id = recipe_data['id']
-            
-            # Extract cuisine types
-            cuisine_types = []
-            if 'cuisines' in recipe_data:
-                cuisine_types = recipe_data['cuisines']
-            
-            # Extract meal types
-            meal_types = []
-            if 'dishTypes' in recipe_data:
-                meal_types = recipe_data['dishTypes']
-            
-            # Extract dietary information
-            dietary_info = []
-            if recipe_data.get('vegetarian'):
-                dietary_info.append('vegetarian')
-            if recipe_data.get('vegan'):
-                dietary_info.append('vegan')
-            if recipe_data.get('glutenFree'):
-                dietary_info.append('gluten-free')
-            if recipe_data.get('dairyFree'):
-                dietary_info.append('dairy-free')
-            
-            # Process ingredients
-            ingredients = []
-            if 'extendedIngredients' in recipe_data:
-                for ingredient in recipe_data['extendedIngredients']:
-                    ingredients.append({
-                        'name': ingredient.get('name', ''),
-                        'amount': ingredient.get('amount', 0),
-                        'unit': ingredient.get('unit', ''),
-                        'original': ingredient.get('original', '')
-                    })
-            
-            # Process instructions
-            instructions = ""
-            if 'instructions' in recipe_data and recipe_data['instructions']:
-                instructions = recipe_data['instructions']
-            elif 'analyzedInstructions' in recipe_data:
-                instruction_steps = []
-                for instruction_group in recipe_data['analyzedInstructions']:
-                    for step in instruction_group.get('steps', []):
-                        instruction_steps.append(f"{step['number']}. {step['step']}")
-                instructions = "\n".join(instruction_steps)
-            
-            # Process nutrition info
-            nutrition_info = {}
-            if 'nutrition' in recipe_data and 'nutrients' in recipe_data['nutrition']:
-                nutrients = recipe_data['nutrition']['nutrients']
-                nutrition_info = {
-                    'calories': next((n['amount'] for n in nutrients if n.get('name') == 'Calories'), 0),
-                    'protein': next((n['amount'] for n in nutrients if n.get('name') == 'Protein'), 0),
-                    'carbs': next((n['amount'] for n in nutrients if n.get('name') == 'Carbohydrates'), 0),
-                    'fat': next((n['amount'] for n in nutrients if n.get('name') == 'Fat'), 0)
-                }
-            
-            # Determine difficulty level
-            ready_time = recipe_data.get('readyInMinutes', 30)
-            if ready_time <= 20:
-                difficulty = 'Easy'
-            elif ready_time <= 45:
-                difficulty = 'Medium'
-            else:
-                difficulty = 'Hard'
-            
-            # Return recipe data as dictionary
-            return {
-                'id': spoonacular_id,
-                'spoonacular_id': spoonacular_id,
-                'title': recipe_data.get('title', ''),
-                'image_url': recipe_data.get('image', ''),
-                'ready_in_minutes': ready_time,
-                'servings': recipe_data.get('servings', 1),
-                'summary': recipe_data.get('summary', ''),
-                'instructions': instructions,
-                'ingredients': json.dumps(ingredients),
-                'cuisine_types': cuisine_types,
-                'meal_types': meal_types,
-                'dietary_info': dietary_info,
-                'nutrition_info': json.dumps(nutrition_info),
-                'difficulty_level': difficulty,
-                'average_rating': 0
-            }
+            with metrics.span('normalize'):
+                recipe = self.normalizer.normalize(recipe_data, detailed)
+            self._index_recipes([recipe])
+            return recipe
             
         except Exception as e:
             logging.error(f"Error processing recipe data: {e}")
             return None
     
-    def adjust_servings(self, recipe_data, new_servings):
+    def _index_recipes(self, recipes):
+        """Add freshly normalized recipes to the local search and pantry indexes"""
+        self.index.add_many(recipes)
+        self.pantry_index.add_many(recipes)
+
+    def snapshot_caches(self):
+        """Return the in-process search and detail caches as JSON-compatible data"""
+        return {cache.name: cache.snapshot() for cache in (self.detail_cache, self.search_cache)}
+
+    def restore_caches(self, snapshot):
+        """Load data from snapshot_caches() and index the restored recipes"""
+        restored = 0
+        for cache in (self.detail_cache, self.search_cache):
+            restored += cache.restore(snapshot.get(cache.name, []))
+        recipes = [recipe for _, recipe, _ in self.detail_cache.local.items()]
+        for _, page, _ in self.search_cache.local.items():
+            recipes.extend(page['recipes'])
+        self._index_recipes(recipes)
+        return restored
+
+    def rank_by_pantry(self, ingredients, max_results=20, max_missing=None):
+        """Rank locally indexed recipes by how well a pantry covers them.
+
+        Returns dicts with the recipe, matched/missing counts, coverage and
+        the names of the missing ingredients. Never calls upstream.
+        """
+        results = []
+        for recipe, matched, missing in self.pantry_index.rank(ingredients, max_results, max_missing):
+            total = matched + len(missing)
+            results.append({
+                'recipe': recipe,
+                'matched_count': matched,
+                'missing_count': len(missing),
+                'coverage': round(matched / total, 3),
+                'missing_ingredients': missing
+            })
+        return results
+
+    def adjust_servings(self, recipe, new_servings):
         """Adjust recipe ingredients for different serving sizes"""
         try:
-            original_servings = recipe_data.get('servings', 1)
-            if original_servings == 0:
-                original_servings = 1
-                
+            original_servings = recipe.servings or 1
             multiplier = new_servings / original_servings
             
-            adjusted_ingredients = []
-            ingredients = json.loads(recipe_data.get('ingredients', '[]'))
+            ingredients = scaling.parse_ingredients(recipe.ingredients)
+            adjusted_ingredients = scaling.scale_ingredients(ingredients, multiplier)
             
-            for ingredient in ingredients:
-                adjusted_ingredient = ingredient.copy()
-                if 'amount' in adjusted_ingredient:
-                    adjusted_ingredient['amount'] = round(adjusted_ingredient['amount'] * multiplier, 2)
-                adjusted_ingredients.append(adjusted_ingredient)
-            
-            adjusted_recipe = recipe_data.copy()
-            adjusted_recipe['ingredients'] = json.dumps(adjusted_ingredients)
-            adjusted_recipe['servings'] = new_servings
-            
-            return adjusted_recipe
+            return replace(recipe, ingredients=adjusted_ingredients, servings=new_servings)
             
         except Exception as e:
             logging.error(f"Error adjusting servings: {e}")
-            return recipe_data
+            return recipe
+
+    def scale_recipe(self, recipe_id, servings_list):
+        """Scale a cached recipe's ingredients to several serving sizes at once.
+
+        Never calls upstream: returns None when the recipe is not cached.
+        Otherwise returns ``(base_servings, {servings: ingredients})``.
+        """
+        recipe = self.detail_cache.get_stale(self._detail_key(recipe_id))
+        if recipe is None:
+            return None
+
+        template = self._scaling_templates.get(recipe_id)
+        if template is None or template[0] is not recipe:
+            template = (recipe, scaling.parse_ingredients(recipe.ingredients))
+            self._scaling_templates.set(recipe_id, template)
+
+        base_servings = recipe.servings or 1
+        scaled = scaling.scale_many(template[1], [servings / base_servings for servings in servings_list])
+        return base_servings, dict(zip(servings_list, scaled))
+
+class LazyRecipeService:
+    """Stands in for the RecipeService until first use, then builds it once.
+
+    Keeps importing the app cheap, so a new instance can accept connections
+    before the caches, upstream client and thread pool exist.
+    """
+
+    def __init__(self, factory=RecipeService):
+        self._factory = factory
+        self._service = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._service is not None
+
+    def __getattr__(self, name):
+        service = self._service
+        if service is None:
+            with self._lock:
+                if self._service is None:
+                    self._service = self._factory()
+                service = self._service
+        return getattr(service, name)
 
 # Initialize service
-recipe_service = RecipeService()
\ No newline at end of file
+recipe_service = LazyRecipeService()
@@ -1,13 +1,130 @@
-from flask import request, jsonify, session, render_template
+from flask import Response, request, jsonify, session, render_template
 from app import app
 from recipe_service import recipe_service
-import json
+from recipe_index import facet_value
+from image_proxy import DEFAULT_WIDTH, image_proxy
+from prefetch import prefetcher
+from ratelimit import client_limiter
+from serialization import wants_legacy_shape
+from storage import isoformat, storage
+import metrics
+import shopping_list
+from datetime import datetime, timezone
+import base64
+import functools
+import hashlib
 import logging
+import math
+import requests
 
-# In-memory storage for demo (will reset when server restarts)
-users = {}
-user_favorites = {}
-search_history = {}
+MAX_BULK_IDS = 200
+MAX_SCALE_SIZES = 24
+MAX_SERVINGS = 100
+MAX_PAGE_SIZE = 100
+MAX_PANTRY_ITEMS = 100
+SEARCH_SOURCES = (None, 'local', 'remote', 'hybrid')
+
+# Filter values offered by the search form
+CUISINES = [
+    'African', 'American', 'British', 'Cajun', 'Caribbean', 'Chinese',
+    'Eastern European', 'European', 'French', 'German', 'Greek', 'Indian',
+    'Irish', 'Italian', 'Japanese', 'Jewish', 'Korean', 'Latin American',
+    'Mediterranean', 'Mexican', 'Middle Eastern', 'Nordic', 'Southern',
+    'Spanish', 'Thai', 'Vietnamese'
+]
+MEAL_TYPES = [
+    'main course', 'side dish', 'dessert', 'appetizer', 'salad',
+    'bread', 'breakfast', 'soup', 'beverage', 'sauce', 'marinade',
+    'fingerfood', 'snack', 'drink'
+]
+DIETS = [
+    'gluten free', 'ketogenic', 'vegetarian', 'lacto-vegetarian',
+    'ovo-vegetarian', 'vegan', 'pescetarian', 'paleo', 'primal',
+    'whole30'
+]
+
+# Fields returned by ?fields=summary on the favorites list
+SUMMARY_FIELDS = ('id', 'spoonacular_id', 'title', 'image_url', 'ready_in_minutes')
+
+def prefetch_seeds():
+    """Searches worth keeping warm: past popular searches, then browsing each filter"""
+    seeds = storage.popular_searches()
+    seeds += [('', cuisine, '', '') for cuisine in CUISINES]
+    seeds += [('', '', meal_type, '') for meal_type in MEAL_TYPES]
+    seeds += [('', '', '', diet) for diet in DIETS]
+    return seeds
+
+def _throttled(cost=1):
+    """Limit how fast one user (or address, when logged out) can call a route that may hit Spoonacular"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            client = session.get('user_id') or request.remote_addr
+            allowed, retry_after = client_limiter.check(client, cost)
+            if not allowed:
+                response = jsonify({'error': 'Too many requests, please slow down'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(math.ceil(retry_after or 1))
+                return response
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _valid_servings(count):
+    # bool is an int subclass, but {"servings": true} is not a serving count
+    return type(count) is int and 1 <= count <= MAX_SERVINGS
+
+def _encode_cursor(row_id):
+    return base64.urlsafe_b64encode(str(row_id).encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return int(base64.urlsafe_b64decode(padded.encode()).decode())
+
+def _page_args():
+    """Parse the cursor and limit query parameters; raises ValueError if invalid"""
+    cursor = request.args.get('cursor')
+    after_id = _decode_cursor(cursor) if cursor else 0
+    limit = request.args.get('limit')
+    if limit is not None:
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    return after_id, limit
+
+def _paginate(rows, limit, row_id):
+    """Split a limit+1 row fetch into the page and the cursor for the next one"""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(row_id(rows[-1]))
+
+def _conditional_list_response(user_id, list_name, build_payload):
+    """Answer with 304 when the client's copy of the user's list is current.
+
+    The ETag is derived from when the list last changed plus the query
+    string, so an unchanged list is confirmed without loading it.
+    """
+    updated_at = storage.list_updated_at(user_id, list_name)
+    etag = hashlib.sha1(
+        f"{user_id}:{list_name}:{updated_at}:{request.query_string.decode()}".encode()
+    ).hexdigest()
+    
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and updated_at is not None:
+        # Last-Modified is truncated to the second, so compare the exact change time:
+        # a change later in the same second must not be answered with 304
+        not_modified = updated_at <= request.if_modified_since.timestamp()
+    else:
+        not_modified = False
+    
+    response = app.response_class(status=304) if not_modified else jsonify(build_payload())
+    response.set_etag(etag)
+    if updated_at is not None:
+        response.last_modified = datetime.fromtimestamp(int(updated_at), timezone.utc)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
 
 # Serve the React app
 @app.route('/')
@@ -26,18 +143,11 @@ def register():
         if not username or not email or not password:
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Check if user already exists
-        if username in users:
+        # Create new user; fails if the username already exists
+        user = storage.create_user(username, email, password)
+        if not user:
             return jsonify({'error': 'Username already exists'}), 409
-        
-        # Create new user (simplified)
-        user_id = len(users) + 1
-        users[username] = {
-            'id': user_id,
-            'username': username,
-            'email': email,
-            'password': password  # In production, this should be hashed!
-        }
+        user_id = user['id']
         
         # Log user in
         session['user_id'] = user_id
@@ -59,9 +169,9 @@ def login():
         username = data.get('username')
         password = data.get('password')
         
-        user = users.get(username)
+        user = storage.authenticate(username, password)
         
-        if user and user['password'] == password:
+        if user:
             session['user_id'] = user['id']
             session['username'] = username
             return jsonify({
@@ -88,46 +198,124 @@ def get_current_user():
     if not user_id or not username:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    user = users.get(username)
+    user = storage.get_user(username)
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     return jsonify({'user': {'id': user['id'], 'username': username, 'email': user['email']}})
 
+def _search_args():
+    """Parse the search filters shared by the plain and streaming search routes"""
+    source = request.args.get('source') or None
+    if source not in SEARCH_SOURCES:
+        raise ValueError('source must be local, remote or hybrid')
+    try:
+        max_results = int(request.args.get('max_results', 12))
+    except ValueError:
+        raise ValueError('max_results must be a number')
+    if not 1 <= max_results <= MAX_PAGE_SIZE:
+        raise ValueError(f'max_results must be between 1 and {MAX_PAGE_SIZE}')
+    return (
+        request.args.get('query', ''),
+        request.args.get('cuisine', ''),
+        request.args.get('meal_type', ''),
+        request.args.get('diet', ''),
+        max_results,
+        source
+    )
+
+def _record_search(query, cuisine, meal_type, diet):
+    prefetcher.record_search(query, cuisine, meal_type, diet)
+    # Save search to history if user is logged in (keeps the last 20)
+    user_id = session.get('user_id')
+    if user_id and query:
+        storage.add_search(user_id, query, cuisine, meal_type, diet)
+
 @app.route('/api/recipes/search', methods=['GET'])
+@_throttled()
 def search_recipes():
     try:
-        query = request.args.get('query', '')
-        cuisine = request.args.get('cuisine', '')
-        meal_type = request.args.get('meal_type', '')
-        diet = request.args.get('diet', '')
-        max_results = int(request.args.get('max_results', 12))
+        try:
+            query, cuisine, meal_type, diet, max_results, source = _search_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Save search to history if user is logged in (simplified)
-        username = session.get('username')
-        if username and query:
-            if username not in search_history:
-                search_history[username] = []
-            search_history[username].append({
-                'query': query,
-                'cuisine': cuisine,
-                'meal_type': meal_type,
-                'diet': diet
-            })
-            # Keep only last 20 searches
-            search_history[username] = search_history[username][-20:]
+        _record_search(query, cuisine, meal_type, diet)
         
-        recipes = recipe_service.search_recipes(query, cuisine, meal_type, diet, max_results)
+        recipes = recipe_service.search_recipes(query, cuisine, meal_type, diet, max_results, source)
         return jsonify({'recipes': recipes})
         
     except Exception as e:
         logging.error(f"Search error: {e}")
         return jsonify({'error': 'Search failed'}), 500
 
+@app.route('/api/recipes/search/stream', methods=['GET'])
+@_throttled()
+def stream_search_recipes():
+    """Stream search results as NDJSON, or as Server-Sent Events with ?format=sse.
+
+    Each recipe is written as soon as it is ready, cached hits first, and a
+    final ``done`` message carries the count.
+    """
+    try:
+        try:
+            query, cuisine, meal_type, diet, max_results, source = _search_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        _record_search(query, cuisine, meal_type, diet)
+        
+        sse = (request.args.get('format') == 'sse'
+               or request.accept_mimetypes.best == 'text/event-stream')
+        legacy = wants_legacy_shape()
+        results = recipe_service.iter_search(query, cuisine, meal_type, diet, max_results, source)
+        
+        def generate():
+            count = 0
+            try:
+                for origin, recipe in results:
+                    count += 1
+                    message = app.json.dumps({'source': origin, 'recipe': recipe.to_dict(legacy=legacy)})
+                    yield f"event: recipe\ndata: {message}\n\n" if sse else message + "\n"
+            except Exception as e:
+                logging.error(f"Streaming search error: {e}")
+            done = app.json.dumps({'done': True, 'count': count})
+            yield f"event: done\ndata: {done}\n\n" if sse else done + "\n"
+        
+        response = app.response_class(generate(), mimetype='text/event-stream' if sse else 'application/x-ndjson')
+        response.cache_control.no_cache = True
+        # Stop nginx-style proxies from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        logging.error(f"Search error: {e}")
+        return jsonify({'error': 'Search failed'}), 500
+
+@app.route('/api/recipes/bulk', methods=['GET'])
+@_throttled(5)
+def get_recipes_bulk():
+    try:
+        ids = request.args.get('ids', '')
+        recipe_ids = [int(value) for value in ids.split(',') if value.strip().isdigit()]
+        if not recipe_ids:
+            return jsonify({'error': 'No valid recipe ids given'}), 400
+        if len(recipe_ids) > MAX_BULK_IDS:
+            return jsonify({'error': f'At most {MAX_BULK_IDS} recipes per request'}), 400
+        
+        recipes = recipe_service.get_recipes_bulk(recipe_ids)
+        return jsonify({'recipes': recipes})
+        
+    except Exception as e:
+        logging.error(f"Bulk recipe error: {e}")
+        return jsonify({'error': 'Failed to get recipes'}), 500
+
 @app.route('/api/recipes/<int:recipe_id>', methods=['GET'])
+@_throttled()
 def get_recipe_detail(recipe_id):
     try:
         servings = request.args.get('servings', type=int)
+        prefetcher.record_recipe(recipe_id)
         
         # Get recipe details from API
         recipe_data = recipe_service.get_recipe_details(recipe_id)
@@ -135,7 +323,7 @@ def get_recipe_detail(recipe_id):
             return jsonify({'error': 'Recipe not found'}), 404
         
         # Adjust servings if requested (simplified)
-        if servings and servings != recipe_data.get('servings'):
+        if servings and servings != recipe_data.servings:
             recipe_data = recipe_service.adjust_servings(recipe_data, servings)
         
         return jsonify({'recipe': recipe_data})
@@ -144,45 +332,107 @@ def get_recipe_detail(recipe_id):
         logging.error(f"Recipe detail error: {e}")
         return jsonify({'error': 'Failed to get recipe details'}), 500
 
+@app.route('/api/recipes/<int:recipe_id>/scale', methods=['POST'])
+def scale_recipe(recipe_id):
+    try:
+        data = request.get_json(silent=True) or {}
+        servings = data.get('servings', list(range(1, 13)))
+        if not isinstance(servings, list):
+            servings = [servings]
+        
+        if not servings or len(servings) > MAX_SCALE_SIZES or not all(
+                _valid_servings(s) for s in servings):
+            return jsonify({'error': f'Servings must be up to {MAX_SCALE_SIZES} whole numbers '
+                                     f'between 1 and {MAX_SERVINGS}'}), 400
+        
+        # Scaling only uses the cached recipe; clients fall back to
+        # GET /api/recipes/<id>?servings=N when it is not cached here.
+        result = recipe_service.scale_recipe(recipe_id, servings)
+        if result is None:
+            return jsonify({'error': 'Recipe not loaded'}), 404
+        
+        base_servings, scaled = result
+        return jsonify({
+            'recipe_id': recipe_id,
+            'servings': base_servings,
+            'ingredients': {str(count): ingredients for count, ingredients in scaled.items()}
+        })
+        
+    except Exception as e:
+        logging.error(f"Scale recipe error: {e}")
+        return jsonify({'error': 'Failed to scale recipe'}), 500
+
+@app.route('/api/recipes/pantry', methods=['POST'])
+def rank_by_pantry():
+    try:
+        data = request.get_json(silent=True) or {}
+        ingredients = data.get('ingredients', [])
+        if not isinstance(ingredients, list) or not ingredients or len(ingredients) > MAX_PANTRY_ITEMS:
+            return jsonify({'error': f'Provide between 1 and {MAX_PANTRY_ITEMS} ingredients'}), 400
+        
+        max_results = max(1, min(int(data.get('max_results', 20)), MAX_PAGE_SIZE))
+        max_missing = data.get('max_missing')
+        if max_missing is not None:
+            max_missing = int(max_missing)
+        
+        results = recipe_service.rank_by_pantry([str(i) for i in ingredients], max_results, max_missing)
+        return jsonify({'results': results})
+        
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_results and max_missing must be numbers'}), 400
+    except Exception as e:
+        logging.error(f"Pantry ranking error: {e}")
+        return jsonify({'error': 'Failed to rank recipes'}), 500
+
 @app.route('/api/favorites', methods=['GET'])
 def get_favorites():
-    username = session.get('username')
-    if not username:
+    user_id = session.get('user_id')
+    if not user_id:
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        favorites = user_favorites.get(username, [])
-        return jsonify({'favorites': favorites})
+        after_id, limit = _page_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
+    summary_only = request.args.get('fields') == 'summary'
+    
+    def build_payload():
+        rows = storage.list_favorites(user_id, after_id, None if limit is None else limit + 1)
+        rows, next_cursor = _paginate(rows, limit, lambda row: row[0])
+        favorites = [snapshot for _, snapshot in rows]
+        if summary_only:
+            favorites = [{field: fav.get(field) for field in SUMMARY_FIELDS} for fav in favorites]
+        return {'favorites': favorites, 'next_cursor': next_cursor}
+    
+    try:
+        return _conditional_list_response(user_id, 'favorites', build_payload)
         
     except Exception as e:
         logging.error(f"Get favorites error: {e}")
         return jsonify({'error': 'Failed to get favorites'}), 500
 
 @app.route('/api/favorites', methods=['POST'])
+@_throttled()
 def add_favorite():
-    username = session.get('username')
-    if not username:
+    user_id = session.get('user_id')
+    if not user_id:
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
         data = request.get_json()
         recipe_id = data.get('recipe_id')
         
-        # Get recipe details to store
+        # Check if already favorited before fetching anything upstream
+        if storage.has_favorite(user_id, recipe_id):
+            return jsonify({'error': 'Recipe already in favorites'}), 409
+        
+        # Get recipe details to snapshot
         recipe_data = recipe_service.get_recipe_details(recipe_id)
         if not recipe_data:
             return jsonify({'error': 'Recipe not found'}), 404
         
-        # Initialize user favorites if not exists
-        if username not in user_favorites:
-            user_favorites[username] = []
-        
-        # Check if already favorited
-        existing = any(fav.get('spoonacular_id') == recipe_id for fav in user_favorites[username])
-        if existing:
+        if not storage.add_favorite(user_id, recipe_data.id, recipe_data.to_snapshot()):
             return jsonify({'error': 'Recipe already in favorites'}), 409
-        
-        user_favorites[username].append(recipe_data)
         return jsonify({'message': 'Added to favorites'})
         
     except Exception as e:
@@ -191,20 +441,14 @@ def add_favorite():
 
 @app.route('/api/favorites/<int:recipe_id>', methods=['DELETE'])
 def remove_favorite(recipe_id):
-    username = session.get('username')
-    if not username:
+    user_id = session.get('user_id')
+    if not user_id:
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        if username not in user_favorites:
+        if not storage.remove_favorite(user_id, recipe_id):
             return jsonify({'error': 'Recipe not in favorites'}), 404
         
-        # Remove from favorites
-        user_favorites[username] = [
-            fav for fav in user_favorites[username] 
-            if fav.get('spoonacular_id') != recipe_id
-        ]
-        
         return jsonify({'message': 'Removed from favorites'})
         
     except Exception as e:
@@ -213,25 +457,32 @@ def remove_favorite(recipe_id):
 
 @app.route('/api/history', methods=['GET'])
 def get_search_history():
-    username = session.get('username')
-    if not username:
+    user_id = session.get('user_id')
+    if not user_id:
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        history = search_history.get(username, [])
-        # Add mock created_at for compatibility
+        after_id, limit = _page_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
+    
+    def build_payload():
+        history = storage.list_history(user_id, after_id, None if limit is None else limit + 1)
+        history, next_cursor = _paginate(history, limit, lambda h: h['id'])
         formatted_history = []
-        for i, h in enumerate(history):
+        for h in history:
             formatted_history.append({
-                'id': i,
+                'id': h['id'],
                 'query': h['query'],
                 'cuisine_filter': h['cuisine'],
                 'meal_type_filter': h['meal_type'],
                 'dietary_filter': h['diet'],
-                'created_at': '2025-01-01T00:00:00Z'  # Mock timestamp
+                'created_at': isoformat(h['created_at'])
             })
-        
-        return jsonify({'history': formatted_history})
+        return {'history': formatted_history, 'next_cursor': next_cursor}
+    
+    try:
+        return _conditional_list_response(user_id, 'history', build_payload)
         
     except Exception as e:
         logging.error(f"Get history error: {e}")
@@ -272,49 +523,125 @@ def get_recipe_ratings(recipe_id):
         logging.error(f"Get ratings error: {e}")
         return jsonify({'error': 'Failed to get ratings'}), 500
 
+def _format_shopping_list(shopping_list):
+    return dict(shopping_list, created_at=isoformat(shopping_list['created_at']))
+
+@app.route('/api/shopping-list', methods=['GET'])
+def get_shopping_lists():
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        after_id, limit = _page_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
+    
+    def build_payload():
+        lists = storage.list_shopping_lists(user_id, after_id, None if limit is None else limit + 1)
+        lists, next_cursor = _paginate(lists, limit, lambda l: l['id'])
+        return {'lists': [_format_shopping_list(l) for l in lists], 'next_cursor': next_cursor}
+    
+    try:
+        return _conditional_list_response(user_id, 'shopping_lists', build_payload)
+        
+    except Exception as e:
+        logging.error(f"Get shopping lists error: {e}")
+        return jsonify({'error': 'Failed to get shopping lists'}), 500
+
 @app.route('/api/shopping-list', methods=['POST'])
+@_throttled(5)
 def create_shopping_list():
-    username = session.get('username')
-    if not username:
+    user_id = session.get('user_id')
+    if not user_id:
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         recipe_ids = data.get('recipe_ids', [])
-        list_name = data.get('name', 'My Shopping List')
+        list_name = data.get('name') or 'My Shopping List'
+        servings = data.get('servings', {})
         
-        # For demo purposes, just return success
-        return jsonify({'message': 'Shopping list created', 'list': {'name': list_name}})
+        if not isinstance(recipe_ids, list) or not recipe_ids or len(recipe_ids) > MAX_BULK_IDS:
+            return jsonify({'error': f'Provide between 1 and {MAX_BULK_IDS} recipe ids'}), 400
+        recipe_ids = [int(recipe_id) for recipe_id in recipe_ids]
+        
+        # servings is either one count for every recipe or a {recipe_id: count} map
+        if isinstance(servings, dict):
+            servings = {int(recipe_id): count for recipe_id, count in servings.items()}
+        else:
+            servings = dict.fromkeys(recipe_ids, servings)
+        if not all(_valid_servings(count) for count in servings.values()):
+            return jsonify({'error': f'Servings must be whole numbers between 1 and {MAX_SERVINGS}'}), 400
+        
+        recipes = recipe_service.get_recipes_bulk(recipe_ids)
+        if not recipes:
+            return jsonify({'error': 'Recipes not found'}), 404
+        
+        items = shopping_list.aggregate(recipes, servings)
+        found_ids = [recipe.id for recipe in recipes]
+        missing_ids = set(recipe_ids) - set(found_ids)
+        saved = storage.add_shopping_list(user_id, list_name, found_ids, items)
+        return jsonify({
+            'message': 'Shopping list created',
+            'list': _format_shopping_list(saved),
+            'missing_recipe_ids': [recipe_id for recipe_id in recipe_ids if recipe_id in missing_ids]
+        })
         
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Recipe ids must be numbers'}), 400
     except Exception as e:
         logging.error(f"Create shopping list error: {e}")
         return jsonify({'error': 'Failed to create shopping list'}), 500
 
+@app.route('/img/<int:recipe_id>', methods=['GET'])
+def get_recipe_image(recipe_id):
+    try:
+        data, content_type = image_proxy.get(
+            recipe_id,
+            width=request.args.get('w', DEFAULT_WIDTH, type=int),
+            image_type=request.args.get('t', 'jpg'),
+            accept=request.headers.get('Accept', '')
+        )
+    except ValueError:
+        return jsonify({'error': 'Image not found'}), 404
+    except requests.RequestException as e:
+        logging.error(f"Image proxy error: {e}")
+        return jsonify({'error': 'Failed to fetch image'}), 502
+    
+    response = app.response_class(data, mimetype=content_type)
+    response.set_etag(hashlib.sha1(data).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = image_proxy.max_age
+    response.vary.add('Accept')
+    return response.make_conditional(request)
+
+def _facet_response(key, facet, values):
+    """List a filter's values with how many locally indexed recipes carry each"""
+    counts = recipe_service.index.facet_counts(facet)
+    return jsonify({key: values, 'counts': {value: counts.get(facet_value(value), 0) for value in values}})
+
 @app.route('/api/cuisines', methods=['GET'])
 def get_cuisines():
-    cuisines = [
-        'African', 'American', 'British', 'Cajun', 'Caribbean', 'Chinese',
-        'Eastern European', 'European', 'French', 'German', 'Greek', 'Indian',
-        'Irish', 'Italian', 'Japanese', 'Jewish', 'Korean', 'Latin American',
-        'Mediterranean', 'Mexican', 'Middle Eastern', 'Nordic', 'Southern',
-        'Spanish', 'Thai', 'Vietnamese'
-    ]
-    return jsonify({'cuisines': cuisines})
+    return _facet_response('cuisines', 'cuisine', CUISINES)
 
 @app.route('/api/meal-types', methods=['GET'])
 def get_meal_types():
-    meal_types = [
-        'main course', 'side dish', 'dessert', 'appetizer', 'salad',
-        'bread', 'breakfast', 'soup', 'beverage', 'sauce', 'marinade',
-        'fingerfood', 'snack', 'drink'
-    ]
-    return jsonify({'meal_types': meal_types})
+    return _facet_response('meal_types', 'meal_type', MEAL_TYPES)
 
 @app.route('/api/diets', methods=['GET'])
 def get_diets():
-    diets = [
-        'gluten free', 'ketogenic', 'vegetarian', 'lacto-vegetarian',
-        'ovo-vegetarian', 'vegan', 'pescetarian', 'paleo', 'primal',
-        'whole30'
-    ]
-    return jsonify({'diets': diets})
\ No newline at end of file
+    return _facet_response('diets', 'diet', DIETS)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+# A scrape should not be what builds the service on a fresh instance
+metrics.register_stats(lambda: recipe_service.cache_stats() if recipe_service.loaded else {})
+metrics.register_stats(lambda: {
+    'prefetch': prefetcher.stats(),
+    'image_proxy': image_proxy.stats(),
+    'client_limiter': {'rejected': client_limiter.rejected}
+})
@@ -0,0 +1,142 @@
+import math
+
+from models import Ingredient
+
+# Each unit maps to (family, size in the family's base unit). Volume is
+# measured in millilitres and mass in grams.
+UNITS = {
+    'tsp': ('volume', 4.92892),
+    'tbsp': ('volume', 14.7868),
+    'cup': ('volume', 236.588),
+    'fl oz': ('volume', 29.5735),
+    'ml': ('volume', 1.0),
+    'l': ('volume', 1000.0),
+    'mg': ('mass', 0.001),
+    'g': ('mass', 1.0),
+    'kg': ('mass', 1000.0),
+    'oz': ('mass', 28.3495),
+    'lb': ('mass', 453.592),
+}
+
+UNIT_ALIASES = {
+    'teaspoon': 'tsp', 'teaspoons': 'tsp', 'tsps': 'tsp',
+    'tablespoon': 'tbsp', 'tablespoons': 'tbsp', 'tbsps': 'tbsp', 'tbs': 'tbsp',
+    'cups': 'cup',
+    'fluid ounce': 'fl oz', 'fluid ounces': 'fl oz', 'fl. oz': 'fl oz',
+    'milliliter': 'ml', 'milliliters': 'ml', 'millilitre': 'ml', 'millilitres': 'ml', 'mls': 'ml',
+    'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l',
+    'milligram': 'mg', 'milligrams': 'mg',
+    'gram': 'g', 'grams': 'g', 'gr': 'g',
+    'kilogram': 'kg', 'kilograms': 'kg', 'kgs': 'kg',
+    'ounce': 'oz', 'ounces': 'oz',
+    'pound': 'lb', 'pounds': 'lb', 'lbs': 'lb',
+}
+
+# When a scaled amount leaves [low, high) in its unit it is re-expressed in
+# the neighbouring unit, e.g. 16 tbsp -> 1 cup or 0.5 kg -> 500 g.
+UNIT_RANGES = {
+    'tsp': (0, 3, None, 'tbsp'),
+    'tbsp': (1, 16, 'tsp', 'cup'),
+    'cup': (0.25, math.inf, 'tbsp', None),
+    'ml': (0, 1000, None, 'l'),
+    'l': (1, math.inf, 'ml', None),
+    'mg': (0, 1000, None, 'g'),
+    'g': (1, 1000, 'mg', 'kg'),
+    'kg': (1, math.inf, 'g', None),
+    'oz': (0, 16, None, 'lb'),
+    'lb': (1, math.inf, 'oz', None),
+}
+
+# Relative slack when comparing against UNIT_RANGES, absorbing conversion error
+UNIT_TOLERANCE = 1e-4
+
+# Units measured with spoons and cups are rounded to the nearest eighth.
+EIGHTHS_UNITS = frozenset({'tsp', 'tbsp', 'cup', 'fl oz', 'oz', 'lb'})
+
+
+def normalize_unit(unit):
+    """Map a free-form unit string onto a key of UNITS, or return it unchanged"""
+    key = (unit or '').strip().lower().rstrip('.')
+    key = UNIT_ALIASES.get(key, key)
+    return key if key in UNITS else unit
+
+
+def convert(amount, from_unit, to_unit):
+    """Convert amount between two units of the same family"""
+    from_family, from_size = UNITS[from_unit]
+    to_family, to_size = UNITS[to_unit]
+    if from_family != to_family:
+        raise ValueError(f"Cannot convert {from_unit} to {to_unit}")
+    return amount * from_size / to_size
+
+
+def best_unit(amount, unit):
+    """Re-express amount in the most readable unit of its family.
+
+    Conversions are not exact (3 tsp is 0.999997 tbsp), so thresholds are
+    compared with a small tolerance, and an amount is never converted back
+    to the unit it just left.
+    """
+    previous = None
+    while unit in UNIT_RANGES:
+        low, high, smaller, larger = UNIT_RANGES[unit]
+        if larger and larger != previous and amount >= high * (1 - UNIT_TOLERANCE):
+            previous, amount, unit = unit, convert(amount, unit, larger), larger
+        elif smaller and smaller != previous and 0 < amount < low * (1 - UNIT_TOLERANCE):
+            previous, amount, unit = unit, convert(amount, unit, smaller), smaller
+        else:
+            break
+    return amount, unit
+
+
+def round_amount(amount, unit):
+    """Round to a precision that makes sense in a kitchen"""
+    if unit in EIGHTHS_UNITS and amount < 10:
+        rounded = round(amount * 8) / 8
+        if rounded:
+            return rounded
+    elif unit in ('g', 'ml', 'mg') and amount >= 10:
+        return float(round(amount))
+    return round(amount, 2)
+
+
+def parse_ingredients(ingredients):
+    """Prepare ingredients for repeated scaling.
+
+    Returns tuples of ``(ingredient, amount, unit)`` with the unit already
+    normalized, so scaling does not re-parse anything.
+    """
+    parsed = []
+    for ingredient in ingredients:
+        amount = ingredient.amount
+        unit = normalize_unit(ingredient.unit)
+        parsed.append((ingredient, amount if isinstance(amount, (int, float)) else None, unit))
+    return parsed
+
+
+def scale_ingredients(parsed, multiplier, convert_units=True):
+    """Scale parsed ingredients by multiplier"""
+    return scale_many(parsed, [multiplier], convert_units)[0]
+
+
+def scale_many(parsed, multipliers, convert_units=True):
+    """Scale parsed ingredients by every multiplier in a single pass.
+
+    Returns one ingredient list per multiplier, in the same order.
+    """
+    results = [[] for _ in multipliers]
+    for ingredient, amount, unit in parsed:
+        for index, multiplier in enumerate(multipliers):
+            if amount is None:
+                results[index].append(ingredient)
+                continue
+            new_amount, new_unit = amount * multiplier, unit
+            if convert_units and unit in UNITS:
+                new_amount, new_unit = best_unit(new_amount, unit)
+            results[index].append(Ingredient(
+                name=ingredient.name,
+                amount=round_amount(new_amount, new_unit),
+                unit=new_unit if new_unit != unit else ingredient.unit,
+                original=ingredient.original
+            ))
+    return results
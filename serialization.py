@@ -0,0 +1,55 @@
+import json
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Version 1 clients receive ingredients and nutrition_info as JSON strings.
+LEGACY_API_VERSION = '1'
+
+
+def wants_legacy_shape():
+    """Whether the current request asked for the version 1 response shape"""
+    if not has_request_context():
+        return False
+    version = request.args.get('v') or request.headers.get('X-API-Version')
+    return version == LEGACY_API_VERSION
+
+
+class RecipeJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes model objects once, using orjson when installed"""
+
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if hasattr(o, 'to_dict'):
+            return o.to_dict(legacy=True) if wants_legacy_shape() else o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        with metrics.span('serialize'):
+            return self._dumps(obj, **kwargs)
+
+    def _dumps(self, obj, **kwargs):
+        if orjson is None:
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+
+        option = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,228 @@
+"""Server-side sessions: the cookie carries only a random id, the data lives in a store.
+
+Backends, chosen with SESSION_BACKEND:
+  sqlite   (default) a SQLite file shared by every worker on the host
+  memory   this process only, e.g. for a single development server
+  cookie   Flask's signed cookie sessions, as before
+
+Records are compact JSON keyed by a hash of the session id, so a leaked
+store does not hand out usable cookies. Unchanged sessions are only
+rewritten when their expiry needs extending, so reads cost no writes.
+"""
+import hashlib
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from cache import SQLiteFile
+
+
+class MemorySessionStore:
+    """Session records for this process only"""
+
+    PRUNE_EVERY = 1024
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key):
+        """Return ``(data, expires_at)`` or None if absent or expired"""
+        with self._lock:
+            record = self._data.get(key)
+        if record is None or record[1] <= time.time():
+            return None
+        return json.loads(record[0]), record[1]
+
+    def set(self, key, data, expires_at):
+        with self._lock:
+            self._data[key] = (json.dumps(data, separators=(',', ':')), expires_at)
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                now = time.time()
+                self._data = {k: v for k, v in self._data.items() if v[1] > now}
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self):
+        return {'sessions': len(self._data)}
+
+
+class SQLiteSessionStore:
+    """Session records in a SQLite file that every worker on the host opens.
+
+    If the file cannot be used, sessions behave as if logged out rather than
+    failing the request.
+    """
+
+    PRUNE_EVERY = 1024
+
+    def __init__(self, path):
+        self.path = path
+        self.errors = 0
+        self._db = SQLiteFile(path, self.PRUNE_EVERY, schema=(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL"
+            ") WITHOUT ROWID",
+        ))
+
+    def get(self, key):
+        """Return ``(data, expires_at)`` or None if absent or expired"""
+        try:
+            row = self._db.connection().execute(
+                "SELECT data, expires_at FROM sessions WHERE id = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.error(f"Session store error: {e}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, data, expires_at):
+        try:
+            conn = self._db.connection()
+            conn.execute("INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                         (key, json.dumps(data, separators=(',', ':')), expires_at))
+            if self._db.prune_due():
+                conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.error(f"Session store error: {e}")
+
+    def delete(self, key):
+        try:
+            self._db.connection().execute("DELETE FROM sessions WHERE id = ?", (key,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logging.error(f"Session store error: {e}")
+
+    def stats(self):
+        try:
+            count = self._db.connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        except sqlite3.Error:
+            count = None
+        return {'sessions': count, 'errors': self.errors}
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session data loaded from a store, tracking reads and writes like Flask's own"""
+
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.initial_user_id = self.get('user_id')
+        self.modified = False
+        self.accessed = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in a store; the cookie holds a random session id.
+
+    Only ``request.cookies`` is read, so asgi.py can open sessions from a
+    bare cookie mapping.
+    """
+
+    session_class = ServerSession
+
+    def __init__(self, store, refresh_interval=3600):
+        self.store = store
+        self.refresh_interval = refresh_interval
+
+    @staticmethod
+    def _key(sid):
+        return hashlib.blake2b(sid.encode(), digest_size=16).hexdigest()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            record = self.store.get(self._key(sid))
+            if record is not None:
+                return self.session_class(record[0], sid=sid, expires_at=record[1])
+        return self.session_class()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            # Emptied (e.g. by logout): forget the record and the cookie
+            if session.modified and session.sid:
+                self.store.delete(self._key(session.sid))
+                response.delete_cookie(name, domain=domain, path=path, secure=secure, samesite=samesite,
+                                       httponly=httponly)
+            return
+
+        now = time.time()
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        refresh_due = session.expires_at is None or session.expires_at - now < lifetime - self.refresh_interval
+        if not (session.modified or refresh_due):
+            return
+
+        sid = session.sid
+        if sid is None or session.get('user_id') != session.initial_user_id:
+            # A new id whenever the user changes, so a planted session id is never logged in
+            if sid:
+                self.store.delete(self._key(sid))
+            sid = secrets.token_urlsafe(32)
+        self.store.set(self._key(sid), dict(session), now + lifetime)
+        response.set_cookie(name, sid, expires=self.get_expiration_time(app, session), httponly=httponly,
+                            domain=domain, path=path, secure=secure, samesite=samesite)
+
+
+def _create_store(backend):
+    if backend == "memory":
+        return MemorySessionStore()
+    return SQLiteSessionStore(os.environ.get("SESSION_DB", "sessions.db"))
+
+
+def init_app(app):
+    """Install the session backend named by SESSION_BACKEND"""
+    backend = os.environ.get("SESSION_BACKEND", "sqlite").lower()
+    if backend == "cookie":
+        if not os.environ.get("SESSION_SECRET"):
+            logging.warning("Cookie sessions are signed with a development key; set SESSION_SECRET")
+        return None
+    if os.environ.get("SESSION_LIFETIME"):
+        app.permanent_session_lifetime = timedelta(seconds=float(os.environ["SESSION_LIFETIME"]))
+    app.session_interface = ServerSideSessionInterface(
+        _create_store(backend),
+        refresh_interval=float(os.environ.get("SESSION_REFRESH_INTERVAL", 3600))
+    )
+    return app.session_interface.store
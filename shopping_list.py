@@ -0,0 +1,48 @@
+import scaling
+from pantry import normalize_ingredient_name
+
+
+def aggregate(recipes, servings=None):
+    """Merge the ingredients of several recipes into one shopping list.
+
+    recipes are Recipe objects; servings maps recipe id -> servings wanted
+    (recipes not listed keep their own serving size). Ingredients are merged
+    by normalized name; amounts in compatible units (g/kg/oz/lb,
+    tsp/tbsp/cup/ml/l) are converted to a common base unit before summing,
+    and incompatible units stay on separate lines. Runs in time linear in
+    the total number of ingredients.
+    """
+    servings = servings or {}
+    lines = {}
+    for recipe in recipes:
+        # Same multiplier as RecipeService.adjust_servings
+        multiplier = servings.get(recipe.id, recipe.servings or 1) / (recipe.servings or 1)
+        for ingredient, amount, unit in scaling.parse_ingredients(recipe.ingredients):
+            name = normalize_ingredient_name(ingredient.name) or ingredient.name.strip().lower()
+            amount = (amount or 0) * multiplier
+
+            if unit in scaling.UNITS:
+                family, size = scaling.UNITS[unit]
+                key = (name, family)
+                amount *= size
+            else:
+                key = (name, unit)
+
+            line = lines.get(key)
+            if line is None:
+                # The first unit seen for a line is the one it is displayed in
+                line = lines[key] = {'name': name, 'amount': 0, 'unit': unit, 'recipe_ids': []}
+            line['amount'] += amount
+            if not line['recipe_ids'] or line['recipe_ids'][-1] != recipe.id:
+                line['recipe_ids'].append(recipe.id)
+
+    items = []
+    for line in lines.values():
+        amount, unit = line['amount'], line['unit']
+        if unit in scaling.UNITS:
+            amount, unit = scaling.best_unit(amount / scaling.UNITS[unit][1], unit)
+        line['amount'] = scaling.round_amount(amount, unit)
+        line['unit'] = unit
+        items.append(line)
+    items.sort(key=lambda item: (item['name'], item['unit']))
+    return items
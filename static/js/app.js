@@ -1,5 +1,5 @@
 // Main App Component
-const { useState, useEffect } = React;
+const { useState, useEffect, useRef } = React;
 
 function App() {
     // State management
@@ -20,6 +20,8 @@ function App() {
         diet: '',
         max_results: 12
     });
+    // The streamed search in progress, aborted when a newer search starts
+    const searchController = useRef(null);
 
     // Initialize app
     useEffect(() => {
@@ -88,14 +90,27 @@ function App() {
 
     // Recipe functions
     const performSearch = async (filters = searchFilters) => {
+        if (searchController.current) {
+            searchController.current.abort();
+        }
+        const controller = new AbortController();
+        searchController.current = controller;
+
         setIsLoading(true);
+        setRecipes([]);
         try {
-            const response = await apiService.searchRecipes(filters);
-            setRecipes(response.recipes || []);
-            if (response.recipes?.length === 0) {
+            // Cards render as results stream in; cached ones arrive first
+            const count = await apiService.streamSearchRecipes(filters, (recipe) => {
+                if (controller.signal.aborted) return;
+                setIsLoading(false);
+                setRecipes(prev => [...prev, recipe]);
+            }, controller.signal);
+            if (count === 0 && !controller.signal.aborted) {
                 helpers.showToast('No recipes found. Try adjusting your search criteria.', 'info');
             }
         } catch (error) {
+            // Superseded by a newer search, which now owns the results and loading state
+            if (controller.signal.aborted) return;
             console.error('Search error:', error);
             
             // Handle API quota exceeded gracefully
@@ -107,7 +122,10 @@ function App() {
                 setRecipes([]);
             }
         } finally {
-            setIsLoading(false);
+            if (searchController.current === controller) {
+                searchController.current = null;
+                setIsLoading(false);
+            }
         }
     };
 
@@ -25,7 +25,8 @@ function RecipeCard({ recipe, onViewDetails, onToggleFavorite, isFavorited = fal
         if (imageError || !recipe.image_url) {
             return helpers.getPlaceholderImage();
         }
-        return recipe.image_url;
+        // Cards are at most ~400px wide, so fetch the 480px variant rather than full size
+        return helpers.sizedImageUrl(recipe.image_url, 480);
     };
 
     return (
@@ -11,6 +11,7 @@ function RecipeDetail({ recipe, isOpen, onClose, currentUser }) {
     const [showIngredients, setShowIngredients] = useState(true);
     const [showInstructions, setShowInstructions] = useState(false);
     const [showNutrition, setShowNutrition] = useState(false);
+    const [scaledIngredients, setScaledIngredients] = useState(null);
 
     useEffect(() => {
         if (isOpen && recipe) {
@@ -25,6 +26,7 @@ function RecipeDetail({ recipe, isOpen, onClose, currentUser }) {
         try {
             const response = await apiService.getRecipeDetail(recipe.spoonacular_id || recipe.id, servings);
             setDetailedRecipe(response.recipe);
+            loadScaledIngredients();
         } catch (error) {
             console.error('Error loading recipe details:', error);
             helpers.showToast('Error loading recipe details', 'danger');
@@ -33,6 +35,17 @@ function RecipeDetail({ recipe, isOpen, onClose, currentUser }) {
         }
     };
 
+    // Precompute every serving size the stepper allows in one request
+    const loadScaledIngredients = async () => {
+        try {
+            const servingOptions = Array.from({ length: 12 }, (_, i) => i + 1);
+            const response = await apiService.scaleRecipe(recipe.spoonacular_id || recipe.id, servingOptions);
+            setScaledIngredients(response.ingredients);
+        } catch (error) {
+            setScaledIngredients(null);
+        }
+    };
+
     const loadRatings = async () => {
         try {
             const response = await apiService.getRecipeRatings(recipe.spoonacular_id || recipe.id);
@@ -46,6 +59,16 @@ function RecipeDetail({ recipe, isOpen, onClose, currentUser }) {
         if (newServings < 1 || newServings > 12) return;
         
         setServings(newServings);
+
+        if (scaledIngredients && scaledIngredients[newServings] && detailedRecipe) {
+            setDetailedRecipe({
+                ...detailedRecipe,
+                servings: newServings,
+                ingredients: scaledIngredients[newServings]
+            });
+            return;
+        }
+
         setIsLoading(true);
         
         try {
@@ -123,7 +146,7 @@ function RecipeDetail({ recipe, isOpen, onClose, currentUser }) {
                                 {/* Recipe Image */}
                                 {currentRecipe.image_url && (
                                     <img 
-                                        src={currentRecipe.image_url} 
+                                        src={helpers.sizedImageUrl(currentRecipe.image_url, 636)} 
                                         alt={currentRecipe.title}
                                         className="recipe-detail-image mb-3"
                                     />
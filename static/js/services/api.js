@@ -61,6 +61,44 @@ class ApiService {
         }
     }
 
+    // Stream search results as NDJSON, calling onRecipe as each one arrives;
+    // aborting signal cancels the request and rejects with an AbortError
+    async streamSearchRecipes(params = {}, onRecipe, signal) {
+        const query = new URLSearchParams(
+            Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== '')
+        );
+        const response = await fetch(`${this.baseURL}/recipes/search/stream?${query}`, {
+            credentials: 'include',
+            headers: { 'Accept': 'application/x-ndjson' },
+            signal
+        });
+        if (!response.ok || !response.body) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || 'Server error occurred');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        let count = 0;
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const message = JSON.parse(line);
+                if (message.recipe) {
+                    count += 1;
+                    onRecipe(message.recipe);
+                }
+            }
+        }
+        return count;
+    }
+
     async getRecipeDetail(recipeId, servings = null) {
         try {
             const params = servings ? { servings } : {};
@@ -71,6 +109,38 @@ class ApiService {
         }
     }
 
+    async scaleRecipe(recipeId, servings) {
+        try {
+            const response = await this.axios.post(`/recipes/${recipeId}/scale`, { servings });
+            return response.data;
+        } catch (error) {
+            throw this.handleError(error);
+        }
+    }
+
+    async rankByPantry(ingredients, maxResults = 20) {
+        try {
+            const response = await this.axios.post('/recipes/pantry', {
+                ingredients,
+                max_results: maxResults
+            });
+            return response.data;
+        } catch (error) {
+            throw this.handleError(error);
+        }
+    }
+
+    async getRecipesBulk(recipeIds) {
+        try {
+            const response = await this.axios.get('/recipes/bulk', {
+                params: { ids: recipeIds.join(',') }
+            });
+            return response.data;
+        } catch (error) {
+            throw this.handleError(error);
+        }
+    }
+
     // Favorites endpoints
     async getFavorites() {
         try {
@@ -78,6 +78,16 @@ const helpers = {
         return 'https://pixabay.com/get/g71f4df243ba4e4f8e88ba0565dd43bc6d5c3fdd988d2cbe5e690569764c45fc720c01da85976fbebbaf5dbc798cc1c5195b3db731811604b0ce1295fdd78647a_1280.jpg';
     },
 
+    // Ask the /img/ proxy for an image at the given width; other URLs are returned as-is
+    sizedImageUrl(url, width) {
+        if (!url || !url.startsWith('/img/')) {
+            return url;
+        }
+        const sized = new URL(url, window.location.origin);
+        sized.searchParams.set('w', width);
+        return sized.pathname + sized.search;
+    },
+
     // Validate email format
     isValidEmail(email) {
         const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
@@ -0,0 +1,314 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import (Column, Float, ForeignKey, Index, Integer, MetaData, PrimaryKeyConstraint, String,
+                        Table, Text, UniqueConstraint, create_engine, delete, event, func, insert, select, update)
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import check_password_hash, generate_password_hash
+
+metadata = MetaData()
+
+users = Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(80), nullable=False, unique=True),
+    Column('email', String(255), nullable=False),
+    Column('password_hash', String(255), nullable=False),
+    Column('created_at', Float, nullable=False)
+)
+
+favorites = Table(
+    'favorites', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('recipe_id', Integer, nullable=False),
+    Column('snapshot', Text, nullable=False),
+    Column('created_at', Float, nullable=False),
+    UniqueConstraint('user_id', 'recipe_id', name='uq_favorites_user_recipe')
+)
+
+search_history = Table(
+    'search_history', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('query', String(255), nullable=False),
+    Column('cuisine', String(80), nullable=False, default=''),
+    Column('meal_type', String(80), nullable=False, default=''),
+    Column('diet', String(80), nullable=False, default=''),
+    Column('created_at', Float, nullable=False),
+    Index('ix_search_history_user_id_id', 'user_id', 'id')
+)
+
+shopping_lists = Table(
+    'shopping_lists', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('name', String(255), nullable=False),
+    Column('recipe_ids', Text, nullable=False),
+    Column('items', Text, nullable=False),
+    Column('created_at', Float, nullable=False),
+    Index('ix_shopping_lists_user_id_id', 'user_id', 'id')
+)
+
+# When each user's lists last changed, for Last-Modified and ETags
+list_versions = Table(
+    'list_versions', metadata,
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('list_name', String(40), nullable=False),
+    Column('updated_at', Float, nullable=False),
+    PrimaryKeyConstraint('user_id', 'list_name')
+)
+
+
+def isoformat(timestamp):
+    """Format an epoch timestamp the way the API returns dates"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers in other gunicorn workers proceed while one writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+class Storage:
+    """Users, favorites, search history and shopping lists, shared by every worker process"""
+
+    def __init__(self, database_url, history_limit=20):
+        self.history_limit = history_limit
+        if database_url.startswith('sqlite'):
+            self._engine = create_engine(
+                database_url,
+                connect_args={'check_same_thread': False, 'timeout': 15},
+                pool_size=int(os.environ.get("DATABASE_POOL_SIZE", 5)),
+                pool_pre_ping=True
+            )
+            event.listen(self._engine, 'connect', _configure_sqlite)
+        else:
+            self._engine = create_engine(
+                database_url,
+                pool_size=int(os.environ.get("DATABASE_POOL_SIZE", 5)),
+                pool_recycle=300,
+                pool_pre_ping=True
+            )
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        """The engine, creating any missing tables on first use rather than at import"""
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    metadata.create_all(self._engine)
+                    self._schema_ready = True
+        return self._engine
+
+    def _touch(self, conn, user_id, list_name, now):
+        """Record that one of the user's lists changed at now"""
+        result = conn.execute(
+            update(list_versions)
+            .where(list_versions.c.user_id == user_id, list_versions.c.list_name == list_name)
+            .values(updated_at=now)
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(list_versions).values(user_id=user_id, list_name=list_name, updated_at=now))
+
+    def list_updated_at(self, user_id, list_name):
+        """Return when the user's list last changed, or None if it never has"""
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(list_versions.c.updated_at)
+                .where(list_versions.c.user_id == user_id, list_versions.c.list_name == list_name)
+            ).scalar()
+
+    # Users
+
+    def create_user(self, username, email, password):
+        """Create a user, returning None if the username is taken"""
+        try:
+            with self.engine.begin() as conn:
+                result = conn.execute(insert(users).values(
+                    username=username,
+                    email=email,
+                    password_hash=generate_password_hash(password),
+                    created_at=time.time()
+                ))
+        except IntegrityError:
+            return None
+        return {'id': result.inserted_primary_key[0], 'username': username, 'email': email}
+
+    def get_user(self, username):
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(users.c.id, users.c.username, users.c.email).where(users.c.username == username)
+            ).first()
+        return dict(row._mapping) if row else None
+
+    def authenticate(self, username, password):
+        """Return the user if the password matches, otherwise None"""
+        with self.engine.connect() as conn:
+            row = conn.execute(select(users).where(users.c.username == username)).first()
+        if row is None or not check_password_hash(row.password_hash, password):
+            return None
+        return {'id': row.id, 'username': row.username, 'email': row.email}
+
+    # Favorites
+
+    def add_favorite(self, user_id, recipe_id, snapshot):
+        """Store a favorite, returning False if it already exists"""
+        now = time.time()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(favorites).values(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    snapshot=json.dumps(snapshot),
+                    created_at=now
+                ))
+                self._touch(conn, user_id, 'favorites', now)
+        except IntegrityError:
+            return False
+        return True
+
+    def has_favorite(self, user_id, recipe_id):
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(favorites.c.id).where(favorites.c.user_id == user_id,
+                                             favorites.c.recipe_id == recipe_id)
+            ).first() is not None
+
+    def remove_favorite(self, user_id, recipe_id):
+        """Delete a favorite, returning False if it did not exist"""
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                delete(favorites).where(favorites.c.user_id == user_id,
+                                        favorites.c.recipe_id == recipe_id)
+            )
+            if result.rowcount > 0:
+                self._touch(conn, user_id, 'favorites', time.time())
+        return result.rowcount > 0
+
+    def list_favorites(self, user_id, after_id=0, limit=None):
+        """Return ``(row_id, snapshot)`` pairs for the user's favorites, oldest first.
+
+        after_id and limit page through the list by row id.
+        """
+        query = (select(favorites.c.id, favorites.c.snapshot)
+                 .where(favorites.c.user_id == user_id, favorites.c.id > after_id)
+                 .order_by(favorites.c.id))
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            return [(row.id, json.loads(row.snapshot)) for row in conn.execute(query)]
+
+    # Search history
+
+    def add_search(self, user_id, query, cuisine='', meal_type='', diet=''):
+        """Record a search, keeping only the newest history_limit entries"""
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(insert(search_history).values(
+                user_id=user_id,
+                query=query,
+                cuisine=cuisine,
+                meal_type=meal_type,
+                diet=diet,
+                created_at=now
+            ))
+            self._touch(conn, user_id, 'history', now)
+            oldest_kept = conn.execute(
+                select(search_history.c.id)
+                .where(search_history.c.user_id == user_id)
+                .order_by(search_history.c.id.desc())
+                .offset(self.history_limit - 1)
+                .limit(1)
+            ).scalar()
+            if oldest_kept is not None:
+                conn.execute(delete(search_history).where(search_history.c.user_id == user_id,
+                                                          search_history.c.id < oldest_kept))
+
+    def list_history(self, user_id, after_id=0, limit=None):
+        """Return the user's searches, oldest first, paged by row id"""
+        query = (select(search_history)
+                 .where(search_history.c.user_id == user_id, search_history.c.id > after_id)
+                 .order_by(search_history.c.id))
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def popular_searches(self, limit=20):
+        """Return the most repeated ``(query, cuisine, meal_type, diet)`` searches across all users"""
+        parts = [func.lower(func.trim(column)) for column in (
+            search_history.c.query, search_history.c.cuisine, search_history.c.meal_type, search_history.c.diet
+        )]
+        query = (select(*parts, func.count().label('searches'))
+                 .group_by(*parts)
+                 .order_by(func.count().desc())
+                 .limit(limit))
+        with self.engine.connect() as conn:
+            return [tuple(row[:4]) for row in conn.execute(query)]
+
+    # Shopping lists
+
+    def add_shopping_list(self, user_id, name, recipe_ids, items):
+        """Store an aggregated shopping list and return it"""
+        now = time.time()
+        with self.engine.begin() as conn:
+            result = conn.execute(insert(shopping_lists).values(
+                user_id=user_id,
+                name=name,
+                recipe_ids=json.dumps(recipe_ids),
+                items=json.dumps(items),
+                created_at=now
+            ))
+            self._touch(conn, user_id, 'shopping_lists', now)
+        return {'id': result.inserted_primary_key[0], 'name': name, 'recipe_ids': recipe_ids,
+                'items': items, 'created_at': now}
+
+    def list_shopping_lists(self, user_id, after_id=0, limit=None):
+        """Return the user's shopping lists, oldest first, paged by row id"""
+        query = (select(shopping_lists)
+                 .where(shopping_lists.c.user_id == user_id, shopping_lists.c.id > after_id)
+                 .order_by(shopping_lists.c.id))
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            return [{
+                'id': row.id,
+                'name': row.name,
+                'recipe_ids': json.loads(row.recipe_ids),
+                'items': json.loads(row.items),
+                'created_at': row.created_at
+            } for row in conn.execute(query)]
+
+
+def database_url_from_env():
+    """DATABASE_URL, defaulting to a local SQLite file.
+
+    Replit's database integration provides a Postgres URL; it is pinned to
+    the declared psycopg2 driver, and the legacy ``postgres://`` scheme is
+    accepted too.
+    """
+    database_url = os.environ.get("DATABASE_URL") or "sqlite:///mealbuddy.db"
+    for scheme in ("postgres://", "postgresql://"):
+        if database_url.startswith(scheme):
+            return "postgresql+psycopg2://" + database_url[len(scheme):]
+    return database_url
+
+
+def _create_storage():
+    database_url = database_url_from_env()
+    logging.info(f"Using database {database_url.split('@')[-1]}")
+    return Storage(database_url)
+
+
+storage = _create_storage()
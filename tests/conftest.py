@@ -0,0 +1,42 @@
+"""Shared fixtures: tests talk to a local fake Spoonacular, never the real API"""
+import os
+import tempfile
+
+import pytest
+
+# Module-level singletons read their configuration at import time, so keep
+# their files out of the working tree and spend no real quota
+_WORKDIR = tempfile.mkdtemp(prefix='mealbuddy-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_WORKDIR, 'test.db')}",
+    'RATE_LIMIT_DB': '',
+    'SESSION_BACKEND': 'memory',
+    'IMAGE_CACHE_DIR': os.path.join(_WORKDIR, 'images'),
+    'SPOONACULAR_DAILY_POINTS': '1000000000',
+    'PREFETCH_RPM': '0',
+    'CLIENT_RATE_LIMIT': '0',
+})
+
+from benchmarks.fake_spoonacular import start_fake_server  # noqa: E402
+
+
+@pytest.fixture
+def fake_spoonacular():
+    server = start_fake_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_service(fake_spoonacular, monkeypatch):
+    """Build a RecipeService pointed at the fake server, with extra env overrides"""
+    from recipe_service import RecipeService
+
+    def factory(**env):
+        monkeypatch.setenv('SPOONACULAR_BASE_URL', fake_spoonacular.base_url)
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return RecipeService()
+
+    return factory
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+pytest.importorskip('a2wsgi', reason='needs the async extra')
+
+import asgi  # noqa: E402
+from async_recipe_service import AsyncRecipeService  # noqa: E402
+from ratelimit import ClientLimiter, TokenBucketStore  # noqa: E402
+
+
+@pytest.fixture
+def async_service(make_service, monkeypatch):
+    service = AsyncRecipeService(make_service(), max_concurrency=4)
+    monkeypatch.setattr(asgi, 'async_recipe_service', service)
+    return service
+
+
+def get(path, **kwargs):
+    async def request():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi.app), base_url='http://test') as client:
+            return await client.get(path, **kwargs)
+
+    return asyncio.run(request())
+
+
+def test_streamed_search_is_served_natively(fake_spoonacular, async_service, monkeypatch):
+    monkeypatch.setattr(asgi, 'wsgi_app', None)  # any fallthrough to Flask would fail
+
+    response = get('/api/recipes/search/stream', params={'query': 'pasta', 'max_results': 4})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    messages = [json.loads(line) for line in response.text.splitlines()]
+    assert [message['source'] for message in messages[:-1]] == ['remote'] * 4
+    assert messages[-1] == {'done': True, 'count': 4}
+    assert fake_spoonacular.calls['complexSearch'] == 1
+
+
+def test_streamed_search_replays_cached_page_as_sse(fake_spoonacular, async_service):
+    get('/api/recipes/search/stream', params={'query': 'pasta', 'max_results': 4})
+
+    response = get('/api/recipes/search/stream', params={'query': 'pasta', 'max_results': 4},
+                   headers={'Accept': 'text/event-stream'})
+
+    assert response.headers['content-type'] == 'text/event-stream'
+    events = [block.split('\n')[0] for block in response.text.strip().split('\n\n')]
+    assert events == ['event: recipe'] * 4 + ['event: done']
+    assert fake_spoonacular.calls['complexSearch'] == 1
+
+
+def test_streamed_search_rejects_bad_arguments(async_service):
+    response = get('/api/recipes/search/stream', params={'source': 'elsewhere'})
+
+    assert response.status_code == 400
+
+
+def test_native_routes_key_clients_like_flask():
+    scope = {'path': '/api/recipes/search', 'query_string': b'', 'client': ('10.0.0.2', 5000),
+             'headers': [(b'x-forwarded-for', b'198.51.100.7, 203.0.113.9')]}
+
+    assert asgi._Request(scope).client == '203.0.113.9'
+    assert asgi._Request({**scope, 'headers': []}).client == '10.0.0.2'
+
+
+def test_client_limit_is_checked_off_the_event_loop(async_service, monkeypatch):
+    threads = []
+
+    class RecordingStore(TokenBucketStore):
+        def take(self, *args):
+            threads.append(threading.current_thread())
+            return super().take(*args)
+
+    monkeypatch.setattr(asgi, 'client_limiter', ClientLimiter(RecordingStore(), per_minute=1, burst=1))
+
+    assert get('/api/recipes/search', params={'source': 'local'}).status_code == 200
+    response = get('/api/recipes/search', params={'source': 'local'})
+
+    assert response.status_code == 429
+    assert response.headers['retry-after']
+    assert threads and threading.main_thread() not in threads
+
+
+def test_native_search_rejects_negative_max_results(async_service):
+    response = get('/api/recipes/search', params={'max_results': -3})
+
+    assert response.status_code == 400
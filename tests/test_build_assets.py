@@ -0,0 +1,32 @@
+import gzip
+import json
+import shlex
+import sys
+
+import build_assets
+
+
+def test_concatenate_declares_shared_hooks_once():
+    source = build_assets.concatenate(build_assets.SCRIPTS)
+
+    assert source.count('= React;') == 1
+    assert source.startswith('(() => {\nconst { ') and source.endswith('})();\n')
+    for path in build_assets.SCRIPTS:
+        assert f"// {path}\n" in source
+
+
+def test_build_writes_fingerprinted_files_and_manifest(tmp_path, monkeypatch):
+    # Stands in for esbuild: copies stdin to stdout
+    copy = 'import shutil, sys; shutil.copyfileobj(sys.stdin, sys.stdout)'
+    monkeypatch.setenv('ESBUILD', f"{shlex.quote(sys.executable)} -c {shlex.quote(copy)}")
+    monkeypatch.setattr(build_assets, 'DIST_DIR', str(tmp_path / 'dist'))
+    monkeypatch.setattr(build_assets, 'MANIFEST_PATH', str(tmp_path / 'dist' / 'manifest.json'))
+
+    manifest = build_assets.build()
+
+    assert json.loads((tmp_path / 'dist' / 'manifest.json').read_text()) == manifest
+    assert set(manifest) == {'js/bundle.js', 'css/style.css'}
+    assert manifest['js/bundle.js'].startswith('bundle.')
+    bundle = tmp_path / 'dist' / manifest['js/bundle.js']
+    compressed = bundle.with_name(bundle.name + '.gz')
+    assert gzip.decompress(compressed.read_bytes()) == bundle.read_bytes()
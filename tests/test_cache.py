@@ -0,0 +1,187 @@
+import threading
+import time
+
+from cache import SingleFlight, SQLiteFile, TieredCache, TTLCache
+from ratelimit import TokenBucketStore
+from sessions import SQLiteSessionStore
+
+
+def test_stream_followers_replay_the_leaders_items():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def produce():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        yield from [1, 2, 3]
+
+    follower_items = []
+    leader = threading.Thread(target=lambda: list(flights.stream('key', produce)))
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=lambda: follower_items.extend(flights.stream('key', produce)))
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert follower_items == [1, 2, 3]
+    assert len(calls) == 1
+    assert flights.stats() == {'executions': 1, 'coalesced': 1}
+
+
+def test_stream_followers_run_fn_when_the_leader_stops_early():
+    flights = SingleFlight()
+    leader = flights.stream('key', lambda: iter([1, 2, 3]))
+    assert next(leader) == 1
+
+    follower_items = []
+    follower = threading.Thread(target=lambda: follower_items.extend(flights.stream('key', lambda: iter([4, 5]))))
+    follower.start()
+    time.sleep(0.05)
+    leader.close()
+    follower.join()
+
+    assert follower_items == [4, 5]
+
+
+def test_sqlite_file_opens_one_wal_connection_per_thread(tmp_path):
+    db = SQLiteFile(str(tmp_path / 'nested' / 'shared.db'), prune_every=3)
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(db.connection()))
+    thread.start()
+    thread.join()
+
+    assert db.connection() is db.connection()
+    assert connections[0] is not db.connection()
+    assert db.connection().execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert [db.prune_due() for _ in range(6)] == [False, False, True, False, False, True]
+
+
+def test_sqlite_stores_share_the_file_helper(tmp_path):
+    sessions = SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    sessions.set('key', {'user_id': 1}, time.time() + 60)
+    buckets = TokenBucketStore(str(tmp_path / 'ratelimit.db'))
+
+    assert sessions.get('key')[0] == {'user_id': 1}
+    assert buckets.take('client', 1, rate=1, capacity=1) == (True, 0)
+    assert buckets.take('client', 1, rate=1, capacity=1)[0] is False
+
+
+def test_restore_skips_keys_cached_since_startup_but_replaces_dead_ones():
+    local = TTLCache(ttl=60, stale_ttl=30)
+    now = time.time()
+    local.set('fresh', 'new')
+    local.set('dead', 'gone', expires_at=now - 60)  # past its stale window
+    tiered = TieredCache(local)
+
+    restored = tiered.restore([['fresh', 'old', now + 60], ['dead', 'snapshot', now + 60]])
+
+    assert restored == 1
+    assert local.get('fresh') == 'new'
+    assert local.get('dead') == 'snapshot'
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_ttl_cache_evicts_the_least_recently_used_entry():
+    cache = TTLCache(maxsize=2, clock=FakeClock())
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_serves_stale_entries_until_the_stale_window_ends():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, stale_ttl=5, clock=clock)
+    cache.set('key', 'value')
+
+    assert cache.get_entry('key') == ('value', True, 1010.0)
+    clock.now = 1012
+    assert cache.get_entry('key') == ('value', False, 1010.0)
+    assert cache.get('key') is None  # get() only returns fresh values
+    clock.now = 1015
+    assert cache.get_entry('key') is None
+    assert len(cache) == 0
+    assert {k: cache.stats()[k] for k in ('hits', 'misses', 'stale_hits')} == \
+        {'hits': 1, 'misses': 1, 'stale_hits': 2}
+
+
+def test_tiered_cache_loads_once_then_serves_from_memory():
+    cache = TieredCache(TTLCache(ttl=10, clock=FakeClock()))
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get_or_load('key', loader) == 'value'
+    assert cache.get_or_load('key', loader) == 'value'
+    assert calls == [1] and cache.loads == 1
+    assert cache.get_or_load('none', lambda: None) is None
+    assert 'none' not in cache.local
+
+
+def test_tiered_cache_returns_stale_value_and_refreshes_in_background():
+    clock = FakeClock()
+    cache = TieredCache(TTLCache(ttl=10, stale_ttl=60, clock=clock))
+    cache.set('key', 'old')
+    clock.now += 20
+    release = threading.Event()
+
+    def slow_loader():
+        release.wait(2)
+        return 'new'
+
+    assert cache.get_or_load('key', slow_loader) == 'old'  # did not wait for the loader
+    assert cache.get_or_load('key', slow_loader) == 'old'  # one refresh in flight per key
+    release.set()
+    wait_for(lambda: cache.refreshes == 1)
+    assert cache.get('key') == 'new'
+    assert cache.stats()['refreshes'] == 1 and cache.loads == 0
+
+
+def test_tiered_cache_counts_failed_refreshes_and_keeps_serving_stale():
+    clock = FakeClock()
+    cache = TieredCache(TTLCache(ttl=10, stale_ttl=60, clock=clock))
+    cache.set('key', 'old')
+    clock.now += 20
+
+    def failing_loader():
+        raise RuntimeError('upstream down')
+
+    assert cache.get_or_load('key', failing_loader) == 'old'
+    wait_for(lambda: cache.refresh_failures == 1)
+    assert cache.get_stale('key') == 'old'
+
+
+def test_tiered_cache_promotes_shared_hits_with_their_expiry():
+    clock = FakeClock()
+    shared = TTLCache(ttl=10, clock=clock)
+    writer = TieredCache(TTLCache(ttl=10, clock=clock), shared)
+    reader = TieredCache(TTLCache(ttl=10, clock=clock), shared)
+    writer.set('key', 'value')
+
+    assert reader.get('key') == 'value'
+    assert reader.local.get_entry('key') == ('value', True, 1010.0)
+    reader.delete('key')
+    assert writer.local.get('key') == 'value' and shared.get('key') is None
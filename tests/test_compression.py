@@ -0,0 +1,110 @@
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, Response, jsonify
+
+import compression
+
+BIG = {'recipes': ['pasta'] * (compression.MIN_SIZE // 4)}
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    compression.init_app(app)
+    app.add_url_rule('/big', 'big', lambda: jsonify(BIG))
+    app.add_url_rule('/small', 'small', lambda: jsonify({'ok': True}))
+    app.add_url_rule('/etag', 'etag', lambda: Response('x' * compression.MIN_SIZE, mimetype='text/plain',
+                                                       headers={'ETag': '"v1"'}))
+    app.add_url_rule('/stream', 'stream', lambda: Response(iter(['x' * compression.MIN_SIZE]),
+                                                           mimetype='application/json'))
+    app.add_url_rule('/png', 'png', lambda: Response(b'x' * compression.MIN_SIZE, mimetype='image/png'))
+    return app.test_client()
+
+
+@pytest.fixture
+def fake_brotli(monkeypatch):
+    """Stand in for the optional brotli package"""
+    module = SimpleNamespace(compress=lambda data, quality: b'br:' + data)
+    monkeypatch.setattr(compression, 'brotli', module)
+    return module
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, set()),
+    ('gzip', {'gzip'}),
+    ('gzip, deflate, br', {'gzip', 'deflate', 'br'}),
+    ('gzip,, ', {'gzip'}),
+    ('GZIP;q=0.5, br; q=0', {'gzip'}),
+    ('gzip;q=0.000, identity', {'identity'}),
+])
+def test_accepted_encodings(header, expected):
+    assert compression.accepted_encodings(header) == expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, br', 'br'),
+    ('br;q=0, gzip', 'gzip'),
+    ('br', 'br'),
+    ('deflate', None),
+    ('', None),
+])
+def test_negotiate_prefers_brotli_when_installed(fake_brotli, header, expected):
+    assert compression.negotiate(header) == expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, br', 'gzip'),
+    ('br', None),
+])
+def test_negotiate_falls_back_to_gzip_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert compression.negotiate(header) == expected
+
+
+def test_large_json_is_gzipped(client, monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert response.headers['Content-Length'] == str(len(response.data))
+    assert gzip.decompress(response.data) == client.get('/big').data
+
+
+def test_large_json_uses_brotli_when_available(client, fake_brotli):
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.data.startswith(b'br:')
+
+
+@pytest.mark.parametrize('path, headers', [
+    ('/small', {'Accept-Encoding': 'gzip'}),  # below the size threshold
+    ('/big', {}),  # client did not ask
+    ('/big', {'Accept-Encoding': 'gzip;q=0'}),
+    ('/stream', {'Accept-Encoding': 'gzip'}),  # streamed bodies are left alone
+    ('/png', {'Accept-Encoding': 'gzip'}),  # already compressed formats
+])
+def test_uncompressed_responses_still_vary_on_accept_encoding(client, path, headers):
+    response = client.get(path, headers=headers)
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_size_threshold_is_inclusive(client, monkeypatch):
+    size = len(client.get('/small').data)
+    monkeypatch.setattr(compression, 'MIN_SIZE', size)
+    assert client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers['Content-Encoding'] == 'gzip'
+
+    monkeypatch.setattr(compression, 'MIN_SIZE', size + 1)
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_compressed_responses_weaken_strong_etags(client):
+    response = client.get('/etag', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert client.get('/etag').headers['ETag'] == '"v1"'
@@ -0,0 +1,67 @@
+import io
+import os
+import time
+
+import pytest
+
+from image_proxy import DiskLRUCache, ImageProxy
+
+
+def test_disk_cache_evicts_least_recently_used_first(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=300)
+    for age, key in enumerate(['a', 'b', 'c']):
+        cache.set(key, b'x' * 100)
+        past = time.time() - 100 + age
+        os.utime(cache._path(key), (past, past))
+
+    assert cache.get('a') == b'x' * 100  # now the most recently used
+    cache.set('d', b'x' * 100)
+
+    assert cache.get('b') is None and cache.get('c') is None
+    assert cache.get('a') is not None and cache.get('d') is not None
+    assert cache.evictions == 2
+    assert cache.stats()['bytes'] == 200 <= cache.max_bytes * 0.9
+
+
+def test_disk_cache_counts_files_already_on_disk(tmp_path):
+    DiskLRUCache(str(tmp_path), max_bytes=1000).set('a', b'x' * 100)
+
+    assert DiskLRUCache(str(tmp_path), max_bytes=1000).stats()['bytes'] == 100
+
+
+@pytest.fixture
+def proxy(tmp_path):
+    pytest.importorskip('PIL', reason='needs the images extra')
+    return ImageProxy(DiskLRUCache(str(tmp_path), max_bytes=10 ** 6))
+
+
+def png(width, height, mode='RGBA'):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), (255, 165, 0, 128)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('output, mode', [('webp', 'RGBA'), ('jpeg', 'RGB')])
+def test_encode_resizes_to_the_requested_width(proxy, output, mode):
+    from PIL import Image
+
+    encoded = proxy._encode(png(1000, 600), 480, output)
+
+    with Image.open(io.BytesIO(encoded)) as image:
+        assert image.format == output.upper()
+        assert image.size == (480, 288)
+        assert image.mode == mode
+
+
+def test_encode_never_upscales(proxy):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(proxy._encode(png(200, 100), 480, 'jpeg'))) as image:
+        assert image.size == (200, 100)
+
+
+def test_encode_rejects_unreadable_images(proxy):
+    with pytest.raises(ValueError):
+        proxy._encode(b'not an image', 480, 'webp')
@@ -0,0 +1,24 @@
+import metrics
+from app import app
+
+
+def test_histogram_renders_mixed_label_types():
+    histogram = metrics.Histogram('test_mixed_seconds', 'test', ('endpoint', 'status'))
+    histogram.observe(0.1, 'complexSearch', 200)
+    histogram.observe(0.2, 'complexSearch', 'ConnectionError')
+
+    lines = list(histogram.render())
+
+    assert 'mealbuddy_test_mixed_seconds_count{endpoint="complexSearch",status="200"} 1' in lines
+    assert 'mealbuddy_test_mixed_seconds_count{endpoint="complexSearch",status="ConnectionError"} 1' in lines
+
+
+def test_metrics_page_survives_upstream_errors_next_to_responses():
+    url = 'https://api.spoonacular.com/recipes/complexSearch'
+    metrics.observe_upstream(url, 200, 0.05)
+    metrics.observe_upstream(url, 'Timeout', 10.0)
+
+    response = app.test_client().get('/metrics')
+
+    assert response.status_code == 200
+    assert 'status="Timeout"' in response.get_data(as_text=True)
@@ -0,0 +1,105 @@
+import pytest
+
+from normalizer import RecipeNormalizer, difficulty_for, nutrient_field, parse_nutrient_names
+from scaling import normalize_unit
+
+
+@pytest.mark.parametrize('name, field', [
+    ('Calories', 'calories'),
+    ('Saturated Fat', 'saturated_fat'),
+    ('  Vitamin C ', 'vitamin_c'),
+    ('SUGAR', 'sugar'),
+])
+def test_nutrient_field(name, field):
+    assert nutrient_field(name) == field
+
+
+@pytest.mark.parametrize('value, lookup', [
+    (None, {}),
+    ('', {}),
+    ('Fiber', {'Fiber': 'fiber'}),
+    (' Fiber , Saturated Fat,,Sodium ', {'Fiber': 'fiber', 'Saturated Fat': 'saturated_fat', 'Sodium': 'sodium'}),
+])
+def test_parse_nutrient_names(value, lookup):
+    assert parse_nutrient_names(value) == lookup
+
+
+@pytest.mark.parametrize('minutes, level', [(5, 'Easy'), (20, 'Easy'), (21, 'Medium'), (45, 'Medium'),
+                                            (46, 'Hard')])
+def test_difficulty_for(minutes, level):
+    assert difficulty_for(minutes) == level
+
+
+def payload(**fields):
+    return {'id': 1, 'title': 'Soup', **fields}
+
+
+@pytest.mark.parametrize('nutrients, expected', [
+    ([], {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}),
+    ([{'name': 'Calories', 'amount': 320.5}, {'name': 'Fat', 'amount': 12}, {'name': 'Iron', 'amount': 2}],
+     {'calories': 320.5, 'protein': 0, 'carbs': 0, 'fat': 12, 'fiber': 0}),
+    ([{'name': 'Fiber', 'amount': 4}, {'name': 'Carbohydrates', 'amount': 30}],
+     {'calories': 0, 'protein': 0, 'carbs': 30, 'fat': 0, 'fiber': 4}),
+])
+def test_nutrients_are_extracted_in_one_pass(nutrients, expected):
+    normalizer = RecipeNormalizer(extra_nutrients=parse_nutrient_names('Fiber'))
+
+    recipe = normalizer.normalize(payload(nutrition={'nutrients': nutrients}))
+
+    assert recipe.nutrition_info == expected
+
+
+def test_search_results_without_nutrition_have_no_nutrition_info():
+    assert RecipeNormalizer().normalize(payload()).nutrition_info == {}
+
+
+@pytest.mark.parametrize('flags, labels', [
+    ({}, []),
+    ({'vegan': True, 'vegetarian': True}, ['vegetarian', 'vegan']),
+    ({'glutenFree': True, 'dairyFree': False}, ['gluten-free']),
+])
+def test_dietary_flags_become_labels_in_a_fixed_order(flags, labels):
+    assert RecipeNormalizer().normalize(payload(**flags)).dietary_info == labels
+
+
+def test_instructions_fall_back_to_analyzed_steps():
+    recipe = RecipeNormalizer().normalize(payload(analyzedInstructions=[
+        {'steps': [{'number': 1, 'step': 'Chop.'}, {'number': 2, 'step': 'Simmer.'}]}, {'steps': []}
+    ]))
+
+    assert recipe.instructions == '1. Chop.\n2. Simmer.'
+
+
+def test_ingredients_and_image_rewrite():
+    normalizer = RecipeNormalizer(image_url_rewriter=lambda recipe_id, url: f"/img/{recipe_id}")
+
+    recipe = normalizer.normalize(payload(image='https://img.example/1.jpg', extendedIngredients=[
+        {'name': 'garlic', 'amount': 2, 'unit': 'cloves', 'original': '2 cloves garlic'}, {'name': 'salt'}
+    ]))
+
+    assert recipe.image_url == '/img/1'
+    assert [(i.name, i.amount, i.unit) for i in recipe.ingredients] == [('garlic', 2, 'cloves'), ('salt', 0, '')]
+
+
+def test_page_skips_malformed_results():
+    recipes = RecipeNormalizer().normalize_page([payload(), {'title': 'no id'}, payload(id=2)])
+
+    assert [recipe.id for recipe in recipes] == [1, 2]
+
+
+@pytest.mark.parametrize('unit, key', [
+    ('tsp', 'tsp'),
+    ('Teaspoons', 'tsp'),
+    (' tablespoon ', 'tbsp'),
+    ('Tbs.', 'tbsp'),
+    ('cups', 'cup'),
+    ('Fluid Ounces', 'fl oz'),
+    ('GRAMS', 'g'),
+    ('lbs', 'lb'),
+    ('Litres', 'l'),
+    ('cloves', 'cloves'),  # not a measure: left as it was
+    ('', ''),
+    (None, None),
+])
+def test_ingredient_units_are_normalized(unit, key):
+    assert normalize_unit(unit) == key
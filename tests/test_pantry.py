@@ -0,0 +1,69 @@
+import pytest
+
+import pantry
+from models import Ingredient, Recipe
+from pantry import PantryIndex, normalize_ingredient_name
+
+
+def recipe(recipe_id, *ingredients):
+    return Recipe(id=recipe_id, title=f"Recipe {recipe_id}", ingredients=[Ingredient(name) for name in ingredients])
+
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'python'])
+def index(request, monkeypatch):
+    monkeypatch.setattr(pantry, 'HAVE_NUMPY', request.param)
+    index = PantryIndex()
+    index.add_many([
+        recipe(1, 'Tomatoes', 'Fresh Mozzarella', 'basil'),
+        recipe(2, 'Ripe Tomatoes', 'Bread'),
+        recipe(3, '2 garlic cloves', 'bread', 'Unsalted Butter'),
+        recipe(4, 'Eggs', 'butter', 'chopped chives'),
+        recipe(5, 'Tomatoes', 'Bread', 'Garlic', 'Extra Virgin Olive Oil'),
+    ])
+    return index
+
+
+PANTRY = ['Tomato', 'bread', 'Garlic Cloves', 'Fresh Basil']
+
+
+def ranking(index, **kwargs):
+    return [(recipe.id, matched, missing) for recipe, matched, missing in index.rank(PANTRY, **kwargs)]
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('Fresh Tomatoes', 'tomato'),
+    ('2 garlic cloves', 'garlic'),
+    ('Cloves', 'clove'),
+    ('Cherries', 'cherry'),
+    ('Extra Virgin Olive Oil', 'olive oil'),
+    ('Finely Chopped Onions', 'onion'),
+    ('', ''),
+])
+def test_normalize_ingredient_name(name, expected):
+    assert normalize_ingredient_name(name) == expected
+
+
+def test_rank_orders_by_fewest_missing_then_coverage(index):
+    assert ranking(index) == [
+        (2, 2, []),
+        (5, 3, ['olive oil']),  # one missing at 3/4 coverage beats one missing at 2/3
+        (1, 2, ['mozzarella']),
+        (3, 2, ['butter']),  # ties keep index order
+    ]
+
+
+def test_rank_respects_limits(index):
+    assert [row[0] for row in ranking(index, max_results=2)] == [2, 5]
+    assert [row[0] for row in ranking(index, max_missing=0)] == [2]
+
+
+def test_rank_without_matches_is_empty(index):
+    assert index.rank(['saffron', '']) == []
+
+
+def test_reindexing_replaces_a_recipes_ingredients(index):
+    index.add_many([recipe(2, 'rice', 'saffron')])
+
+    assert [row[0] for row in ranking(index)] == [5, 1, 3]
+    assert [recipe.id for recipe, _, _ in index.rank(['saffron'])] == [2]
+    assert len(index) == 5
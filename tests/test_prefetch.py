@@ -0,0 +1,142 @@
+import gzip
+import json
+import time
+
+from prefetch import SNAPSHOT_VERSION, PrefetchScheduler, load_snapshot, save_snapshot
+
+
+def scheduler_for(service, tokens=10, idle_seconds=0, **kwargs):
+    scheduler = PrefetchScheduler(service, rpm=60, idle_seconds=idle_seconds, **kwargs)
+    # Start with a full budget instead of waiting for the bucket to refill
+    scheduler._tokens = tokens
+    return scheduler
+
+
+def test_run_once_warms_the_most_popular_searches_and_recipes(fake_spoonacular, make_service):
+    service = make_service()
+    scheduler = scheduler_for(service)
+    for _ in range(3):
+        scheduler.record_search('Pasta')
+    scheduler.record_search('soup', cuisine='Thai')
+    scheduler.record_recipe(42)
+
+    assert scheduler.top_searches() == [('pasta', '', '', ''), ('soup', 'thai', '', '')]
+    scheduler.run_once()
+
+    assert fake_spoonacular.calls['complexSearch'] == 2
+    assert fake_spoonacular.calls['informationBulk'] == 1
+    assert service.search_expires_at('pasta') is not None
+    assert service.peek_recipe_details(42).id == 42
+    assert scheduler.stats()['warmed_searches'] == 2
+    assert scheduler.stats()['warmed_recipes'] == 1
+    assert scheduler.stats()['upstream_requests'] == 3
+
+    # Everything is fresh now, so a second pass spends nothing
+    scheduler.run_once()
+    assert sum(fake_spoonacular.calls.values()) == 3
+
+
+def test_run_once_stops_when_the_budget_runs_out(fake_spoonacular, make_service):
+    scheduler = scheduler_for(make_service(), tokens=1)
+    scheduler.record_search('pasta')
+    scheduler.record_search('pasta')
+    scheduler.record_search('soup')
+    scheduler.record_recipe(42)
+
+    scheduler.run_once()
+
+    assert fake_spoonacular.calls == {'complexSearch': 1}
+    assert scheduler.warmed_searches == 1
+
+
+def test_run_once_waits_for_the_app_to_go_idle(fake_spoonacular, make_service):
+    scheduler = scheduler_for(make_service(), idle_seconds=60)
+    scheduler.record_search('pasta')
+
+    scheduler.run_once()
+
+    assert sum(fake_spoonacular.calls.values()) == 0
+
+
+def test_seed_searches_fill_up_after_live_traffic(make_service):
+    scheduler = scheduler_for(make_service(), top_k=2)
+    scheduler._seeds = [('soup', '', '', ''), ('pasta', '', '', ''), ('salad', '', '', '')]
+    scheduler.record_search('pasta')
+
+    assert scheduler.top_searches() == [('pasta', '', '', ''), ('soup', '', '', '')]
+
+
+def test_decay_halves_counts_and_forgets_single_hits(make_service):
+    scheduler = scheduler_for(make_service())
+    for _ in range(4):
+        scheduler.record_recipe(1)
+    scheduler.record_recipe(2)
+
+    scheduler._decay()
+
+    assert scheduler._recipes == {1: 2}
+
+
+def test_snapshot_round_trip_restores_a_warm_service(tmp_path, fake_spoonacular, make_service):
+    path = str(tmp_path / 'snapshot.json.gz')
+    warm = make_service()
+    results = warm.search_recipes('pasta', max_results=3)
+    warm.get_recipe_details(42)
+
+    assert save_snapshot(path, warm) == 2
+    cold = make_service()
+    assert load_snapshot(path, cold) == 2
+
+    calls = sum(fake_spoonacular.calls.values())
+    assert [recipe.id for recipe in cold.search_recipes('pasta', max_results=3)] == [r.id for r in results]
+    assert cold.get_recipe_details(42).id == 42
+    assert sum(fake_spoonacular.calls.values()) == calls
+    # Restored recipes are indexed for local searches too
+    assert len(cold.search_recipes(max_results=10, source='local')) == 4
+
+
+def test_snapshot_restore_skips_expired_rows(tmp_path, fake_spoonacular, make_service):
+    path = str(tmp_path / 'snapshot.json.gz')
+    warm = make_service()
+    warm.get_recipe_details(1)
+    warm.get_recipe_details(2)
+    caches = warm.snapshot_caches()
+    for row in caches['recipe-details']:
+        if row[0] == 'recipe:1':
+            # Past its expiry and the stale window
+            row[2] = time.time() - 86400 - 60
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'caches': caches}, f)
+
+    cold = make_service()
+    assert load_snapshot(path, cold) == 1
+    assert cold.peek_recipe_details(1) is None
+    assert cold.peek_recipe_details(2).id == 2
+
+
+def test_load_snapshot_ignores_missing_unreadable_and_old_files(tmp_path, make_service):
+    service = make_service()
+    assert load_snapshot(str(tmp_path / 'missing.json.gz'), service) == 0
+
+    corrupt = tmp_path / 'corrupt.json.gz'
+    corrupt.write_bytes(b'not gzip')
+    assert load_snapshot(str(corrupt), service) == 0
+
+    old = tmp_path / 'old.json.gz'
+    with gzip.open(old, 'wt', encoding='utf-8') as f:
+        json.dump({'version': SNAPSHOT_VERSION + 1, 'caches': {}}, f)
+    assert load_snapshot(str(old), service) == 0
+
+
+def test_save_waits_for_the_snapshot_to_be_restored(tmp_path, fake_spoonacular, make_service):
+    path = tmp_path / 'snapshot.json.gz'
+    service = make_service()
+    service.get_recipe_details(42)
+    scheduler = PrefetchScheduler(service, snapshot_path=str(path))
+
+    assert scheduler.save() == 0
+    assert not path.exists()
+
+    scheduler.restore()
+    assert scheduler.save() == 1
+    assert scheduler.stats()['snapshots'] == 1
@@ -0,0 +1,110 @@
+import pytest
+
+import recipe_service as recipe_service_module
+import routes
+from app import app
+from ratelimit import ClientLimiter, QuotaExceededError, QuotaLimiter, TokenBucketStore, estimate_cost
+
+
+@pytest.fixture
+def strict_limiter(monkeypatch):
+    limiter = ClientLimiter(TokenBucketStore(), per_minute=1, burst=1)
+    monkeypatch.setattr(routes, 'client_limiter', limiter)
+    return limiter
+
+
+def search(client, address):
+    return client.get('/api/recipes/search', query_string={'source': 'local'},
+                      headers={'X-Forwarded-For': address})
+
+
+def test_logged_out_clients_behind_the_proxy_have_their_own_buckets(strict_limiter):
+    client = app.test_client()
+
+    assert search(client, '203.0.113.1').status_code == 200
+    assert search(client, '203.0.113.1').status_code == 429
+    assert search(client, '203.0.113.2').status_code == 200
+    assert strict_limiter.rejected == 1
+
+
+def test_only_the_trusted_hop_is_used(strict_limiter):
+    client = app.test_client()
+
+    # A client cannot dodge the limit by prepending addresses of its own
+    assert search(client, '198.51.100.7, 203.0.113.9').status_code == 200
+    assert search(client, '198.51.100.8, 203.0.113.9').status_code == 429
+
+
+BASE = 'https://api.spoonacular.com/recipes'
+
+
+class QuotaResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.mark.parametrize('path, params, cost', [
+    ('/complexSearch', {'number': 10}, 1.1),
+    ('/complexSearch', {'number': 10, 'fillIngredients': True}, 1.35),
+    ('/complexSearch', {'number': 4, 'addRecipeInformation': True, 'addRecipeNutrition': True}, 1.24),
+    ('/informationBulk', {'ids': '1,2,3'}, 2.0),
+    ('/informationBulk', {'ids': '7'}, 1.0),
+    ('/716429/information', {}, 1.0),
+    ('/716429/analyzedInstructions', None, 1.0),
+])
+def test_estimate_cost_per_endpoint(path, params, cost):
+    assert estimate_cost(BASE + path, params) == pytest.approx(cost)
+
+
+def test_quota_rejects_calls_once_the_budget_is_spent():
+    limiter = QuotaLimiter(TokenBucketStore(), daily_points=86400, burst=2.5)  # refills 1 point/s
+
+    assert limiter.acquire(BASE + '/1/information') == 1.0
+    assert limiter.acquire(BASE + '/informationBulk', {'ids': '1,2'}) == 1.5
+    with pytest.raises(QuotaExceededError) as excinfo:
+        limiter.acquire(BASE + '/2/information')
+
+    assert excinfo.value.retry_after == pytest.approx(1.0, abs=0.05)
+    assert limiter.rejected == 1
+    assert limiter.points_estimated == pytest.approx(2.5)
+
+
+def test_quota_headers_correct_the_estimate():
+    limiter = QuotaLimiter(TokenBucketStore(), daily_points=1000, burst=10)
+    cost = limiter.acquire(BASE + '/complexSearch', {'number': 100})
+    def level():
+        return limiter.store.level(limiter.BUCKET, limiter.rate, limiter.capacity)
+
+    before = level()
+    limiter.record(QuotaResponse(headers={'X-API-Quota-Request': '1.5', 'X-API-Quota-Left': '950'}), cost)
+
+    assert cost == pytest.approx(2.0)
+    assert level() == pytest.approx(before + 0.5, abs=0.01)  # the overestimate is refunded
+    assert limiter.points_left() == 950
+    assert limiter.near_limit() is False
+
+    limiter.record(QuotaResponse(headers={'X-API-Quota-Left': '50'}), 1.0)
+    assert limiter.near_limit() is True
+
+
+def test_payment_required_stops_further_calls_for_the_day():
+    limiter = QuotaLimiter(TokenBucketStore(), daily_points=1000, burst=10)
+    limiter.record(QuotaResponse(402), limiter.acquire(BASE + '/1/information'))
+
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire(BASE + '/2/information')
+    assert limiter.points_left() == 0
+
+
+def test_search_falls_back_to_the_local_index_without_calling_upstream_once_spent(fake_spoonacular, make_service,
+                                                                                  monkeypatch):
+    monkeypatch.setattr(recipe_service_module, 'rate_limit_store', TokenBucketStore())
+    service = make_service(SPOONACULAR_DAILY_POINTS='86400', SPOONACULAR_POINTS_BURST='2')
+    pasta = service.search_recipes('pasta', max_results=10, source='remote')
+
+    fallback = service.search_recipes('pasta bake', max_results=10, source='remote')
+
+    assert fake_spoonacular.calls['complexSearch'] == 1
+    assert service.quota.rejected == 1
+    assert {recipe.id for recipe in fallback} <= {recipe.id for recipe in pasta}
@@ -0,0 +1,96 @@
+import pytest
+
+from models import Ingredient, Recipe
+from recipe_index import RecipeIndex, tokenize
+
+
+def recipe(recipe_id, title, cuisines=(), meal_types=(), diets=(), ingredients=()):
+    return Recipe(id=recipe_id, title=title, cuisine_types=list(cuisines), meal_types=list(meal_types),
+                  dietary_info=list(diets), ingredients=[Ingredient(name) for name in ingredients])
+
+
+@pytest.fixture
+def index():
+    index = RecipeIndex()
+    index.add_many([
+        recipe(1, 'Tomato Pasta', ['Italian'], ['main course'], ['vegetarian'], ['tomatoes', 'basil']),
+        recipe(2, 'Chicken Curry', ['Indian'], ['main course'], ['gluten-free'], ['chicken', 'tomato']),
+        recipe(3, 'Tomato Soup', ['Italian'], ['soup'], ['vegetarian', 'gluten-free'], ['tomato']),
+        recipe(4, 'Pesto Pasta', ['Italian'], ['main course'], ['vegetarian'], ['basil', 'pine nuts']),
+    ])
+    return index
+
+
+def ids(recipes):
+    return [recipe.id for recipe in recipes]
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({}, [1, 2, 3, 4]),
+    ({'query': 'tomatoes'}, [1, 2, 3]),  # plural query, ingredient and title tokens
+    ({'query': 'the pasta with basil'}, [1, 4]),  # stopwords are ignored
+    ({'cuisine': 'italian'}, [1, 3, 4]),
+    ({'cuisine': 'Italian', 'diet': 'Gluten Free'}, [3]),
+    ({'query': 'tomato', 'meal_type': 'Main Course'}, [1, 2]),
+    ({'query': 'tomato', 'cuisine': 'Italian', 'meal_type': 'main course', 'diet': 'vegetarian'}, [1]),
+    ({'query': 'pasta', 'diet': 'gluten-free'}, []),
+    ({'cuisine': 'Thai'}, []),
+    ({'query': 'lasagne'}, []),
+])
+def test_search_intersects_every_filter(index, filters, expected):
+    assert ids(index.search(**filters)) == expected
+
+
+def test_search_stops_at_max_results(index):
+    assert ids(index.search(cuisine='Italian', max_results=2)) == [1, 3]
+
+
+def test_reindexing_with_new_terms_replaces_the_old_document(index):
+    index.add(recipe(1, 'Mushroom Risotto', ['Italian'], ['main course'], ['vegetarian'], ['rice']))
+
+    assert ids(index.search(query='tomato')) == [2, 3]
+    assert ids(index.search(query='risotto')) == [1]
+    assert len(index) == 4
+    assert index.facet_counts('cuisine') == {'italian': 3, 'indian': 1}
+
+
+def test_compaction_keeps_the_newest_recipes():
+    index = RecipeIndex(max_docs=4)
+    index.add_many([recipe(recipe_id, f"Dish {recipe_id}") for recipe_id in range(1, 6)])
+
+    assert ids(index.search(query='dish', max_results=10)) == [4, 5]
+
+
+def test_tokenize_singularizes_and_drops_stopwords():
+    assert tokenize('The Tomatoes and Berries of Grass Peas') == ['tomato', 'berry', 'grass', 'pea']
+
+
+def test_hybrid_search_puts_local_hits_first_and_tops_up_from_upstream(fake_spoonacular, make_service):
+    service = make_service()
+    remote = ids(service.search_recipes('pasta', max_results=3, source='remote'))
+    local_only = recipe(900001, 'Baked Pasta', ['Italian'])
+    service.index = RecipeIndex()
+    service.index.add(local_only)
+
+    results = ids(service.search_recipes('pasta', max_results=3, source='hybrid'))
+
+    assert results == [local_only.id] + remote[:2]
+    assert fake_spoonacular.calls['complexSearch'] == 1  # the remote page came from the cache
+
+
+def test_hybrid_search_skips_upstream_when_the_index_has_enough(fake_spoonacular, make_service):
+    service = make_service()
+    service.index.add_many([recipe(recipe_id, 'Pasta Bake') for recipe_id in (900001, 900002)])
+
+    assert ids(service.search_recipes('pasta bake', max_results=2, source='hybrid')) == [900001, 900002]
+    assert ids(service.search_recipes('pasta', max_results=5, source='local')) == [900001, 900002]
+    assert fake_spoonacular.calls['complexSearch'] == 0
+
+
+def test_hybrid_stream_labels_local_and_remote_results(fake_spoonacular, make_service):
+    service = make_service()
+    service.index.add(recipe(900001, 'Pasta Bake'))
+
+    origins = [origin for origin, _ in service.iter_search('pasta', max_results=3, source='hybrid')]
+
+    assert origins == ['local', 'remote', 'remote']
@@ -0,0 +1,139 @@
+import threading
+
+import requests
+
+from benchmarks.fake_spoonacular import make_recipe
+
+
+def run_concurrently(fn, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        results[index] = fn()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_searches_share_one_upstream_call(fake_spoonacular, make_service):
+    fake_spoonacular.latency = 0.2
+    service = make_service()
+
+    results = run_concurrently(lambda: [recipe.id for recipe in service.search_recipes('pasta', max_results=5)],
+                               20)
+
+    assert fake_spoonacular.calls['complexSearch'] == 1
+    assert all(ids == results[0] and len(ids) == 5 for ids in results)
+
+
+def test_concurrent_streamed_searches_share_one_upstream_call(fake_spoonacular, make_service):
+    fake_spoonacular.latency = 0.2
+    service = make_service()
+
+    results = run_concurrently(
+        lambda: [(origin, recipe.id) for origin, recipe in service.iter_search('pasta', max_results=5,
+                                                                                 source='remote')],
+        20
+    )
+
+    assert fake_spoonacular.calls['complexSearch'] == 1
+    assert all(len(items) == 5 for items in results)
+    assert len({tuple(recipe_id for _, recipe_id in items) for items in results}) == 1
+
+
+def test_smaller_search_is_sliced_from_a_cached_larger_page(fake_spoonacular, make_service):
+    service = make_service()
+    page = [recipe.id for recipe in service.search_recipes('pasta', max_results=10, source='remote')]
+
+    smaller = [recipe.id for recipe in service.search_recipes('pasta', max_results=4, source='remote')]
+
+    assert smaller == page[:4]
+    assert fake_spoonacular.calls['complexSearch'] == 1
+
+
+def test_larger_search_goes_upstream(fake_spoonacular, make_service):
+    service = make_service()
+    service.search_recipes('pasta', max_results=4, source='remote')
+
+    larger = service.search_recipes('pasta', max_results=10, source='remote')
+
+    assert len(larger) == 10
+    assert fake_spoonacular.calls['complexSearch'] == 2
+
+
+def test_short_final_page_answers_any_larger_search(fake_spoonacular, make_service):
+    fake_spoonacular.total_results = 3
+    service = make_service()
+    assert len(service.search_recipes('pasta', max_results=10, source='remote')) == 3
+
+    # Fewer matches than were asked for means the page already holds every match
+    assert len(service.search_recipes('pasta', max_results=50, source='remote')) == 3
+    assert fake_spoonacular.calls['complexSearch'] == 1
+
+
+class StubUpstream:
+    """Answers informationBulk with generated recipes for the ids it knows"""
+
+    def __init__(self, known_ids):
+        self.known_ids = set(known_ids)
+        self.requested = []
+
+    def get(self, url, params=None):
+        assert url.endswith('/informationBulk')
+        ids = [int(value) for value in params['ids'].split(',')]
+        self.requested.append(ids)
+        payload = [make_recipe(recipe_id) for recipe_id in ids if recipe_id in self.known_ids]
+        return StubResponse(payload)
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def test_bulk_fetches_only_missing_ids_in_one_call_and_keeps_order(make_service):
+    service = make_service()
+    upstream = service.http = StubUpstream(known_ids={1, 2, 3, 4})
+    service.get_recipes_bulk([2, 4])
+    upstream.requested.clear()
+
+    recipes = service.get_recipes_bulk([3, 2, 999, 1, 4, 3])
+
+    assert upstream.requested == [[3, 999, 1]]  # cached 2 and 4 are not refetched
+    assert [recipe.id for recipe in recipes] == [3, 2, 1, 4]  # unknown 999 is left out
+
+
+def test_bulk_serves_cached_recipes_when_upstream_fails(make_service):
+    service = make_service()
+    service.http = StubUpstream(known_ids={1})
+    service.get_recipes_bulk([1])
+
+    def failing_get(url, params=None):
+        raise requests.ConnectionError('down')
+
+    service.http.get = failing_get
+    assert [recipe.id for recipe in service.get_recipes_bulk([1, 2])] == [1]
+
+
+def test_bulk_splits_missing_ids_into_chunks(make_service):
+    service = make_service(RECIPE_BULK_CHUNK_SIZE='2')
+    upstream = service.http = StubUpstream(known_ids=range(1, 6))
+
+    recipes = service.get_recipes_bulk([5, 4, 3, 2, 1])
+
+    assert sorted(upstream.requested) == [[1], [3, 2], [5, 4]]
+    assert [recipe.id for recipe in recipes] == [5, 4, 3, 2, 1]
@@ -0,0 +1,78 @@
+import uuid
+from email.utils import formatdate
+
+import pytest
+
+import routes
+from app import app
+from models import Recipe
+from recipe_service import recipe_service
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+    response = client.post('/api/register', json={
+        'username': f"user-{uuid.uuid4().hex[:12]}", 'email': 'user@example.com', 'password': 'secret-password'
+    })
+    assert response.status_code == 201
+    return client
+
+
+@pytest.mark.parametrize('updated_at, status', [
+    (1000.0, 304),
+    (1000.7, 200),
+    (1001.0, 200),
+])
+def test_if_modified_since_uses_the_exact_change_time(client, monkeypatch, updated_at, status):
+    # The client's copy was last modified at 1000 (Last-Modified is whole seconds)
+    monkeypatch.setattr(routes.storage, 'list_updated_at', lambda user_id, list_name: updated_at)
+
+    response = client.get('/api/favorites', headers={'If-Modified-Since': formatdate(1000, usegmt=True)})
+
+    assert response.status_code == status
+
+
+def test_etag_revalidates(client):
+    etag = client.get('/api/history').headers['ETag']
+
+    assert client.get('/api/history', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_filter_lists_count_locally_indexed_recipes():
+    recipe_service.index.add(Recipe(id=990001, title='Gluten free lasagne', cuisine_types=['Italian'],
+                                    meal_types=['main course'], dietary_info=['gluten-free']))
+    client = app.test_client()
+
+    cuisines = client.get('/api/cuisines').get_json()
+    diets = client.get('/api/diets').get_json()
+    meal_types = client.get('/api/meal-types').get_json()
+
+    assert 'Italian' in cuisines['cuisines']
+    assert cuisines['counts']['Italian'] >= 1
+    assert cuisines['counts']['Korean'] == 0
+    assert diets['counts']['gluten free'] >= 1
+    assert meal_types['counts']['main course'] >= 1
+
+
+@pytest.mark.parametrize('servings', [True, [2, False], 0, 2.5])
+def test_scale_rejects_servings_that_are_not_whole_numbers(servings):
+    response = app.test_client().post('/api/recipes/1/scale', json={'servings': servings})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('servings', [True, {'1': True}])
+def test_shopping_list_rejects_boolean_servings(client, servings):
+    response = client.post('/api/shopping-list', json={'recipe_ids': [1], 'servings': servings})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('max_results', ['-1', '0', '101', 'many'])
+@pytest.mark.parametrize('path', ['/api/recipes/search', '/api/recipes/search/stream'])
+def test_search_rejects_max_results_out_of_range(path, max_results):
+    response = app.test_client().get(path, query_string={'max_results': max_results, 'source': 'local'})
+
+    assert response.status_code == 400
+    assert 'max_results' in response.get_json()['error']
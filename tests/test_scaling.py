@@ -0,0 +1,38 @@
+import pytest
+
+import scaling
+from models import Ingredient
+
+
+@pytest.mark.parametrize('amount, unit, expected', [
+    (3, 'tsp', (1, 'tbsp')),
+    (16, 'tbsp', (1, 'cup')),
+    (0.25, 'cup', (0.25, 'cup')),
+    (1000, 'g', (1, 'kg')),
+    (16, 'oz', (1, 'lb')),
+    (2, 'tsp', (2, 'tsp')),
+    (0.5, 'kg', (500, 'g')),
+    (0.125, 'cup', (2, 'tbsp')),
+])
+def test_best_unit_settles_at_boundaries(amount, unit, expected):
+    new_amount, new_unit = scaling.best_unit(amount, unit)
+
+    assert (scaling.round_amount(new_amount, new_unit), new_unit) == expected
+
+
+def test_best_unit_never_converts_back():
+    # 3 tsp is 0.999997 tbsp: just under the tbsp range, but tsp was just left
+    amount, unit = scaling.best_unit(scaling.convert(1, 'tbsp', 'tsp'), 'tsp')
+
+    assert unit == 'tbsp'
+    assert amount == pytest.approx(1, rel=1e-4)
+
+
+def test_scale_many_across_unit_boundary():
+    parsed = scaling.parse_ingredients([Ingredient(name='salt', amount=1, unit='tsp', original='1 tsp salt')])
+
+    scaled = scaling.scale_many(parsed, [1, 3, 48])
+
+    assert [(ingredients[0].amount, ingredients[0].unit) for ingredients in scaled] == [
+        (1, 'tsp'), (1, 'tbsp'), (1, 'cup')
+    ]
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import routes
+import serialization
+from app import app
+from models import Ingredient, Recipe
+
+RECIPE = Recipe(
+    id=42, title='Tomato soup', servings=2,
+    ingredients=[Ingredient('tomato', 400, 'g', '400 g tomatoes'), Ingredient('basil', 0.25, 'cup')],
+    cuisine_types=['Italian'], nutrition_info={'calories': 120.5, 'nutrients': [{'name': 'Fat', 'amount': 3}]}
+)
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def backend(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson', reason='needs the speedups extra')
+    else:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    return request.param
+
+
+@pytest.mark.parametrize('query, headers, legacy', [
+    ('', {}, False),
+    ('?v=1', {}, True),
+    ('', {'X-API-Version': '1'}, True),
+    ('?v=2', {}, False),
+])
+def test_recipe_round_trips_in_each_response_shape(backend, query, headers, legacy):
+    with app.test_request_context('/api/recipes/42' + query, headers=headers):
+        payload = json.loads(app.json.dumps({'recipe': RECIPE, 'ingredient': RECIPE.ingredients[0]}))
+
+    recipe = payload['recipe']
+    assert isinstance(recipe['ingredients'], str) is legacy
+    assert isinstance(recipe['nutrition_info'], str) is legacy
+    assert Recipe.from_dict(recipe) == RECIPE
+    # Dataclasses are passed through to to_dict() rather than serialized field by field
+    assert payload['ingredient'] == RECIPE.ingredients[0].to_dict()
+    assert list(recipe) == list(RECIPE.to_dict())
+
+
+def test_json_provider_keeps_key_order_and_non_string_keys(backend):
+    with app.app_context():
+        assert json.loads(app.json.dumps({'b': 1, 'a': 2})) == {'b': 1, 'a': 2}
+        assert list(json.loads(app.json.dumps({'b': 1, 'a': 2}))) == ['b', 'a']
+        assert app.json.loads(app.json.dumps({'n': [1, 2.5, None]})) == {'n': [1, 2.5, None]}
+
+
+class StubService:
+    loaded = True
+
+    def get_recipe_details(self, recipe_id):
+        return RECIPE if recipe_id == RECIPE.id else None
+
+
+@pytest.mark.parametrize('query, legacy', [('', False), ('?v=1', True)])
+def test_detail_route_serves_both_shapes(monkeypatch, query, legacy):
+    monkeypatch.setattr(routes, 'recipe_service', StubService())
+
+    response = app.test_client().get('/api/recipes/42' + query)
+
+    recipe = response.get_json()['recipe']
+    assert isinstance(recipe['ingredients'], str) is legacy
+    assert Recipe.from_dict(recipe) == RECIPE
+
+
+def test_legacy_scale_response_serializes_ingredients(monkeypatch):
+    class ScalingService:
+        def scale_recipe(self, recipe_id, servings):
+            return 2, {4: [Ingredient('tomato', 800, 'g')]}
+
+    monkeypatch.setattr(routes, 'recipe_service', ScalingService())
+
+    response = app.test_client().post('/api/recipes/42/scale?v=1', json={'servings': 4})
+
+    assert response.status_code == 200
+    assert response.get_json()['ingredients']['4'][0]['amount'] == 800
@@ -0,0 +1,105 @@
+import os
+import time
+import uuid
+
+import pytest
+from flask import Flask, session
+
+import routes  # noqa: F401  (registers the API routes)
+import sessions
+from app import app
+from image_proxy import DiskLRUCache
+from ratelimit import TokenBucketStore
+from storage import Storage
+
+
+def register(client):
+    username = f"user-{uuid.uuid4().hex[:12]}"
+    response = client.post('/api/register', json={
+        'username': username, 'email': 'user@example.com', 'password': 'secret-password'
+    })
+    assert response.status_code == 201
+    return username
+
+
+def session_cookie(client):
+    return client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+
+
+def test_cookie_holds_only_an_opaque_id():
+    client = app.test_client()
+    username = register(client)
+
+    cookie = session_cookie(client)
+    store = app.session_interface.store
+    assert username not in cookie.value
+    assert store.get(cookie.value) is None  # records are keyed by a hash of the id
+    assert store.get(app.session_interface._key(cookie.value))[0]['username'] == username
+    assert client.get('/api/user').get_json()['user']['username'] == username
+
+
+def test_login_rotates_the_session_id_and_logout_forgets_it():
+    client = app.test_client()
+    username = register(client)
+    client.post('/api/logout')
+    assert session_cookie(client) is None
+
+    planted = 'planted-session-id'
+    client.set_cookie(app.config['SESSION_COOKIE_NAME'], planted)
+    client.post('/api/login', json={'username': username, 'password': 'secret-password'})
+
+    sid = session_cookie(client).value
+    assert sid != planted
+    client.post('/api/logout')
+    assert app.session_interface.store.get(app.session_interface._key(sid)) is None
+
+
+def test_unchanged_sessions_are_not_rewritten():
+    store = sessions.MemorySessionStore()
+    writes = []
+    original_set = store.set
+    store.set = lambda *args: writes.append(args) or original_set(*args)
+
+    flask_app = Flask(__name__)
+    flask_app.secret_key = 'test'
+    flask_app.session_interface = sessions.ServerSideSessionInterface(store)
+
+    @flask_app.route('/write')
+    def write():
+        session['user_id'] = 1
+        return ''
+
+    @flask_app.route('/read')
+    def read():
+        return str(session.get('user_id'))
+
+    client = flask_app.test_client()
+    client.get('/write')
+    assert client.get('/read').get_data(as_text=True) == '1'
+    assert len(writes) == 1
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda tmp_path: sessions.MemorySessionStore(),
+    lambda tmp_path: sessions.SQLiteSessionStore(str(tmp_path / 'sessions.db')),
+])
+def test_stores_round_trip_and_expire(tmp_path, make_store):
+    store = make_store(tmp_path)
+    store.set('live', {'user_id': 7}, time.time() + 60)
+    store.set('expired', {'user_id': 8}, time.time() - 1)
+
+    assert store.get('live')[0] == {'user_id': 7}
+    assert store.get('expired') is None
+    store.delete('live')
+    assert store.get('live') is None
+
+
+def test_stores_touch_no_disk_until_first_use(tmp_path):
+    sessions.SQLiteSessionStore(str(tmp_path / 'sessions' / 'sessions.db'))
+    TokenBucketStore(str(tmp_path / 'ratelimit' / 'ratelimit.db'))
+    DiskLRUCache(str(tmp_path / 'images'), max_bytes=1024)
+    storage = Storage(f"sqlite:///{tmp_path / 'app.db'}")
+
+    assert os.listdir(tmp_path) == []
+    assert storage.get_user('nobody') is None  # tables are created on first use
+    assert 'app.db' in os.listdir(tmp_path)
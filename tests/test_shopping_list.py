@@ -0,0 +1,29 @@
+import pytest
+
+import shopping_list
+from models import Ingredient, Recipe
+
+
+def recipe(recipe_id, *ingredients):
+    return Recipe(id=recipe_id, title=f"Recipe {recipe_id}", servings=1, ingredients=[
+        Ingredient(name=name, amount=amount, unit=unit, original=f"{amount} {unit} {name}")
+        for name, amount, unit in ingredients
+    ])
+
+
+@pytest.mark.parametrize('first, second, expected', [
+    (('salt', 1, 'tsp'), ('salt', 2, 'teaspoons'), (1, 'tbsp')),
+    (('butter', 8, 'tbsp'), ('butter', 8, 'tablespoons'), (1, 'cup')),
+    (('flour', 500, 'g'), ('flour', 0.5, 'kg'), (1, 'kg')),
+    (('cheese', 8, 'oz'), ('cheese', 8, 'ounces'), (1, 'lb')),
+])
+def test_amounts_summing_to_a_unit_boundary(first, second, expected):
+    items = shopping_list.aggregate([recipe(1, first), recipe(2, second)])
+
+    assert [(item['amount'], item['unit'], item['recipe_ids']) for item in items] == [(*expected, [1, 2])]
+
+
+def test_incompatible_units_stay_separate():
+    items = shopping_list.aggregate([recipe(1, ('garlic', 2, 'cloves')), recipe(2, ('garlic', 5, 'g'))])
+
+    assert sorted((item['amount'], item['unit']) for item in items) == [(2, 'cloves'), (5, 'g')]
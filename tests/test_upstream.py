@@ -0,0 +1,181 @@
+import time
+
+import pytest
+import requests
+
+from benchmarks.fake_spoonacular import start_fake_server
+from upstream import CircuitBreaker, CircuitOpenError, UpstreamClient
+
+
+def search_url(fake):
+    return f"{fake.base_url}/complexSearch"
+
+
+def test_returns_response_without_retrying_on_success(fake_spoonacular):
+    client = UpstreamClient(max_retries=2, backoff_base=0)
+
+    response = client.get(search_url(fake_spoonacular), {'query': 'pasta', 'number': 2})
+
+    assert response.status_code == 200
+    assert len(response.json()['results']) == 2
+    assert client.retries == 0
+    assert fake_spoonacular.calls['complexSearch'] == 1
+
+
+def test_retries_5xx_then_returns_last_response(fake_spoonacular):
+    fake_spoonacular.error_rate = 1.0
+    client = UpstreamClient(max_retries=2, backoff_base=0)
+
+    response = client.get(search_url(fake_spoonacular), {'query': 'pasta'})
+
+    assert response.status_code == 503
+    assert client.retries == 2
+    assert fake_spoonacular.calls['complexSearch'] == 3
+
+
+def test_retry_after_sets_the_backoff(fake_spoonacular):
+    fake_spoonacular.error_rate = 1.0
+    fake_spoonacular.retry_after = 1
+    client = UpstreamClient(max_retries=1, backoff_base=0, backoff_max=4)
+
+    start = time.monotonic()
+    client.get(search_url(fake_spoonacular))
+
+    assert time.monotonic() - start >= 1
+
+
+def test_retry_after_is_capped_by_backoff_max(fake_spoonacular):
+    fake_spoonacular.error_rate = 1.0
+    fake_spoonacular.retry_after = 30
+    client = UpstreamClient(max_retries=1, backoff_base=0, backoff_max=0.1)
+
+    start = time.monotonic()
+    client.get(search_url(fake_spoonacular))
+
+    assert time.monotonic() - start < 1
+
+
+def test_backoff_is_jittered_and_bounded():
+    client = UpstreamClient(backoff_base=0.25, backoff_max=1.0)
+
+    for attempt in range(6):
+        delays = [client._backoff(attempt, None) for _ in range(50)]
+        assert all(0 <= delay <= min(1.0, 0.25 * 2 ** attempt) for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_timeouts_are_retried_then_raised(fake_spoonacular):
+    fake_spoonacular.latency = 0.3
+    client = UpstreamClient(read_timeout=0.05, max_retries=1, backoff_base=0)
+
+    with pytest.raises(requests.Timeout):
+        client.get(search_url(fake_spoonacular))
+
+    assert client.retries == 1
+    assert client.breaker.failures == 1
+
+
+def test_breaker_opens_and_fails_fast(fake_spoonacular):
+    fake_spoonacular.error_rate = 1.0
+    client = UpstreamClient(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    client.get(search_url(fake_spoonacular))
+    client.get(search_url(fake_spoonacular))
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.get(search_url(fake_spoonacular))
+    assert fake_spoonacular.calls['complexSearch'] == 2
+
+
+def test_breaker_closes_after_successful_trial(fake_spoonacular):
+    fake_spoonacular.error_rate = 1.0
+    client = UpstreamClient(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.1))
+    client.get(search_url(fake_spoonacular))
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    fake_spoonacular.error_rate = 0.0
+    time.sleep(0.15)
+    assert client.get(search_url(fake_spoonacular)).status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_reopens_after_failed_trial(fake_spoonacular):
+    fake_spoonacular.error_rate = 1.0
+    client = UpstreamClient(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.1))
+    client.get(search_url(fake_spoonacular))
+
+    time.sleep(0.15)
+    client.get(search_url(fake_spoonacular))
+
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.breaker.times_opened == 2
+
+
+def test_breaker_recovers_after_a_trial_that_raised_another_request_error(monkeypatch):
+    client = UpstreamClient(max_retries=2, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+    client.breaker.record_failure()
+    calls = []
+
+    def broken_body(*args, **kwargs):
+        calls.append(1)
+        raise requests.exceptions.ChunkedEncodingError('connection broken mid-body')
+
+    monkeypatch.setattr(client.session, 'get', broken_body)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get('http://upstream.invalid/recipes/complexSearch')
+
+    assert calls == [1]  # not retried
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.breaker.allow() is True  # the next trial is let through again
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is False
+
+
+def test_stale_search_is_served_while_breaker_is_open(fake_spoonacular, make_service):
+    service = make_service(SEARCH_CACHE_TTL=0, UPSTREAM_MAX_RETRIES=0, UPSTREAM_BREAKER_THRESHOLD=1)
+    fresh = service.search_recipes('pasta', max_results=3)
+    assert len(fresh) == 3
+
+    fake_spoonacular.error_rate = 1.0
+    service.search_recipes('chicken', max_results=3)
+    assert service.http.breaker.state == CircuitBreaker.OPEN
+    calls = fake_spoonacular.calls['complexSearch']
+
+    stale = service.search_recipes('pasta', max_results=3)
+
+    assert [recipe.id for recipe in stale] == [recipe.id for recipe in fresh]
+    assert fake_spoonacular.calls['complexSearch'] == calls
+
+
+def test_stale_detail_is_served_while_breaker_is_open(fake_spoonacular, make_service):
+    service = make_service(RECIPE_CACHE_TTL=0, UPSTREAM_MAX_RETRIES=0, UPSTREAM_BREAKER_THRESHOLD=1)
+    fresh = service.get_recipe_details(42)
+    assert fresh is not None and fresh.id == 42
+
+    fake_spoonacular.error_rate = 1.0
+    assert service.get_recipe_details(43) is None
+    assert service.http.breaker.state == CircuitBreaker.OPEN
+
+    assert service.get_recipe_details(42).title == fresh.title
+
+
+def test_retries_recover_from_intermittent_errors():
+    fake = start_fake_server(error_rate=0.3, seed=1)
+    try:
+        client = UpstreamClient(max_retries=4, backoff_base=0)
+        statuses = [client.get(search_url(fake), {'query': str(index)}).status_code for index in range(20)]
+    finally:
+        fake.shutdown()
+        fake.server_close()
+
+    assert statuses == [200] * 20
+    assert client.retries > 0
+    assert client.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,155 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. It then lets a single trial
+    call through (half-open); success closes it again, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logging.warning("Upstream circuit breaker opened")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {'state': self.state, 'failures': self.failures, 'times_opened': self.times_opened}
+
+
+class UpstreamClient:
+    """Connection-pooled HTTP client for Spoonacular with retries and a circuit breaker.
+
+    With a ``limiter`` (see ratelimit.QuotaLimiter) each call is charged
+    against the point budget first; retries of failed attempts are not.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, pool_size=10, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff_base=0.25, backoff_max=4.0, breaker=None, limiter=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter
+        self.retries = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, params=None):
+        """GET url, retrying connection errors, timeouts, 429 and 5xx responses.
+
+        Returns the last response (callers still call raise_for_status) or
+        raises the last connection error once retries are exhausted.
+        """
+        cost = self.limiter.acquire(url, params) if self.limiter is not None else 0
+        if not self.breaker.allow():
+            if cost:
+                self.limiter.refund(cost)
+            raise CircuitOpenError(f"Circuit open, not calling {url}")
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                metrics.observe_upstream(url, type(e).__name__, time.perf_counter() - start)
+            except requests.RequestException as e:
+                # Not worth retrying (e.g. a broken chunked body), but still an outcome: recording
+                # it is what clears a half-open trial, or the breaker would stay shut for good
+                metrics.observe_upstream(url, type(e).__name__, time.perf_counter() - start)
+                self.breaker.record_failure()
+                raise
+            else:
+                metrics.observe_upstream(url, str(response.status_code), time.perf_counter() - start)
+                if response.status_code not in self.RETRY_STATUSES:
+                    self.breaker.record_success()
+                    self._record_quota(response, cost)
+                    return response
+
+            if attempt == self.max_retries:
+                break
+            self.retries += 1
+            time.sleep(self._backoff(attempt, response))
+
+        self.breaker.record_failure()
+        if response is not None:
+            self._record_quota(response, cost)
+            return response
+        raise error
+
+    def _record_quota(self, response, cost):
+        if self.limiter is not None:
+            self.limiter.record(response, cost)
+
+    def _backoff(self, attempt, response):
+        """Exponential backoff with full jitter, honouring a numeric Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def stats(self):
+        stats = {'retries': self.retries, 'breaker': self.breaker.stats()}
+        if self.limiter is not None:
+            stats['quota'] = self.limiter.stats()
+        return stats